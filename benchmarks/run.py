@@ -0,0 +1,201 @@
+"""Benchmark the tracker's hot paths on synthetic curricula and users
+
+    python -m benchmarks.run --scales 10 100 --users 20 --output bench.json
+
+For every scale (a multiple of the shipped topics.json) and storage
+backend this times the operations behind each page and reports latency
+percentiles, throughput and peak traced memory as JSON, so runs from
+different commits can be diffed.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import build, synthetic_users, toggled
+from tracker.bitset import ProgressBitset
+from tracker.changelog import diff_progress
+from tracker.core import summarize_user, topic_summary
+from tracker.curriculum import Curriculum
+from tracker.storage import open_storage
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+TOPICS_PER_PAGE = 5
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def measure(operation, repeat, warmup=1):
+    """Latency stats for calling ``operation(i)`` ``repeat`` times, plus its peak memory
+
+    Memory is traced in a separate call so tracemalloc does not slow the
+    timed runs.
+    """
+    for i in range(warmup):
+        operation(i)
+    timings = []
+    for i in range(warmup, warmup + repeat):
+        start = time.perf_counter()
+        operation(i)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        operation(warmup + repeat)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    total = sum(timings)
+    return {
+        'runs': repeat,
+        'mean_ms': statistics.fmean(timings) * 1000,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p90_ms': percentile(timings, 90) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'max_ms': timings[-1] * 1000,
+        'ops_per_s': repeat / total if total else None,
+        'peak_kib': peak / 1024
+    }
+
+
+def populate(spec, directory, topics_data, progress_by_user):
+    """Storage of the given kind filled with the synthetic data"""
+    storage = open_storage(spec, directory)
+    storage.save_topics(topics_data)
+    for username, progress in progress_by_user.items():
+        storage.save_user_progress(username, progress)
+    return storage
+
+
+def bench_backend(spec, directory, topics_data, curriculum, progress_by_user, repeat):
+    """Timings of every page operation against one storage backend"""
+    storage = populate(spec, directory, topics_data, progress_by_user)
+    usernames = list(progress_by_user)
+    user = usernames[0]
+    first_cat = curriculum.category_ids[0]
+    page_topics = curriculum.topics_by_category[first_cat][:TOPICS_PER_PAGE]
+
+    def load_topics(i):
+        storage.load_topics()
+
+    def read_progress(i):
+        storage.read_user_progress(usernames[i % len(usernames)])
+
+    def dashboard(i):
+        summarize_user(curriculum, storage.read_user_progress(user))
+
+    def learning_path(i):
+        progress = storage.read_user_progress(user)
+        ProgressBitset.from_progress(curriculum, progress)
+        for topic_id in page_topics:
+            topic_summary(curriculum, progress, first_cat, topic_id)
+
+    def save(i):
+        version = storage.progress_version(user)
+        stored = storage.read_user_progress(user)
+        progress = toggled(curriculum, stored, i)
+        storage.save_progress_changes(user, progress, diff_progress(stored, progress), expected_version=version)
+
+    def stats(i):
+        storage.statistics(curriculum, usernames)
+
+    operations = [
+        ('load_topics', load_topics),
+        ('read_progress', read_progress),
+        ('dashboard', dashboard),
+        ('learning_path', learning_path),
+        ('save_progress', save),
+        ('statistics', stats),
+    ]
+    return {name: measure(operation, repeat) for name, operation in operations}
+
+
+def git_commit():
+    """Current commit of the repository, if it can be determined"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, users, backends, repeat, seed, template_path):
+    with open(template_path, 'r') as f:
+        template = json.load(f)
+
+    results = []
+    for scale in scales:
+        topics_data, curriculum = build(template, scale, seed)
+        text = json.dumps(topics_data)
+        parse = measure(lambda i: Curriculum(json.loads(text)), repeat)
+        results.append({
+            'scale': scale, 'users': 0, 'backend': None, 'operation': 'parse_curriculum',
+            'subtopics': curriculum.total_subtopics, **parse
+        })
+        progress_by_user = synthetic_users(curriculum, users, seed)
+        for spec in backends:
+            with tempfile.TemporaryDirectory(prefix='tracker-bench-') as directory:
+                backend_spec = 'sqlite:bench.db' if spec == 'sqlite' else spec
+                timings = bench_backend(backend_spec, directory, topics_data, curriculum, progress_by_user, repeat)
+            for operation, stats in timings.items():
+                results.append({
+                    'scale': scale, 'users': users, 'backend': spec, 'operation': operation,
+                    'subtopics': curriculum.total_subtopics, **stats
+                })
+            print(f"scale {scale}x, {users} users, {spec}: done", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the learning tracker on synthetic data")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help="Curriculum sizes as multiples of the template (default: 1 10 100)")
+    parser.add_argument('--users', type=int, default=20, help="Synthetic users per scale")
+    parser.add_argument('--backends', nargs='+', default=['json', 'bitset', 'sqlite'],
+                        choices=['json', 'bitset', 'sqlite'])
+    parser.add_argument('--repeat', type=int, default=20, help="Timed runs per operation")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--template', default=REPO_DIR / 'topics.json', type=Path)
+    parser.add_argument('--output', type=Path, help="Write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'scales': args.scales,
+            'users': args.users,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': run(args.scales, args.users, args.backends, args.repeat, args.seed, args.template)
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
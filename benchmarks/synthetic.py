@@ -0,0 +1,114 @@
+"""Deterministic synthetic curricula and user progress for benchmarks"""
+import copy
+import random
+
+from tracker.curriculum import Curriculum
+from tracker.migrations import TOPICS_SCHEMA_VERSION, VERSION_KEY, upgrade_topics
+from tracker.progress import default_progress, set_category_completed, set_topic_progress
+
+RESOURCE_TYPES = ["Video", "Article", "Course", "Documentation", "Tutorial", "Other"]
+
+
+def synthetic_topics(template, scale, seed=0, resource_rate=0.1):
+    """topics.json data with ``scale`` copies of every template category
+
+    Copies get fresh category/topic ids and suffixed names, so all subtopic
+    keys stay unique, and category prerequisites point within their copy. About ``resource_rate`` of the subtopics get a resource
+    and a note, like a curriculum that has been in use for a while.
+    """
+    rng = random.Random(seed)
+    template = upgrade_topics(template)
+    learning_path = []
+    category_position = {str(category['id']): i for i, category in enumerate(template['learning_path'])}
+    for copy_no in range(scale):
+        first_id = len(learning_path) + 1
+        for category in template['learning_path']:
+            cat_id = len(learning_path) + 1
+            topics = []
+            for topic_no, topic in enumerate(category['topics'], start=1):
+                subtopics = []
+                for subtopic in topic['subtopics']:
+                    name = subtopic['name']
+                    resources, notes = [], ""
+                    if rng.random() < resource_rate:
+                        resources = [{
+                            "type": rng.choice(RESOURCE_TYPES),
+                            "title": f"About {name}",
+                            "url": f"https://example.com/{cat_id}/{topic_no}/{len(subtopics)}",
+                            "description": ""
+                        }]
+                        notes = f"Notes on {name}"
+                    subtopics.append({
+                        "name": name if copy_no == 0 else f"{name} ({copy_no})",
+                        "resources": resources,
+                        "notes": notes
+                    })
+                topics.append({
+                    "id": float(f"{cat_id}.{topic_no}"),
+                    "name": topic['name'],
+                    "subtopics": subtopics
+                })
+            learning_path.append({
+                "id": cat_id,
+                "category": category['category'] if copy_no == 0 else f"{category['category']} ({copy_no})",
+                "description": category.get('description', ''),
+                "prerequisites": [first_id + category_position[str(r)] for r in category.get('prerequisites', [])],
+                "topics": topics
+            })
+    return {VERSION_KEY: TOPICS_SCHEMA_VERSION, "learning_path": learning_path}
+
+
+def synthetic_progress(curriculum, username, seed=0, started=0.3, completion=0.5):
+    """Progress record with roughly ``started`` of the categories under way
+
+    In a started category each subtopic is completed with probability
+    ``completion``; fully completed categories are marked complete.
+    """
+    rng = random.Random(f"{seed}:{username}")
+    progress = default_progress(username)
+    progress['started_date'] = "2025-01-01"
+    for cat_id in curriculum.category_ids:
+        if rng.random() >= started:
+            continue
+        all_done = True
+        for topic_id in curriculum.topics_by_category[cat_id]:
+            names = [
+                curriculum.subtopics[i].name
+                for i in curriculum.topic_ranges[(cat_id, topic_id)]
+                if rng.random() < completion
+            ]
+            all_done = all_done and len(names) == curriculum.topic_subtopic_count(cat_id, topic_id)
+            set_topic_progress(curriculum, progress, cat_id, topic_id, names)
+        if all_done:
+            set_category_completed(curriculum, progress, cat_id, True)
+    return progress
+
+
+def synthetic_users(curriculum, count, seed=0, **kwargs):
+    """Progress records for ``count`` users named user0000, user0001, ..."""
+    return {
+        f"user{i:04d}": synthetic_progress(curriculum, f"user{i:04d}", seed, **kwargs)
+        for i in range(count)
+    }
+
+
+def toggled(curriculum, progress_data, index):
+    """Copy of a progress record with one subtopic's completion flipped"""
+    entry = curriculum.subtopics[index % curriculum.total_subtopics]
+    progress = copy.deepcopy(progress_data)
+    done = list(
+        progress.get('progress', {}).get(entry.cat_id, {}).get('topics', {})
+        .get(entry.topic_id, {}).get('subtopics_completed', [])
+    )
+    if entry.name in done:
+        done.remove(entry.name)
+    else:
+        done.append(entry.name)
+    set_topic_progress(curriculum, progress, entry.cat_id, entry.topic_id, done)
+    return progress
+
+
+def build(template, scale, seed=0):
+    """Synthetic topics data and its Curriculum"""
+    data = synthetic_topics(template, scale, seed)
+    return data, Curriculum(data)
@@ -1,9 +1,18 @@
 import streamlit as st
-import json
 import os
 from datetime import datetime
 import pandas as pd
 from pathlib import Path
+from tracker import links, profiling
+from tracker.bitset import ProgressBitset
+from tracker.changelog import ConflictError, diff_progress
+from tracker.core import COMPLETE, IN_PROGRESS, load_progress, summarize_user, with_edits
+from tracker.events import ALL, burndown, filled
+from tracker.overlay import CurriculumOverlay
+from tracker.prerequisites import recommender_for
+from tracker.registry import UserRegistry
+from tracker.search import SearchIndex, index_for
+from tracker.storage import open_storage
 
 # Page configuration
 st.set_page_config(
@@ -13,6 +22,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Per-rerun timings and counters, only collected with LEARNING_TRACKER_PROFILE=1
+profiling.begin_run()
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -53,59 +65,193 @@ st.markdown("""
 
 # File paths
 SCRIPT_DIR = Path(__file__).parent
-TOPICS_FILE = SCRIPT_DIR / "topics.json"
 
-# User list
-USERS = ["babu", "adhi", "gokul"]
-USER_NAMES = {"babu": "Babu", "adhi": "Adhi", "gokul": "Gokul"}
+# Storage backend: "json" (progress_<user>.json), "bitset" (progress_<user>.bits)
+# or "sqlite:<path>" (single database, see `python -m tracker.storage migrate`)
+STORAGE_SPEC = os.environ.get("LEARNING_TRACKER_STORAGE", "json")
+
+# Users are listed from the storage's user index, a page at a time
+USERS_PER_PAGE = 50
 
-# Load JSON files
 @st.cache_resource
+def get_storage():
+    """Storage backend shared by all sessions"""
+    return open_storage(STORAGE_SPEC, SCRIPT_DIR)
+
+storage = get_storage()
+registry = UserRegistry(storage)
+link_cache = links.LinkCache(SCRIPT_DIR / links.CACHE_NAME)
+USER_NAMES = registry.names()
+
+# Load data
 def load_topics():
-    with open(TOPICS_FILE, 'r') as f:
-        return json.load(f)
-
-def get_progress_file(username):
-    """Get the progress file path for a user"""
-    return SCRIPT_DIR / f"progress_{username}.json"
-
-def load_user_progress(username):
-    """Load progress for a specific user"""
-    progress_file = get_progress_file(username)
-    if progress_file.exists():
-        with open(progress_file, 'r') as f:
-            return json.load(f)
+    """Load the indexed curriculum, rebuilt only when the stored topics change"""
+    return storage.load_topics()
+
+def read_user_progress(username):
+    """Stored progress for a specific user (read-only)"""
+    return load_progress(storage, username, USER_NAMES.get(username, username))
+
+def add_user():
+    """Form callback: register a new user and select them"""
+    try:
+        username = registry.add(
+            st.session_state.new_username, st.session_state.new_user_name, st.session_state.new_user_email
+        )
+    except ValueError as e:
+        st.session_state.add_user_error = str(e)
     else:
-        return {
-            "username": username,
-            "name": USER_NAMES.get(username, username),
-            "email": f"{username}@example.com",
-            "started_date": datetime.now().strftime("%Y-%m-%d"),
-            "progress": {}
-        }
+        st.session_state.add_user_error = None
+        st.session_state.user_search = ""
+        st.session_state.selected_user = username
+
+def pending_edits(username):
+    """Unsaved checkbox edits of this session, kept even while their widgets are not shown"""
+    pending = st.session_state.setdefault('pending_progress', {})
+    return pending.setdefault(username, {'topics': {}, 'categories': {}})
+
+def load_user_progress(username, stored):
+    """Progress for a specific user with this session's unsaved edits applied"""
+    edits = pending_edits(username)
+    topic_edits = {key: edit['names'] for key, edit in edits['topics'].items()}
+    return with_edits(curriculum, stored, topic_edits, edits['categories'])
+
+def toggle_subtopic(username, cat_id, topic_id, subtopic_name, widget_key):
+    """Checkbox callback: record a subtopic (un)completion as a pending edit"""
+    stored_topic = read_user_progress(username)['progress'].get(cat_id, {}).get('topics', {}).get(topic_id, {})
+    stored_names = stored_topic.get('subtopics_completed', [])
+    edit = pending_edits(username)['topics'].setdefault(
+        (cat_id, topic_id), {'was': list(stored_names), 'names': list(stored_names)}
+    )
+    done = set(edit['names'])
+    if st.session_state[widget_key]:
+        done.add(subtopic_name)
+    else:
+        done.discard(subtopic_name)
+    topic_range = curriculum.topic_ranges[(cat_id, topic_id)]
+    edit['names'] = [curriculum.subtopics[i].name for i in topic_range if curriculum.subtopics[i].name in done]
+
+def toggle_category(username, cat_id, widget_key):
+    """Checkbox callback: record marking a category (in)complete as a pending edit"""
+    pending_edits(username)['categories'][cat_id] = st.session_state[widget_key]
+
+def progress_changes(username, progress_data, stored, expected_version):
+    """Change records turning ``stored`` into progress_data, checked for conflicts
+
+    ``stored`` is the record progress_data was built from. Raises
+    ConflictError if another session saved different completions for a topic
+    or category this session edited.
+    """
+    current = read_user_progress(username)['progress']
+    conflicts = [
+        key for key, edit in pending_edits(username)['topics'].items()
+        if current.get(key[0], {}).get('topics', {}).get(key[1], {}).get('subtopics_completed', [])
+        not in (edit['was'], edit['names'])
+    ]
+    changes = diff_progress(stored, progress_data)
+    conflicts += storage.progress_conflicts(username, changes, expected_version)
+    if conflicts:
+        raise ConflictError(conflicts)
+    return changes
+
+def save_session_edits(username, progress_data, stored, expected_version):
+    """Save the session's progress, notes and resources edits, or nothing
+
+    Both parts are checked for conflicts before either is written, so a
+    ConflictError never leaves notes saved without the progress.
+    """
+    changes = progress_changes(username, progress_data, stored, expected_version)
+    overlay = session_overlay()
+    topic_changes = overlay.changes() if overlay else []
+    conflicts = storage.topic_conflicts(topic_changes, overlay.base_version)
+    if conflicts:
+        raise ConflictError(conflicts)
+    if topic_changes:
+        storage.save_topic_changes(topic_changes, expected_version=overlay.base_version)
+        overlay.clear()
+        # Saved edits reach the shared index with the next snapshot
+        st.session_state.pop('search_layer', None)
+    if changes:
+        storage.save_progress_changes(username, progress_data, changes, expected_version=expected_version)
+    del st.session_state.pending_progress[username]
 
-def save_user_progress(username, progress_data):
-    """Save progress for a specific user"""
-    progress_file = get_progress_file(username)
-    with open(progress_file, 'w') as f:
-        json.dump(progress_data, f, indent=2)
+def session_overlay():
+    """This session's unsaved resource and note edits over the shared curriculum"""
+    return st.session_state.setdefault('overlay', CurriculumOverlay())
 
-# Initialize data
-topics_data = load_topics()
+def session_search_index():
+    """Search index of the shared curriculum with this session's unsaved edits layered on top"""
+    layer = st.session_state.setdefault('search_layer', SearchIndex())
+    layer.base = index_for(curriculum)
+    return layer
+
+def reindex_subtopic(subtopic):
+    """Refresh a subtopic's search entry after it was edited in this session"""
+    overlay = session_overlay()
+    session_search_index().update(
+        curriculum.index_of(*subtopic), subtopic[2],
+        overlay.resources(curriculum, subtopic), overlay.notes(curriculum, subtopic)
+    )
+
+def delete_resource(subtopic, res_idx):
+    """Button callback: drop a resource before its fragment reruns"""
+    session_overlay().remove_resource(curriculum, topics_version, subtopic, res_idx)
+    reindex_subtopic(subtopic)
+
+def edit_notes(subtopic, widget_key):
+    """Text area callback: keep edited notes in the session overlay"""
+    session_overlay().set_notes(curriculum, topics_version, subtopic, st.session_state[widget_key])
+    reindex_subtopic(subtopic)
+
+# Initialize data (version first, so it never claims newer data than was loaded)
+with profiling.span("load_topics"):
+    topics_version = storage.topics_version()
+    curriculum = load_topics()
+    topics_data = curriculum.data
 
 # Sidebar
 st.sidebar.title("🎓 Learning Tracker")
 st.sidebar.divider()
 
-# User selection
+# User selection: search the registry and page through the matches
+user_query = st.sidebar.text_input("🔍 Find user", key="user_search")
+matching_users = registry.search(user_query, USER_NAMES)
+n_user_pages = max(1, -(-len(matching_users) // USERS_PER_PAGE))
+user_page = 1
+if n_user_pages > 1:
+    user_page = st.sidebar.number_input(
+        f"Users page (of {n_user_pages})", min_value=1, max_value=n_user_pages, value=1,
+        key=f"user_page_{user_query}"
+    )
+user_options = matching_users[(user_page - 1) * USERS_PER_PAGE:user_page * USERS_PER_PAGE]
+# Keep the current user selectable while browsing other pages
+if st.session_state.get('selected_user') in USER_NAMES and st.session_state.selected_user not in user_options:
+    user_options.insert(0, st.session_state.selected_user)
 selected_user_id = st.sidebar.selectbox(
     "Select User",
-    options=USERS,
-    format_func=lambda x: USER_NAMES.get(x, x)
+    options=user_options,
+    format_func=lambda x: USER_NAMES.get(x, x),
+    key="selected_user"
 )
 
-# Load current user's progress
-user_progress = load_user_progress(selected_user_id)
+with st.sidebar.expander("➕ Add user", expanded=not USER_NAMES):
+    with st.form("add_user", clear_on_submit=True):
+        st.text_input("Username", placeholder="e.g. priya", key="new_username")
+        st.text_input("Display name", key="new_user_name")
+        st.text_input("Email (optional)", key="new_user_email")
+        st.form_submit_button("Add", on_click=add_user)
+    if st.session_state.get('add_user_error'):
+        st.error(st.session_state.add_user_error)
+
+if selected_user_id is None:
+    st.info("No users match. Add one in the sidebar to get started.")
+    st.stop()
+
+# Load current user's progress (version first, as for the topics)
+with profiling.span("load_user_progress"):
+    progress_version = storage.progress_version(selected_user_id)
+    stored_progress = read_user_progress(selected_user_id)
+    user_progress = load_user_progress(selected_user_id, stored_progress)
 
 st.sidebar.divider()
 
@@ -122,8 +268,221 @@ st.sidebar.divider()
 st.title("🚀 AI & ML Learning Tracker")
 st.markdown("A comprehensive learning path for mastering AI and ML from basics to advanced topics")
 
+# ==================== LEARNING PATH HELPERS ====================
+TOPICS_PER_PAGE = 5
+
+def category_label(cat_id):
+    """Category name with its completion, for headers and selectors"""
+    cat_progress = user_progress['progress'].get(cat_id, {})
+    icon = '✅' if cat_progress.get('completed', False) else '📖'
+    return f"{icon} {curriculum.category_by_id[cat_id]['category']} ({cat_progress.get('completion_percentage', 0):.0f}% complete)"
+
+def render_category_header(category):
+    """Category description, progress bar and completion checkbox"""
+    cat_id = str(category['id'])
+    cat_progress = user_progress['progress'].get(cat_id, {})
+    is_cat_complete = cat_progress.get('completed', False)
+    cat_completion_pct = cat_progress.get('completion_percentage', 0)
+    
+    st.markdown(f"*{category['description']}*")
+    
+    # Category completion status
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.progress(cat_completion_pct / 100)
+    with col2:
+        st.checkbox(
+            "Mark category complete",
+            value=is_cat_complete,
+            key=f"cat_complete_{cat_id}",
+            on_change=toggle_category,
+            args=(selected_user_id, cat_id, f"cat_complete_{cat_id}")
+        )
+
+@st.fragment
+def render_topic(category, topic, highlight=()):
+    """Topic container with subtopic checkboxes, resources and notes
+
+    Runs as a fragment, so toggling a subtopic only reruns this topic.
+    Subtopics whose curriculum index is in ``highlight`` start expanded.
+    """
+    cat_id = str(category['id'])
+    topic_id = str(topic['id'])
+    topic_name = topic['name']
+    topic_range = curriculum.topic_ranges[(cat_id, topic_id)]
+    topic_total = len(topic_range)
+    
+    # Get topic progress, including edits made since the last full run
+    edit = pending_edits(selected_user_id)['topics'].get((cat_id, topic_id))
+    if edit is not None:
+        done = set(edit['names'])
+        completed = [curriculum.subtopics[i].name in done for i in topic_range]
+    else:
+        completed = [i in completed_bits for i in topic_range]
+    completed_count = sum(completed)
+    
+    with st.container(border=True):
+        col1, col2 = st.columns([4, 1])
+        
+        with col1:
+            st.markdown(f"**{topic_name}**")
+        with col2:
+            topic_completion = completed_count / topic_total * 100 if topic_total else 0
+            st.metric(
+                "Progress",
+                f"{topic_completion:.0f}%",
+                f"{completed_count}/{topic_total}"
+            )
+        
+        # Subtopics checkboxes and resources
+        st.markdown("**Subtopics:**")
+        
+        for idx, subtopic in enumerate(topic['subtopics']):
+            subtopic_name = subtopic['name']
+            is_checked = completed[idx]
+            
+            # Create expander for each subtopic
+            with st.expander(
+                f"{'✅' if is_checked else '⏳'} {subtopic_name}",
+                expanded=topic_range.start + idx in highlight
+            ):
+                # Completion checkbox
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    st.write("Mark as completed")
+                with col2:
+                    st.checkbox(
+                        "Completed",
+                        value=is_checked,
+                        key=f"{cat_id}_{topic_id}_{idx}_check",
+                        on_change=toggle_subtopic,
+                        args=(selected_user_id, cat_id, topic_id, subtopic_name, f"{cat_id}_{topic_id}_{idx}_check")
+                    )
+                
+                st.divider()
+                
+                render_subtopic_editor(cat_id, topic_id, subtopic)
+
+@st.fragment
+def render_subtopic_editor(cat_id, topic_id, subtopic):
+    """Resources and notes for one subtopic, rerun on its own when edited"""
+    subtopic_name = subtopic['name']
+    
+    # Resources section
+    st.write("**📚 Resources:**")
+    
+    # Current resources for this subtopic: the shared curriculum plus this session's edits
+    subtopic_key = f"{cat_id}_{topic_id}_{subtopic_name}"
+    overlay = session_overlay()
+    key = (cat_id, topic_id, subtopic_name)
+    
+    # Display existing resources, with link health from the checker's cache
+    resources = overlay.resources(curriculum, key)
+    link_results = link_cache.read()
+    for res_idx, resource in enumerate(resources):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            icon, status = links.badge(link_results.get(resource.get('url', '').strip()))
+            st.markdown(f"{icon} [{resource.get('title', 'Link')}]({resource.get('url', '#')})", help=status)
+            if resource.get('description'):
+                st.caption(resource.get('description'))
+        with col2:
+            st.button(
+                "❌",
+                key=f"del_res_{subtopic_key}_{res_idx}",
+                on_click=delete_resource,
+                args=(key, res_idx)
+            )
+    
+    # Add new resource
+    st.write("**Add Resource:**")
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        res_type = st.selectbox(
+            "Type",
+            ["Video", "Article", "Course", "Documentation", "Tutorial", "Other"],
+            key=f"res_type_{subtopic_key}"
+        )
+    with col2:
+        res_url = st.text_input(
+            "URL",
+            placeholder="https://example.com",
+            key=f"res_url_{subtopic_key}"
+        )
+    
+    res_title = st.text_input(
+        "Resource Title",
+        placeholder="e.g., Introduction to Linear Algebra",
+        key=f"res_title_{subtopic_key}"
+    )
+    res_description = st.text_area(
+        "Description (optional)",
+        placeholder="Brief notes about this resource",
+        height=60,
+        key=f"res_desc_{subtopic_key}"
+    )
+    
+    if st.button("➕ Add Resource", key=f"add_res_{subtopic_key}"):
+        if res_url and res_title:
+            overlay.add_resource(curriculum, topics_version, key, {
+                "type": res_type,
+                "title": res_title,
+                "url": res_url,
+                "description": res_description
+            })
+            reindex_subtopic(key)
+            st.success("Resource added!")
+        else:
+            st.error("Please fill in URL and Title")
+    
+    st.divider()
+    
+    # Notes section
+    st.write("**📝 Notes:**")
+    
+    st.text_area(
+        "Your notes for this subtopic",
+        value=overlay.notes(curriculum, key),
+        height=100,
+        key=f"notes_{subtopic_key}",
+        on_change=edit_notes,
+        args=(key, f"notes_{subtopic_key}")
+    )
+
+# ==================== VELOCITY HELPERS ====================
+def render_velocity(username, remaining_now, key):
+    """Completions per day/week and the subtopics left after each, from the rollups"""
+    period_label = st.radio("Period", ["Daily", "Weekly"], horizontal=True, key=key)
+    period = 'week' if period_label == "Weekly" else 'day'
+    with profiling.span("velocity"):
+        series = filled(storage.completion_series(username, ALL, period), period)
+    if not series:
+        st.caption("No completions recorded yet. Check off subtopics and save to start the history.")
+        return
+    buckets = [bucket for bucket, _, _ in series]
+    velocity = pd.DataFrame({
+        'Completed': [completed for _, completed, _ in series],
+        'Uncompleted': [-uncompleted for _, _, uncompleted in series]
+    }, index=pd.Index(buckets, name='Period'))
+    remaining = pd.DataFrame(
+        {'Subtopics Left': [left for _, left in burndown(series, remaining_now)]},
+        index=pd.Index(buckets, name='Period')
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Velocity**")
+        st.bar_chart(velocity, use_container_width=True)
+    with col2:
+        st.markdown("**Burndown**")
+        st.line_chart(remaining, use_container_width=True)
+
+# Everything below up to the footer is one "render" span
+profiling.start("render")
+
 # ==================== DASHBOARD PAGE ====================
 if page == "📊 Dashboard":
+    with profiling.span("aggregate"):
+        summary = summarize_user(curriculum, user_progress)
     col1, col2, col3 = st.columns(3)
     
     with col1:
@@ -134,27 +493,17 @@ if page == "📊 Dashboard":
         )
     
     with col2:
-        start_date = datetime.strptime(user_progress['started_date'], '%Y-%m-%d')
-        days_learning = (datetime.now() - start_date).days
         st.metric(
             "Days Learning",
-            f"{days_learning} days",
-            f"Started: {user_progress['started_date']}"
+            f"{summary.days_learning} days",
+            f"Started: {summary.started_date}"
         )
     
     with col3:
-        # Calculate overall progress
-        total_topics = sum(len(cat['topics']) for cat in topics_data['learning_path'])
-        completed_topics = sum(
-            1 for cat in topics_data['learning_path']
-            if str(cat['id']) in user_progress['progress']
-            and user_progress['progress'][str(cat['id'])].get('completed', False)
-        )
-        progress_pct = (completed_topics / total_topics * 100) if total_topics > 0 else 0
         st.metric(
             "Overall Progress",
-            f"{progress_pct:.1f}%",
-            f"{completed_topics}/{total_topics} categories"
+            f"{summary.overall_percentage:.1f}%",
+            f"{summary.completed_categories}/{summary.total_categories} categories"
         )
     
     st.divider()
@@ -162,25 +511,16 @@ if page == "📊 Dashboard":
     # Progress by category
     st.subheader("📊 Progress by Category")
     
-    category_progress = []
-    for category in topics_data['learning_path']:
-        cat_id = str(category['id'])
-        if cat_id in user_progress['progress']:
-            cat_progress = user_progress['progress'][cat_id]
-            completion_pct = cat_progress.get('completion_percentage', 0)
-            category_progress.append({
-                'Category': category['category'],
-                'Progress': completion_pct,
-                'Status': '✅ Complete' if cat_progress.get('completed', False) else '🔄 In Progress' if completion_pct > 0 else '⏳ Not Started'
-            })
-        else:
-            category_progress.append({
-                'Category': category['category'],
-                'Progress': 0,
-                'Status': '⏳ Not Started'
-            })
-    
-    df_progress = pd.DataFrame(category_progress)
+    status_labels = {COMPLETE: '✅ Complete', IN_PROGRESS: '🔄 In Progress'}
+    with profiling.span("dataframe"):
+        df_progress = pd.DataFrame([
+            {
+                'Category': cat.name,
+                'Progress': cat.percentage,
+                'Status': status_labels.get(cat.status, '⏳ Not Started')
+            }
+            for cat in summary.categories
+        ])
     
     col1, col2 = st.columns([2, 1])
     with col1:
@@ -203,307 +543,155 @@ if page == "📊 Dashboard":
     
     with col2:
         # Summary stats
-        st.metric("Total Categories", len(topics_data['learning_path']))
-        st.metric("Total Topics", sum(len(cat['topics']) for cat in topics_data['learning_path']))
-        total_subtopics = sum(
-            len(topic['subtopics']) 
-            for cat in topics_data['learning_path'] 
-            for topic in cat['topics']
+        st.metric("Total Categories", curriculum.total_categories)
+        st.metric("Total Topics", curriculum.total_topics)
+        st.metric("Total Subtopics", curriculum.total_subtopics)
+    
+    st.divider()
+    
+    # Next subtopics whose prerequisites are complete
+    st.subheader("🧭 Up Next")
+    
+    with profiling.span("recommend"):
+        try:
+            recommendations = recommender_for(curriculum).recommend(
+                selected_user_id, ProgressBitset.from_progress(curriculum, user_progress)
+            )
+        except ValueError as e:
+            recommendations = None
+            st.warning(f"Prerequisites in topics.json are invalid: {e}")
+    
+    if recommendations:
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'Subtopic': rec.name,
+                    'Topic': curriculum.topic_by_id[(rec.cat_id, rec.topic_id)]['name'],
+                    'Category': curriculum.category_by_id[rec.cat_id]['category'],
+                    'Why': 'In progress' if rec.in_progress else f"Unlocks {rec.unlocks} topics"
+                }
+                for rec in recommendations
+            ]),
+            use_container_width=True,
+            hide_index=True
         )
-        st.metric("Total Subtopics", total_subtopics)
+    elif recommendations is not None:
+        st.success("🎉 Everything is complete!")
+    
+    st.divider()
+    
+    # Learning velocity, from the completion rollups
+    st.subheader("📈 Learning Velocity")
+    
+    # Saved progress, as unsaved edits have no events yet
+    completed_now = ProgressBitset.from_progress(curriculum, stored_progress).count()
+    render_velocity(selected_user_id, curriculum.total_subtopics - completed_now, "velocity_period")
 
 
 # ==================== LEARNING PATH PAGE ====================
 elif page == "📚 Learning Path":
     st.subheader(f"Learning Path for {USER_NAMES.get(selected_user_id, selected_user_id)}")
     
-    for category in topics_data['learning_path']:
-        cat_id = str(category['id'])
-        cat_name = category['category']
-        cat_description = category['description']
+    # Completion as bits, for O(1) membership tests per subtopic
+    with profiling.span("aggregate"):
+        completed_bits = ProgressBitset.from_progress(curriculum, user_progress)
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        view_mode = st.radio(
+            "View",
+            ["🎯 Focused", "📜 All categories"],
+            horizontal=True,
+            key="path_view",
+            help="Focused builds widgets only for the selected category or search results"
+        )
+    with col2:
+        # Checks run in a background thread; badges pick up results on the next rerun
+        if st.button("🔗 Check links", key="check_links", disabled=links.checking(),
+                     help="Check resource links not checked in the last day"):
+            links.check_in_background(links.curriculum_urls(curriculum), link_cache)
+            st.toast("Checking resource links in the background")
+    
+    if view_mode == "🎯 Focused":
+        col1, col2 = st.columns(2)
+        with col1:
+            selected_cat_id = st.selectbox(
+                "Category",
+                options=curriculum.category_ids,
+                format_func=category_label,
+                key="path_category"
+            )
+        with col2:
+            query = st.text_input("🔍 Search subtopics, notes and resources", key="path_search").strip().lower()
         
-        # Get category progress
-        if cat_id in user_progress['progress']:
-            cat_progress = user_progress['progress'][cat_id]
-            is_cat_complete = cat_progress.get('completed', False)
-            cat_completion_pct = cat_progress.get('completion_percentage', 0)
+        highlight = set()
+        if query:
+            # Ranked matches; their topics are listed best first with the matches expanded
+            with profiling.span("search"):
+                matches = [curriculum.subtopics[doc] for doc, _ in session_search_index().search(query)]
+            highlight = {entry.index for entry in matches}
+            topic_keys = list(dict.fromkeys((entry.cat_id, entry.topic_id) for entry in matches))
+            st.caption(f"{len(matches)} matching subtopics in {len(topic_keys)} topics")
         else:
-            is_cat_complete = False
-            cat_completion_pct = 0
-        
-        # Category header with expandable section
-        with st.expander(
-            f"{'✅' if is_cat_complete else '📖'} {cat_name} ({cat_completion_pct:.0f}% complete)",
-            expanded=False
-        ):
-            st.markdown(f"*{cat_description}*")
-            
-            # Category completion status
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.progress(cat_completion_pct / 100)
-            with col2:
-                if st.checkbox(
-                    "Mark category complete",
-                    value=is_cat_complete,
-                    key=f"cat_complete_{cat_id}"
-                ):
-                    user_progress['progress'][cat_id] = user_progress['progress'].get(cat_id, {})
-                    user_progress['progress'][cat_id]['completed'] = True
-                    user_progress['progress'][cat_id]['category_name'] = cat_name
-            
+            render_category_header(curriculum.category_by_id[selected_cat_id])
             st.divider()
-            
-            # Topics in this category
-            for topic in category['topics']:
-                topic_id = str(topic['id'])
-                topic_name = topic['name']
-                
-                # Get topic progress
-                if cat_id in user_progress['progress'] and 'topics' in user_progress['progress'][cat_id]:
-                    topic_progress = user_progress['progress'][cat_id]['topics'].get(topic_id, {})
-                    is_topic_complete = topic_progress.get('completed', False)
-                    completed_subtopics = topic_progress.get('subtopics_completed', [])
-                else:
-                    is_topic_complete = False
-                    completed_subtopics = []
+            topic_keys = [(selected_cat_id, topic_id) for topic_id in curriculum.topics_by_category[selected_cat_id]]
+        
+        # Paginate topics so only one page of widgets is built
+        n_pages = max(1, -(-len(topic_keys) // TOPICS_PER_PAGE))
+        page_number = 1
+        if n_pages > 1:
+            page_number = st.number_input(
+                f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1,
+                key=f"path_page_{selected_cat_id}_{query}"
+            )
+        start = (page_number - 1) * TOPICS_PER_PAGE
+        for cat_id, topic_id in topic_keys[start:start + TOPICS_PER_PAGE]:
+            render_topic(curriculum.category_by_id[cat_id], curriculum.topic_by_id[(cat_id, topic_id)], highlight)
+    else:
+        for category in topics_data['learning_path']:
+            # Category header with expandable section
+            with st.expander(category_label(str(category['id'])), expanded=False):
+                render_category_header(category)
+                st.divider()
                 
-                with st.container(border=True):
-                    col1, col2 = st.columns([4, 1])
-                    
-                    with col1:
-                        st.markdown(f"**{topic_name}**")
-                    with col2:
-                        topic_completion = len(completed_subtopics) / len(topic['subtopics']) * 100 if topic['subtopics'] else 0
-                        st.metric(
-                            "Progress",
-                            f"{topic_completion:.0f}%",
-                            f"{len(completed_subtopics)}/{len(topic['subtopics'])}"
-                        )
-                    
-                    # Subtopics checkboxes and resources
-                    st.markdown("**Subtopics:**")
-                    new_completed = []
-                    
-                    for idx, subtopic in enumerate(topic['subtopics']):
-                        subtopic_name = subtopic['name'] if isinstance(subtopic, dict) else subtopic
-                        is_checked = subtopic_name in completed_subtopics
-                        
-                        # Create expander for each subtopic
-                        with st.expander(
-                            f"{'✅' if is_checked else '⏳'} {subtopic_name}",
-                            expanded=False
-                        ):
-                            # Completion checkbox
-                            col1, col2 = st.columns([3, 1])
-                            with col1:
-                                st.write("Mark as completed")
-                            with col2:
-                                is_checked_new = st.checkbox(
-                                    "Completed",
-                                    value=is_checked,
-                                    key=f"{cat_id}_{topic_id}_{idx}_check"
-                                )
-                                if is_checked_new:
-                                    new_completed.append(subtopic_name)
-                            
-                            st.divider()
-                            
-                            # Resources section
-                            st.write("**📚 Resources:**")
-                            
-                            # Get current resources for this subtopic
-                            subtopic_key = f"{cat_id}_{topic_id}_{subtopic_name}"
-                            if 'resources' not in st.session_state:
-                                st.session_state.resources = {}
-                            
-                            if subtopic_key not in st.session_state.resources:
-                                if isinstance(subtopic, dict) and 'resources' in subtopic:
-                                    st.session_state.resources[subtopic_key] = subtopic.get('resources', [])
-                                else:
-                                    st.session_state.resources[subtopic_key] = []
-                            
-                            # Display existing resources
-                            resources = st.session_state.resources.get(subtopic_key, [])
-                            for res_idx, resource in enumerate(resources):
-                                col1, col2 = st.columns([4, 1])
-                                with col1:
-                                    st.markdown(f"[{resource.get('title', 'Link')}]({resource.get('url', '#')})")
-                                    if resource.get('description'):
-                                        st.caption(resource.get('description'))
-                                with col2:
-                                    if st.button("❌", key=f"del_res_{subtopic_key}_{res_idx}"):
-                                        resources.pop(res_idx)
-                                        st.session_state.resources[subtopic_key] = resources
-                                        st.rerun()
-                            
-                            # Add new resource
-                            st.write("**Add Resource:**")
-                            col1, col2 = st.columns([1, 3])
-                            with col1:
-                                res_type = st.selectbox(
-                                    "Type",
-                                    ["Video", "Article", "Course", "Documentation", "Tutorial", "Other"],
-                                    key=f"res_type_{subtopic_key}"
-                                )
-                            with col2:
-                                res_url = st.text_input(
-                                    "URL",
-                                    placeholder="https://example.com",
-                                    key=f"res_url_{subtopic_key}"
-                                )
-                            
-                            res_title = st.text_input(
-                                "Resource Title",
-                                placeholder="e.g., Introduction to Linear Algebra",
-                                key=f"res_title_{subtopic_key}"
-                            )
-                            res_description = st.text_area(
-                                "Description (optional)",
-                                placeholder="Brief notes about this resource",
-                                height=60,
-                                key=f"res_desc_{subtopic_key}"
-                            )
-                            
-                            if st.button("➕ Add Resource", key=f"add_res_{subtopic_key}"):
-                                if res_url and res_title:
-                                    if subtopic_key not in st.session_state.resources:
-                                        st.session_state.resources[subtopic_key] = []
-                                    st.session_state.resources[subtopic_key].append({
-                                        "type": res_type,
-                                        "title": res_title,
-                                        "url": res_url,
-                                        "description": res_description
-                                    })
-                                    st.success("Resource added!")
-                                else:
-                                    st.error("Please fill in URL and Title")
-                            
-                            st.divider()
-                            
-                            # Notes section
-                            st.write("**📝 Notes:**")
-                            
-                            # Get current notes for this subtopic
-                            notes_key = f"{cat_id}_{topic_id}_{subtopic_name}_notes"
-                            if 'notes' not in st.session_state:
-                                st.session_state.notes = {}
-                            
-                            if notes_key not in st.session_state.notes:
-                                if isinstance(subtopic, dict) and 'notes' in subtopic:
-                                    st.session_state.notes[notes_key] = subtopic.get('notes', '')
-                                else:
-                                    st.session_state.notes[notes_key] = ''
-                            
-                            notes = st.text_area(
-                                "Your notes for this subtopic",
-                                value=st.session_state.notes.get(notes_key, ''),
-                                height=100,
-                                key=f"notes_{subtopic_key}"
-                            )
-                            st.session_state.notes[notes_key] = notes
-                    
-                    # Update progress
-                    if not user_progress['progress'].get(cat_id, {}).get('topics'):
-                        if cat_id not in user_progress['progress']:
-                            user_progress['progress'][cat_id] = {
-                                'category_name': cat_name,
-                                'topics': {}
-                            }
-                        else:
-                            user_progress['progress'][cat_id]['topics'] = {}
-                    
-                    user_progress['progress'][cat_id]['topics'][topic_id] = {
-                        'topic_name': topic_name,
-                        'completed': len(new_completed) == len(topic['subtopics']),
-                        'subtopics_completed': new_completed
-                    }
-                    
-                    # Update category progress
-                    total_subtopics_in_cat = sum(len(t['subtopics']) for t in category['topics'])
-                    completed_subtopics_in_cat = sum(
-                        len(user_progress['progress'][cat_id]['topics'].get(str(t['id']), {}).get('subtopics_completed', []))
-                        for t in category['topics']
-                    )
-                    user_progress['progress'][cat_id]['completion_percentage'] = (
-                        completed_subtopics_in_cat / total_subtopics_in_cat * 100 if total_subtopics_in_cat > 0 else 0
-                    )
+                # Topics in this category
+                for topic in category['topics']:
+                    render_topic(category, topic)
     
     # Save progress
     if st.button("💾 Save Progress", type="primary", use_container_width=True):
-        # Save resources and notes to topics
-        for cat_idx, category in enumerate(topics_data['learning_path']):
-            cat_id = str(category['id'])
-            for topic_idx, topic in enumerate(category['topics']):
-                topic_id = str(topic['id'])
-                for subtopic_idx, subtopic in enumerate(topic['subtopics']):
-                    if isinstance(subtopic, dict):
-                        subtopic_name = subtopic['name']
-                        subtopic_key = f"{cat_id}_{topic_id}_{subtopic_name}"
-                        
-                        if subtopic_key in st.session_state.get('resources', {}):
-                            topics_data['learning_path'][cat_idx]['topics'][topic_idx]['subtopics'][subtopic_idx]['resources'] = st.session_state.resources[subtopic_key]
-                        
-                        notes_key = f"{cat_id}_{topic_id}_{subtopic_name}_notes"
-                        if notes_key in st.session_state.get('notes', {}):
-                            topics_data['learning_path'][cat_idx]['topics'][topic_idx]['subtopics'][subtopic_idx]['notes'] = st.session_state.notes[notes_key]
-        
-        # Save to files
-        with open(TOPICS_FILE, 'w') as f:
-            json.dump(topics_data, f, indent=2)
-        save_user_progress(selected_user_id, user_progress)
-        st.success(f"Progress saved successfully for {USER_NAMES.get(selected_user_id)}!")
-        st.rerun()
+        # Persist only the subtopics edited in this session
+        try:
+            save_session_edits(selected_user_id, user_progress, stored_progress, progress_version)
+        except ConflictError as e:
+            st.error(f"Not saved: {e}. Reload the page to see their changes.")
+        else:
+            st.success(f"Progress saved successfully for {USER_NAMES.get(selected_user_id)}!")
+            st.rerun()
 
 
 # ==================== STATISTICS PAGE ====================
 elif page == "📈 Statistics":
     st.subheader("Learning Statistics")
     
+    # Read from the storage's materialized counters, not from any progress record
+    with profiling.span("aggregate"):
+        stats = storage.statistics(curriculum, list(USER_NAMES), USER_NAMES)
+    
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### Overall Platform Statistics")
-        st.metric("Total Users", len(USERS))
-        
-        avg_progress = 0
-        if len(USERS) > 0:
-            total_progress = 0
-            total_categories = len(topics_data['learning_path'])
-            for username in USERS:
-                user_data = load_user_progress(username)
-                user_progress_sum = sum(
-                    user_data['progress'].get(str(cat['id']), {}).get('completion_percentage', 0)
-                    for cat in topics_data['learning_path']
-                )
-                total_progress += user_progress_sum
-            avg_progress = total_progress / (len(USERS) * total_categories) if len(USERS) > 0 else 0
-        
-        st.metric("Average Progress", f"{avg_progress:.1f}%")
-        st.metric("Total Categories", len(topics_data['learning_path']))
-        st.metric("Total Topics", sum(len(cat['topics']) for cat in topics_data['learning_path']))
+        st.metric("Total Users", stats['total_users'])
+        st.metric("Average Progress", f"{stats['average_progress']:.1f}%")
+        st.metric("Total Categories", curriculum.total_categories)
+        st.metric("Total Topics", curriculum.total_topics)
     
     with col2:
         st.markdown("### User Comparison")
         
-        # Create comparison data
-        comparison_data = []
-        for username in USERS:
-            user_data = load_user_progress(username)
-            completed_cats = sum(
-                1 for cat in topics_data['learning_path']
-                if str(cat['id']) in user_data['progress']
-                and user_data['progress'][str(cat['id'])].get('completed', False)
-            )
-            total_cats = len(topics_data['learning_path'])
-            comparison_data.append({
-                'User': USER_NAMES.get(username, username),
-                'Completed Categories': completed_cats,
-                'Total Categories': total_cats,
-                'Percentage': (completed_cats / total_cats * 100) if total_cats > 0 else 0
-            })
-        
-        df_comparison = pd.DataFrame(comparison_data)
+        df_comparison = stats['comparison']
         st.dataframe(
             df_comparison,
             use_container_width=True,
@@ -520,37 +708,44 @@ elif page == "📈 Statistics":
     
     st.divider()
     
+    # Ranking from the per-user counters the storage keeps up to date on save
+    st.markdown("### 🏆 Leaderboard")
+    
+    st.dataframe(
+        stats['leaderboard'],
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Average Progress": st.column_config.ProgressColumn(
+                "Average Progress",
+                min_value=0,
+                max_value=100,
+                format="%.1f%%"
+            )
+        }
+    )
+    
+    st.divider()
+    
     # Category popularity
     st.markdown("### Category Engagement")
     
-    engagement_data = []
-    for category in topics_data['learning_path']:
-        cat_id = str(category['id'])
-        users_started = sum(
-            1 for username in USERS
-            if cat_id in load_user_progress(username)['progress']
-            and load_user_progress(username)['progress'][cat_id].get('completion_percentage', 0) > 0
-        )
-        users_completed = sum(
-            1 for username in USERS
-            if cat_id in load_user_progress(username)['progress']
-            and load_user_progress(username)['progress'][cat_id].get('completed', False)
-        )
-        
-        engagement_data.append({
-            'Category': category['category'],
-            'Users Started': users_started,
-            'Users Completed': users_completed,
-            'Total Users': len(USERS)
-        })
-    
-    df_engagement = pd.DataFrame(engagement_data)
+    df_engagement = stats['engagement']
     
     col1, col2 = st.columns(2)
     with col1:
         st.bar_chart(df_engagement.set_index('Category')['Users Started'], use_container_width=True)
     with col2:
         st.bar_chart(df_engagement.set_index('Category')['Users Completed'], use_container_width=True)
+    
+    st.divider()
+    
+    # Platform-wide learning velocity, from the completion rollups
+    st.markdown("### Learning Velocity")
+    
+    render_velocity(ALL, stats['remaining_subtopics'], "platform_velocity_period")
+
+profiling.stop("render")
 
 # Footer
 st.divider()
@@ -560,3 +755,18 @@ st.markdown("""
     <p>AI & ML Learning Tracker | Last Updated: """ + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + """</p>
 </div>
 """, unsafe_allow_html=True)
+
+# Profiling panel
+profile = profiling.end_run(label=page)
+if profile is not None:
+    with st.sidebar.expander("⏱️ Profile (last run)"):
+        st.metric("Total", f"{profile['total_ms']:.1f} ms")
+        st.dataframe(
+            pd.DataFrame(
+                [{'Span': path, 'Calls': span['calls'], 'ms': span['ms']} for path, span in profile['spans'].items()],
+                columns=['Span', 'Calls', 'ms']
+            ),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.json(profile['counters'])
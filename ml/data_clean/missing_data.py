@@ -1,4 +1,382 @@
-import seaborn as sns
+"""Out-of-core missing-data profiling and imputation for large tables
 
-df = sns.load_dataset("titanic")
-print(df.head())
\ No newline at end of file
+    python -m ml.data_clean.missing_data profile [data.csv]
+    python -m ml.data_clean.missing_data impute data.csv clean.csv --fill age=median embarked=mode
+
+CSV and Parquet files (Parquet needs pyarrow) are read ``chunksize`` rows
+at a time, so memory stays bounded by the chunk size whatever the file
+size. A profile pass collects, per column, the null count, the rows where
+two columns are missing together (co-missingness) and the distinct
+patterns of missing columns per row, all with vectorized NumPy ops over
+each chunk's null mask. Imputation fills each column with its mean,
+median, mode or the previous non-null value (ffill); medians are exact,
+found with a few extra histogram passes instead of sorting the column.
+
+Without a path the bundled passengers.csv fixture (a synthetic,
+Titanic-like table) is used, so everything runs offline.
+"""
+import argparse
+import os
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FIXTURE = Path(__file__).with_name("passengers.csv")
+DEFAULT_CHUNKSIZE = 100_000
+MAX_PATTERNS = 10_000
+MEDIAN_BINS = 4096
+COLLECT_LIMIT = 1_000_000
+STRATEGIES = ('mean', 'median', 'mode', 'ffill')
+
+
+def _is_parquet(path):
+    return Path(path).suffix.lower() in ('.parquet', '.pq')
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet files need pyarrow: pip install pyarrow")
+    return pq
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE, columns=None, dtype=None):
+    """DataFrames of up to ``chunksize`` rows from a CSV or Parquet file
+
+    ``dtype`` (CSV only) fixes column types, so every chunk agrees even
+    when a column only has nulls in some of them.
+    """
+    if _is_parquet(path):
+        for batch in _parquet().ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns, dtype=dtype)
+
+
+def _wider(a, b):
+    """Type holding values of both dtypes, as pandas would infer for the whole file"""
+    if a is None or a == b:
+        return b
+    if a.kind in 'iuf' and b.kind in 'iuf':
+        return np.promote_types(a, b)
+    return np.dtype(object)
+
+
+class MissingProfile:
+    """Missing-data statistics accumulated over chunks of one table
+
+    ``co_missing[i, j]`` counts the rows where columns i and j are both
+    missing, so its diagonal holds the null counts. Patterns map each
+    distinct set of missing columns, as a packed bit mask, to its row
+    count; once MAX_PATTERNS are known, rows with new patterns are only
+    counted in ``other_patterns``.
+    """
+
+    def __init__(self, columns, mode_columns=()):
+        self.columns = list(columns)
+        n = len(self.columns)
+        self.rows = 0
+        self.co_missing = np.zeros((n, n), dtype=np.int64)
+        self.patterns = {}
+        self.other_patterns = 0
+        self.dtypes = {column: None for column in self.columns}
+        # Numeric columns: non-null count, sum, min and max
+        self.counts = np.zeros(n, dtype=np.int64)
+        self.sums = np.zeros(n)
+        self.mins = np.full(n, np.inf)
+        self.maxs = np.full(n, -np.inf)
+        # Value counts kept only where a mode is wanted (one entry per distinct value)
+        self.value_counts = {column: Counter() for column in mode_columns}
+
+    @property
+    def null_counts(self):
+        return np.diag(self.co_missing).copy()
+
+    def add(self, chunk):
+        """Fold one chunk into the statistics"""
+        chunk = chunk[self.columns]
+        mask = chunk.isna().to_numpy()
+        self.rows += len(chunk)
+        # float32 products are exact below 2**24 rows per chunk and use BLAS
+        m = mask.astype(np.float32)
+        self.co_missing += np.rint(m.T @ m).astype(np.int64)
+
+        packed = np.ascontiguousarray(np.packbits(mask, axis=1))
+        keys, counts = np.unique(packed.view(np.dtype((np.void, packed.shape[1]))), return_counts=True)
+        for key, count in zip(keys, counts):
+            key = key.tobytes()
+            if key in self.patterns:
+                self.patterns[key] += int(count)
+            elif len(self.patterns) < MAX_PATTERNS:
+                self.patterns[key] = int(count)
+            else:
+                self.other_patterns += int(count)
+
+        for i, column in enumerate(self.columns):
+            series = chunk[column]
+            self.dtypes[column] = _wider(self.dtypes[column], series.dtype)
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                values = values[~np.isnan(values)]
+                if len(values):
+                    self.counts[i] += len(values)
+                    self.sums[i] += values.sum()
+                    self.mins[i] = min(self.mins[i], values.min())
+                    self.maxs[i] = max(self.maxs[i], values.max())
+            if column in self.value_counts:
+                self.value_counts[column].update(series.value_counts(dropna=True).to_dict())
+
+    def null_table(self):
+        """Null count and percentage per column, most missing first"""
+        nulls = self.null_counts
+        return pd.DataFrame({
+            'column': self.columns,
+            'dtype': [str(self.dtypes[c]) for c in self.columns],
+            'nulls': nulls,
+            'null_pct': nulls / self.rows * 100 if self.rows else 0.0
+        }).sort_values('nulls', ascending=False, kind='stable').reset_index(drop=True)
+
+    def co_missing_frame(self, conditional=False):
+        """Co-missingness counts, or with ``conditional`` the share of rows
+        missing column i that also miss column j"""
+        matrix = self.co_missing.astype(float)
+        if conditional:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                matrix = np.nan_to_num(matrix / np.diag(matrix)[:, None])
+        return pd.DataFrame(matrix, index=self.columns, columns=self.columns)
+
+    def pattern_table(self, top=10):
+        """Most frequent missing-column patterns: one boolean column per table
+        column (True = missing) and the number of rows"""
+        ranked = sorted(self.patterns.items(), key=lambda item: -item[1])[:top]
+        masks = [np.unpackbits(np.frombuffer(key, dtype=np.uint8), count=len(self.columns)).astype(bool)
+                 for key, _ in ranked]
+        table = pd.DataFrame(masks, columns=self.columns) if masks else pd.DataFrame(columns=self.columns)
+        table['rows'] = [count for _, count in ranked]
+        return table
+
+    def mean(self, column):
+        i = self.columns.index(column)
+        return self.sums[i] / self.counts[i] if self.counts[i] else np.nan
+
+    def mode(self, column):
+        counts = self.value_counts[column]
+        return counts.most_common(1)[0][0] if counts else np.nan
+
+
+def profile(path, chunksize=DEFAULT_CHUNKSIZE, mode_columns=()):
+    """MissingProfile of a whole file, read chunk by chunk"""
+    result = None
+    for chunk in read_chunks(path, chunksize):
+        if result is None:
+            result = MissingProfile(chunk.columns, mode_columns)
+        result.add(chunk)
+    return result
+
+
+def exact_medians(path, columns, stats, chunksize=DEFAULT_CHUNKSIZE, bins=MEDIAN_BINS,
+                  collect_limit=COLLECT_LIMIT):
+    """Exact medians of numeric columns with memory bounded by ``collect_limit``
+
+    Each pass counts the values of a [lo, hi) window around the middle
+    rank(s) into ``bins`` buckets and narrows the window to the buckets
+    holding them. Once a window has at most ``collect_limit`` values (or
+    holds a single distinct value) its values are collected and the
+    median is picked with np.partition.
+    """
+    medians = {}
+    windows = {}
+    for column in columns:
+        i = stats.columns.index(column)
+        n = int(stats.counts[i])
+        if n == 0 or stats.mins[i] == stats.maxs[i]:
+            medians[column] = stats.mins[i] if n else np.nan
+            continue
+        windows[column] = {
+            'ranks': ((n - 1) // 2, n // 2), 'below': 0, 'count': n,
+            'lo': stats.mins[i], 'hi': np.nextafter(stats.maxs[i], np.inf)
+        }
+    while windows:
+        passes = {}
+        for column, w in windows.items():
+            if w['count'] <= collect_limit:
+                passes[column] = {'values': []}
+            else:
+                passes[column] = {
+                    'edges': np.linspace(w['lo'], w['hi'], bins + 1),
+                    'hist': np.zeros(bins, dtype=np.int64), 'min': np.inf, 'max': -np.inf
+                }
+        dtype = {c: np.float64 for c in windows} if not _is_parquet(path) else None
+        for chunk in read_chunks(path, chunksize, columns=list(windows), dtype=dtype):
+            for column, w in windows.items():
+                values = chunk[column].to_numpy(dtype=np.float64, na_value=np.nan)
+                values = values[(values >= w['lo']) & (values < w['hi'])]
+                current = passes[column]
+                if 'values' in current:
+                    current['values'].append(values)
+                elif len(values):
+                    buckets = np.searchsorted(current['edges'], values, side='right') - 1
+                    current['hist'] += np.bincount(buckets, minlength=bins)
+                    current['min'] = min(current['min'], values.min())
+                    current['max'] = max(current['max'], values.max())
+
+        for column, current in passes.items():
+            w = windows[column]
+            low_rank, high_rank = (rank - w['below'] for rank in w['ranks'])
+            if 'values' in current:
+                values = np.partition(np.concatenate(current['values']), [low_rank, high_rank])
+                medians[column] = (values[low_rank] + values[high_rank]) / 2
+                del windows[column]
+            elif current['min'] == current['max']:
+                medians[column] = current['min']
+                del windows[column]
+            else:
+                cumulative = np.cumsum(current['hist'])
+                first = int(np.searchsorted(cumulative, low_rank, side='right'))
+                last = int(np.searchsorted(cumulative, high_rank, side='right'))
+                skipped = int(cumulative[first - 1]) if first else 0
+                w['below'] += skipped
+                w['count'] = int(cumulative[last]) - skipped
+                w['lo'], w['hi'] = current['edges'][first], current['edges'][last + 1]
+    return medians
+
+
+def fill_values(path, strategies, stats, chunksize=DEFAULT_CHUNKSIZE):
+    """Value each mean/median/mode column is filled with"""
+    values = {column: stats.mean(column) for column, s in strategies.items() if s == 'mean'}
+    values.update((column, stats.mode(column)) for column, s in strategies.items() if s == 'mode')
+    medians = [column for column, s in strategies.items() if s == 'median']
+    if medians:
+        values.update(exact_medians(path, medians, stats, chunksize))
+    return values
+
+
+class _Output:
+    """CSV or Parquet file written chunk by chunk, replacing ``path`` when closed"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self.parquet = _is_parquet(path)
+        self.writer = None
+        self.file = None
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+
+            if self.writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self.writer = _parquet().ParquetWriter(self.tmp_path, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self.writer.schema, preserve_index=False)
+            self.writer.write_table(table)
+        else:
+            header = self.file is None
+            if header:
+                self.file = open(self.tmp_path, 'w', newline='')
+            chunk.to_csv(self.file, header=header, index=False)
+
+    def close(self, keep=True):
+        if self.writer is not None:
+            self.writer.close()
+        if self.file is not None:
+            self.file.close()
+        if keep:
+            os.replace(self.tmp_path, self.path)
+        elif self.tmp_path.exists():
+            os.remove(self.tmp_path)
+
+
+def impute(path, output, strategies, chunksize=DEFAULT_CHUNKSIZE):
+    """Write a copy of a table with missing values filled column by column
+
+    ``strategies`` maps column names to "mean", "median", "mode" or
+    "ffill". Forward fill carries the last non-null value across chunks;
+    nulls before a column's first value stay null. Returns the profile of
+    the input and the values used for mean/median/mode columns.
+    """
+    for column, strategy in strategies.items():
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy!r} for {column!r} (use {', '.join(STRATEGIES)})")
+    stats = profile(path, chunksize, mode_columns=[c for c, s in strategies.items() if s == 'mode'])
+    missing = set(strategies) - set(stats.columns)
+    if missing:
+        raise ValueError(f"No such columns: {', '.join(sorted(missing))}")
+    values = fill_values(path, strategies, stats, chunksize)
+    dtype = None
+    if not _is_parquet(path):
+        # Integer columns with nulls anywhere are read as floats in every chunk
+        nulls = dict(zip(stats.columns, stats.null_counts))
+        dtype = {c: np.float64 if t.kind in 'iu' and nulls[c] else t for c, t in stats.dtypes.items()}
+    carry = {column: None for column, s in strategies.items() if s == 'ffill'}
+
+    out = _Output(output)
+    try:
+        for chunk in read_chunks(path, chunksize, dtype=dtype):
+            for column, value in values.items():
+                chunk[column] = chunk[column].fillna(value)
+            for column, last in carry.items():
+                filled = chunk[column].ffill()
+                if last is not None:
+                    filled = filled.fillna(last)
+                chunk[column] = filled
+                if len(filled) and pd.notna(filled.iloc[-1]):
+                    carry[column] = filled.iloc[-1]
+            out.write(chunk)
+    except BaseException:
+        out.close(keep=False)
+        raise
+    out.close()
+    return stats, values
+
+
+def _print_profile(stats, top):
+    with pd.option_context('display.width', 160, 'display.max_columns', 50, 'display.precision', 2):
+        print(f"{stats.rows} rows, {len(stats.columns)} columns\n")
+        print(stats.null_table().to_string(index=False))
+        missing = [c for c, n in zip(stats.columns, stats.null_counts) if n]
+        if missing:
+            print("\nShare of rows missing <row> that also miss <column>:")
+            print(stats.co_missing_frame(conditional=True).loc[missing, missing].to_string(float_format='{:.2f}'.format))
+        patterns = stats.pattern_table(top)
+        print(f"\nTop {len(patterns)} missing-value patterns (X = missing):")
+        shown = patterns[missing + ['rows']].copy()
+        shown[missing] = shown[missing].replace({True: 'X', False: ''})
+        print(shown.to_string(index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile and impute missing values in large CSV/Parquet files")
+    commands = parser.add_subparsers(dest='command', required=True)
+    profile_parser = commands.add_parser('profile', help="Null counts, co-missingness and patterns")
+    profile_parser.add_argument('path', nargs='?', default=FIXTURE, type=Path)
+    profile_parser.add_argument('--top', type=int, default=10, help="Patterns to show")
+    impute_parser = commands.add_parser('impute', help="Write a copy with missing values filled")
+    impute_parser.add_argument('path', type=Path)
+    impute_parser.add_argument('output', type=Path)
+    impute_parser.add_argument('--fill', nargs='+', required=True, metavar='COLUMN=STRATEGY',
+                               help=f"Strategy per column: {', '.join(STRATEGIES)}")
+    for sub in (profile_parser, impute_parser):
+        sub.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'profile':
+            _print_profile(profile(args.path, args.chunksize), args.top)
+            return
+        strategies = dict(item.rsplit('=', 1) for item in args.fill)
+        _, values = impute(args.path, args.output, strategies, args.chunksize)
+    except (RuntimeError, ValueError) as e:
+        parser.error(str(e))
+    for column, strategy in strategies.items():
+        detail = f" ({values[column]})" if column in values else ''
+        print(f"{column}: {strategy}{detail}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
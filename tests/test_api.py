@@ -0,0 +1,53 @@
+"""Validation of POST /progress batches"""
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.run import populate
+from tracker import api
+from tracker.progress import default_progress
+
+TOPICS = Path(__file__).resolve().parent.parent / 'topics.json'
+
+
+class ProgressUpdatesTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        with open(TOPICS, 'r') as f:
+            self.storage = populate('json', directory.name, json.load(f), {'babu': default_progress('babu')})
+        self.curriculum = self.storage.load_topics()
+        first = self.curriculum.subtopics[0]
+        self.valid = {'user': 'babu', 'category': first.cat_id, 'topic': first.topic_id,
+                      'subtopic': first.name, 'completed': True}
+
+    def post(self, updates):
+        body = json.dumps({'updates': updates}).encode('utf-8')
+        return asyncio.run(api.ProgressAPI(self.storage).dispatch('POST', '/progress', body))
+
+    def test_valid_batch_is_saved(self):
+        status, payload = self.post([self.valid])
+        self.assertEqual((status, payload['updates']), (200, 1))
+        progress = self.storage.read_user_progress('babu')['progress'][self.valid['category']]
+        self.assertEqual(progress['topics'][self.valid['topic']]['subtopics_completed'], [self.valid['subtopic']])
+
+    def test_unhashable_values_are_rejected(self):
+        for key in api.KEY_FIELDS:
+            for value in ([], {}, ['babu'], {'name': 'x'}, None):
+                with self.subTest(key=key, value=value):
+                    status, payload = self.post([self.valid, dict(self.valid, **{key: value})])
+                    self.assertEqual(status, 400)
+                    self.assertEqual(payload['error_count'], 1)
+                    self.assertIn(key, payload['errors'][0])
+        self.assertIsNone(self.storage.read_user_progress('babu')['progress'].get(self.valid['category']))
+
+    def test_numeric_ids_are_accepted(self):
+        numeric = dict(self.valid, category=int(self.valid['category']), topic=float(self.valid['topic']))
+        self.assertEqual(api.validate_updates(self.curriculum, {'babu'}, [numeric]), [])
+        self.assertEqual(len(api.validate_updates(self.curriculum, {'babu'}, [dict(self.valid, subtopic=3)])), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""Bit-array progress files and their shared layout sidecar"""
+import copy
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks import synthetic
+from tracker import bitset
+from tracker.curriculum import Curriculum
+from tracker.progress import default_progress, set_topic_progress
+
+TOPICS = Path(__file__).resolve().parent.parent / 'topics.json'
+
+
+class BitsetFileTest(unittest.TestCase):
+    def setUp(self):
+        with open(TOPICS, 'r') as f:
+            self.data, self.curriculum = synthetic.build(json.load(f), 1, 1)
+        self.progress = next(iter(synthetic.synthetic_users(self.curriculum, 1, 1).values()))
+        first = self.curriculum.subtopics[0]
+        self.cat_id, self.topic_id = first.cat_id, first.topic_id
+        names = [self.curriculum.subtopics[i].name
+                 for i in self.curriculum.topic_ranges[(self.cat_id, self.topic_id)]]
+        set_topic_progress(self.curriculum, self.progress, self.cat_id, self.topic_id, names[:3])
+        self.completed = names[:3]
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.path = self.directory / 'progress_a.bits'
+
+    def test_round_trip(self):
+        bitset.save_bitset_progress(self.path, self.curriculum, self.progress)
+        self.assertEqual(bitset.load_bitset_progress(self.path, self.curriculum), self.progress)
+
+    def test_layout_is_shared_not_per_user(self):
+        bitset.save_bitset_progress(self.path, self.curriculum, self.progress)
+        empty = self.directory / 'progress_b.bits'
+        bitset.save_bitset_progress(empty, self.curriculum, default_progress('b'))
+        sidecars = list(self.directory.glob('bits_layout_*.json'))
+        self.assertEqual(sidecars, [bitset.layout_file(self.directory, bitset.curriculum_fingerprint(self.curriculum))])
+        self.assertLess(empty.stat().st_size, sidecars[0].stat().st_size)
+        header, _ = bitset.read_bitset_file(self.path)
+        self.assertNotIn('layout', header)
+
+    def changed_curriculum(self):
+        data = copy.deepcopy(self.data)
+        subtopics = data['learning_path'][0]['topics'][0]['subtopics']
+        subtopics.reverse()
+        removed = subtopics.pop()['name']
+        return Curriculum(data), removed
+
+    def test_remaps_by_name_after_curriculum_change(self):
+        bitset.save_bitset_progress(self.path, self.curriculum, self.progress)
+        curriculum, removed = self.changed_curriculum()
+        progress = bitset.load_bitset_progress(self.path, curriculum)
+        completed = progress['progress'][self.cat_id]['topics'][self.topic_id]['subtopics_completed']
+        self.assertEqual(set(completed), set(self.completed) - {removed})
+
+    def test_missing_layout_refuses_to_guess(self):
+        bitset.save_bitset_progress(self.path, self.curriculum, self.progress)
+        bitset.layout_file(self.directory, bitset.curriculum_fingerprint(self.curriculum)).unlink()
+        with self.assertRaises(ValueError):
+            bitset.load_bitset_progress(self.path, self.changed_curriculum()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Columnar export round trip through load_frames"""
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks import synthetic
+from benchmarks.run import populate
+from tracker import columnar
+from tracker.curriculum import Curriculum
+
+TOPICS = Path(__file__).resolve().parent.parent / 'topics.json'
+
+
+class ColumnarRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        with open(TOPICS, 'r') as f:
+            # Scale 2 repeats every topic name; repeat a category name too
+            self.data = synthetic.synthetic_topics(json.load(f), 2, 1)
+        self.data['learning_path'][1]['category'] = self.data['learning_path'][0]['category']
+        self.curriculum = Curriculum(self.data)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        source = self.directory / 'source'
+        source.mkdir()
+        self.storage = populate('json', source, self.data,
+                                synthetic.synthetic_users(self.curriculum, 3, 1))
+
+    def test_duplicate_names_survive_the_round_trip(self):
+        for names in ([cat['category'] for cat in self.curriculum.categories],
+                      [topic['name'] for topic in self.curriculum.topic_by_id.values()]):
+            self.assertLess(len(set(names)), len(names))
+        for fmt in columnar.SUFFIXES:
+            with self.subTest(fmt=fmt):
+                output = self.directory / fmt
+                columnar.export_tables(self.storage, output, fmt)
+                frame = columnar.load_frames(output, ['curriculum'])['curriculum']
+                self.assertEqual(len(frame), self.curriculum.total_subtopics)
+                self.assertEqual(list(frame['category_id']), [e.cat_id for e in self.curriculum.subtopics])
+                self.assertEqual(
+                    list(frame['category']),
+                    [self.curriculum.category_by_id[e.cat_id]['category'] for e in self.curriculum.subtopics]
+                )
+                self.assertEqual(
+                    list(frame['topic']),
+                    [self.curriculum.topic_by_id[(e.cat_id, e.topic_id)]['name'] for e in self.curriculum.subtopics]
+                )
+                for column in ('category', 'topic'):
+                    self.assertEqual(list(frame[column].cat.categories), list(dict.fromkeys(frame[column])))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+"""Link checker against a local stand-in HTTP server"""
+import asyncio
+import socket
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from tracker import links
+
+ETAG = '"v1"'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers by path: /ok, /moved, /found, /no-head, /missing, /forbidden, /limited, /error"""
+
+    requests = []
+
+    def _answer(self):
+        type(self).requests.append((self.command, self.path, dict(self.headers)))
+        if self.path == '/ok':
+            if self.headers.get('If-None-Match') == ETAG:
+                self.send_response(304)
+            else:
+                self.send_response(200)
+            self.send_header('ETag', ETAG)
+        elif self.path == '/moved':
+            self.send_response(301)
+            self.send_header('Location', '/ok')
+        elif self.path == '/found':
+            self.send_response(302)
+            self.send_header('Location', '/ok')
+        elif self.path == '/no-head':
+            self.send_response(405 if self.command == 'HEAD' else 200)
+        else:
+            self.send_response({'/forbidden': 403, '/limited': 429, '/error': 500}.get(self.path, 404))
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_HEAD = do_GET = _answer
+
+    def log_message(self, *args):
+        pass
+
+
+def _closed_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class LinkCheckerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StandInHandler.requests = []
+        self.checker = links.LinkChecker(concurrency=4, host_interval=0, timeout=5)
+
+    def check(self, path, previous=None):
+        url = self.base + path
+        results = asyncio.run(self.checker.check_all([url], {url: previous} if previous else None))
+        return results[url]
+
+    def test_ok(self):
+        result = self.check('/ok')
+        self.assertEqual((result['status'], result['code'], result['etag']), (links.OK, 200, ETAG))
+
+    def test_permanent_redirect_is_moved(self):
+        result = self.check('/moved')
+        self.assertEqual((result['status'], result['location']), (links.MOVED, self.base + '/ok'))
+
+    def test_temporary_redirect_is_ok(self):
+        self.assertEqual(self.check('/found')['status'], links.OK)
+
+    def test_head_refused_falls_back_to_get(self):
+        result = self.check('/no-head')
+        self.assertEqual((result['status'], result['code']), (links.OK, 200))
+        self.assertEqual([method for method, _, _ in StandInHandler.requests], ['HEAD', 'GET'])
+
+    def test_not_found_is_broken(self):
+        self.assertEqual(self.check('/missing')['status'], links.BROKEN)
+
+    def test_client_errors_are_refused(self):
+        for path, code in (('/forbidden', 403), ('/limited', 429)):
+            result = self.check(path)
+            self.assertEqual((result['status'], result['code']), (links.REFUSED, code))
+            self.assertIn("refused", links.badge(result)[1])
+
+    def test_server_error(self):
+        self.assertEqual(self.check('/error')['status'], links.ERROR)
+
+    def test_connection_refused_is_unreachable(self):
+        url = f"http://127.0.0.1:{_closed_port()}/ok"
+        result = asyncio.run(self.checker.check_all([url]))[url]
+        self.assertEqual(result['status'], links.UNREACHABLE)
+        self.assertTrue(result['error'])
+
+    def test_revalidation_sends_etag_and_keeps_it_on_304(self):
+        first = self.check('/ok')
+        again = self.check('/ok', first)
+        self.assertEqual(StandInHandler.requests[-1][2].get('If-None-Match'), ETAG)
+        self.assertEqual((again['status'], again['code'], again['etag']), (links.OK, 304, ETAG))
+
+    def test_check_links_skips_fresh_results_and_prunes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = links.LinkCache(Path(directory) / links.CACHE_NAME)
+            urls = [self.base + '/ok', self.base + '/missing']
+            asyncio.run(links.check_links(urls, cache, checker=self.checker))
+            self.assertEqual(set(cache.read()), set(urls))
+            StandInHandler.requests = []
+            results = asyncio.run(links.check_links(urls[:1], cache, checker=self.checker))
+            self.assertEqual((results, StandInHandler.requests), ({}, []))
+            self.assertEqual(set(cache.read()), set(urls[:1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,327 @@
+"""Local HTTP API for bulk progress ingestion and queries
+
+    python -m tracker.api --source . --port 8502
+
+A small asyncio server next to the Streamlit app, using the same storage
+and progress semantics. Requests and responses are JSON:
+
+- GET  /health
+- GET  /users: summary of every user (see progress.progress_summary)
+- GET  /users/<username>: Dashboard figures of one user
+- GET  /users/<username>/categories/<cat_id>: one category of one user,
+  with every topic and its completed subtopics
+- GET  /categories/<cat_id>: one category's completion for every user
+- POST /progress: {"updates": [...]} where each update is
+  {"user", "category", "topic", "subtopic", "completed": true} for a
+  subtopic, or {"user", "category", "completed"} to mark a whole category
+
+A batch is validated as a whole (400 and nothing written if any update
+is invalid), applied to each user's stored progress in order, and saved
+with Storage.update_progress_batch: one write per touched user plus one
+for the completion events and the users index, or a single transaction
+with SQLite. Updates are applied to the progress read under each user's
+write lock, so edits saved from the app in the meantime are kept. Batches
+are written one at a time.
+"""
+import argparse
+import asyncio
+import copy
+import functools
+import json
+from urllib.parse import unquote, urlsplit
+
+from tracker.core import category_summaries, summarize_user, topic_summary
+from tracker.progress import default_progress, set_category_completed, set_topic_progress
+from tracker.storage import open_storage
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+MAX_BODY_BYTES = 32 * 1024 * 1024
+MAX_ERRORS = 20
+# Looked up in sets and dicts, so anything unhashable must be turned away first
+KEY_FIELDS = ('user', 'category', 'topic', 'subtopic')
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    411: 'Length Required', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class HTTPError(Exception):
+    """Error response with a status code"""
+
+    def __init__(self, status, message, **details):
+        super().__init__(message)
+        self.status = status
+        self.payload = dict(details, error=message)
+
+
+def validate_updates(curriculum, usernames, updates):
+    """Problems with a batch of updates, as messages (empty if it is valid)"""
+    if not isinstance(updates, list):
+        return ['"updates" must be a list']
+    errors = []
+    for i, update in enumerate(updates):
+        where = f"updates[{i}]"
+        if not isinstance(update, dict):
+            errors.append(f"{where}: not an object")
+            continue
+        bad = [key for key in KEY_FIELDS if key in update and not isinstance(update[key], (str, int, float))]
+        if bad:
+            errors.append(f"{where}: {', '.join(bad)} must be a string or number")
+            continue
+        cat_id, topic_id = str(update.get('category')), str(update.get('topic'))
+        if update.get('user') not in usernames:
+            errors.append(f"{where}: unknown user {update.get('user')!r}")
+        elif not isinstance(update.get('completed', True), bool):
+            errors.append(f"{where}: completed must be true or false")
+        elif cat_id not in curriculum.category_by_id:
+            errors.append(f"{where}: unknown category {update.get('category')!r}")
+        elif 'topic' not in update and 'subtopic' not in update:
+            continue
+        elif (cat_id, topic_id) not in curriculum.topic_by_id:
+            errors.append(f"{where}: unknown topic {update.get('topic')!r} in category {cat_id}")
+        elif curriculum.index_of(cat_id, topic_id, update.get('subtopic')) is None:
+            errors.append(f"{where}: unknown subtopic {update.get('subtopic')!r} in topic {topic_id}")
+    return errors
+
+
+def apply_updates(curriculum, progress_data, updates):
+    """Copy of a progress record with one user's validated updates applied in order
+
+    Like core.with_edits, but only the categories the updates touch are
+    copied; the others are shared with ``progress_data``.
+    """
+    progress = progress_data.get('progress', {})
+    done_by_topic, category_edits = {}, {}
+    for update in updates:
+        cat_id = str(update['category'])
+        completed = update.get('completed', True)
+        if 'topic' not in update:
+            category_edits[cat_id] = completed
+            continue
+        key = (cat_id, str(update['topic']))
+        done = done_by_topic.get(key)
+        if done is None:
+            stored = progress.get(cat_id, {}).get('topics', {}).get(key[1], {}).get('subtopics_completed', [])
+            done = done_by_topic[key] = set(stored)
+        if completed:
+            done.add(update['subtopic'])
+        else:
+            done.discard(update['subtopic'])
+    touched = {cat_id for cat_id, _ in done_by_topic} | category_edits.keys()
+    result = dict(progress_data, progress=dict(progress))
+    for cat_id in touched & progress.keys():
+        result['progress'][cat_id] = copy.deepcopy(progress[cat_id])
+    for key, done in done_by_topic.items():
+        # Subtopics in curriculum order, as the Learning Path page saves them
+        names = [curriculum.subtopics[i].name for i in curriculum.topic_ranges[key] if curriculum.subtopics[i].name in done]
+        set_topic_progress(curriculum, result, *key, names)
+    for cat_id, completed in category_edits.items():
+        set_category_completed(curriculum, result, cat_id, completed)
+    return result
+
+
+def _user_summary(summary):
+    return dict(summary._asdict(), categories=[c._asdict() for c in summary.categories])
+
+
+class ProgressAPI:
+    """Request handling over one storage backend
+
+    Storage calls run in worker threads so the event loop keeps accepting
+    connections; writes hold a lock so batches are applied one at a time.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._write_lock = asyncio.Lock()
+
+    async def dispatch(self, method, target, body):
+        """Status and JSON payload for one request"""
+        parts = [unquote(p) for p in urlsplit(target).path.split('/') if p]
+        try:
+            if parts in ([], ['health']):
+                self._allow(method, 'GET')
+                return 200, {'status': 'ok'}
+            if parts == ['progress']:
+                self._allow(method, 'POST')
+                async with self._write_lock:
+                    return await asyncio.to_thread(self.save_updates, self._json(body))
+            if parts and parts[0] in ('users', 'categories'):
+                self._allow(method, 'GET')
+                return 200, await asyncio.to_thread(self.query, parts)
+            raise HTTPError(404, f"No such endpoint: /{'/'.join(parts)}")
+        except HTTPError as e:
+            return e.status, e.payload
+
+    @staticmethod
+    def _allow(method, allowed):
+        if method != allowed:
+            raise HTTPError(405, f"Use {allowed}")
+
+    @staticmethod
+    def _json(body):
+        try:
+            return json.loads(body or b'null')
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid JSON: {e}")
+
+    def save_updates(self, payload):
+        """Validate and save a batch of updates"""
+        updates = payload.get('updates') if isinstance(payload, dict) else None
+        curriculum = self.storage.load_topics()
+        errors = validate_updates(curriculum, set(self.storage.list_users()), updates)
+        if errors:
+            raise HTTPError(400, "Invalid updates", errors=errors[:MAX_ERRORS], error_count=len(errors))
+
+        by_user = {}
+        for update in updates:
+            by_user.setdefault(update['user'], []).append(update)
+        versions = self.storage.update_progress_batch({
+            username: functools.partial(self._apply, curriculum, username, user_updates)
+            for username, user_updates in by_user.items()
+        })
+        return 200, {'updates': len(updates), 'users': len(by_user), 'versions': versions}
+
+    @staticmethod
+    def _apply(curriculum, username, updates, stored):
+        return apply_updates(curriculum, stored or default_progress(username), updates)
+
+    def query(self, parts):
+        """Payload of a GET under /users or /categories"""
+        curriculum = self.storage.load_topics()
+        if parts == ['users']:
+            return {'users': self.storage.user_summaries()}
+        if parts[0] == 'users' and len(parts) in (2, 4) and parts[2:3] in ([], ['categories']):
+            progress_data = self.storage.read_user_progress(parts[1])
+            if progress_data is None:
+                raise HTTPError(404, f"Unknown user {parts[1]!r}")
+            if len(parts) == 2:
+                return _user_summary(summarize_user(curriculum, progress_data))
+            return self._user_category(curriculum, progress_data, parts[3])
+        if parts[0] == 'categories' and len(parts) == 2:
+            return self._category(curriculum, parts[1])
+        raise HTTPError(404, f"No such endpoint: /{'/'.join(parts)}")
+
+    @staticmethod
+    def _check_category(curriculum, cat_id):
+        if cat_id not in curriculum.category_by_id:
+            raise HTTPError(404, f"Unknown category {cat_id!r}")
+
+    def _user_category(self, curriculum, progress_data, cat_id):
+        self._check_category(curriculum, cat_id)
+        category = next(c for c in category_summaries(curriculum, progress_data) if c.cat_id == cat_id)
+        topics = progress_data.get('progress', {}).get(cat_id, {}).get('topics', {})
+        return dict(category._asdict(), topics=[
+            dict(
+                topic_summary(curriculum, progress_data, cat_id, topic_id)._asdict(),
+                subtopics_completed=topics.get(topic_id, {}).get('subtopics_completed', [])
+            )
+            for topic_id in curriculum.topics_by_category[cat_id]
+        ])
+
+    def _category(self, curriculum, cat_id):
+        self._check_category(curriculum, cat_id)
+        users = {}
+        for username, summary in self.storage.user_summaries().items():
+            percentage, completed = summary['categories'].get(cat_id, [0, False])
+            users[username] = {'percentage': percentage or 0, 'completed': completed}
+        return {
+            'cat_id': cat_id,
+            'name': curriculum.category_by_id[cat_id]['category'],
+            'users_started': sum(1 for u in users.values() if u['percentage'] > 0),
+            'users_completed': sum(1 for u in users.values() if u['completed']),
+            'average_percentage': sum(u['percentage'] for u in users.values()) / len(users) if users else 0.0,
+            'users': users
+        }
+
+    # ---------- HTTP ----------
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, keeping it alive between them"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {'error': "Headers too large"}, keep_alive=False)
+                    break
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(' ')
+                    length = headers.get('content-length', '0')
+                    # Plain digits only: int() would also take "-1", "+1" and "1_0"
+                    if not (length.isascii() and length.isdigit()):
+                        raise ValueError(length)
+                    length = int(length)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': "Malformed request"}, keep_alive=False)
+                    break
+                if 'transfer-encoding' in headers:
+                    await self._respond(writer, 411, {'error': "Send a Content-Length"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': f"Bodies are limited to {MAX_BODY_BYTES} bytes"},
+                                        keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                try:
+                    status, payload = await self.dispatch(method, target, body)
+                except Exception as e:
+                    status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+        )
+        await writer.drain()
+
+
+async def serve(storage, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Run the API until cancelled"""
+    api = ProgressAPI(storage)
+    server = await asyncio.start_server(api.handle_connection, host, port)
+    addresses = ', '.join(f"{a[0]}:{a[1]}" for a in (s.getsockname() for s in server.sockets))
+    print(f"Serving the progress API on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the progress HTTP API")
+    parser.add_argument('--source', default='.', help="Directory with topics.json and progress files")
+    parser.add_argument('--storage', default='json', help='"json", "bitset" or "sqlite:<path>"')
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Address to listen on (default: localhost only)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.storage, args.source)
+    try:
+        asyncio.run(serve(storage, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+"""Bit-array progress storage indexed by the curriculum's subtopic index
+
+A ``.bits`` file holds a JSON header (user details, category flags
+and anything that cannot be derived from the bits) followed by one bit per
+subtopic. Conversion to and from the JSON progress layout is lossless:
+entries that do not match what the bits would reconstruct are kept
+verbatim in the header.
+
+The header carries a fingerprint of the subtopic order. The subtopic
+names behind each fingerprint are written once to a shared
+``bits_layout_<fingerprint>.json`` next to the ``.bits`` files, so a file
+written before subtopics were added, removed or reordered is remapped by
+name when read; completions of subtopics that no longer exist are dropped.
+
+Usage:
+    python -m tracker.bitset to-bits progress_babu.json
+    python -m tracker.bitset to-json progress_babu.bits
+"""
+import argparse
+import hashlib
+import json
+import struct
+import threading
+from pathlib import Path
+
+from tracker import profiling
+from tracker.curriculum import load_curriculum
+from tracker.fileio import atomic_write, atomic_write_json
+from tracker.progress import cached_parse
+
+MAGIC = b'LTPB'
+FORMAT_VERSION = 2
+# Version 1 headers may carry the layout inline instead of in a sidecar
+READABLE_VERSIONS = (1, FORMAT_VERSION)
+_HEADER = struct.Struct('<4sBI')
+
+_layout = None
+_layout_lock = threading.Lock()
+
+
+class ProgressBitset:
+    """Fixed-size bit array with O(1) membership and popcount ranges"""
+
+    __slots__ = ('size', 'bits')
+
+    def __init__(self, size, bits=None):
+        self.size = size
+        self.bits = bytearray(bits) if bits is not None else bytearray((size + 7) // 8)
+        if len(self.bits) != (size + 7) // 8:
+            raise ValueError(f"Expected {(size + 7) // 8} bytes for {size} bits, got {len(self.bits)}")
+
+    def __contains__(self, index):
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def __getitem__(self, index):
+        return index in self
+
+    def __len__(self):
+        return self.size
+
+    def set(self, index, value=True):
+        """Set or clear one bit"""
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def count(self, start=0, stop=None):
+        """Number of set bits in [start, stop)"""
+        stop = self.size if stop is None else stop
+        if stop <= start:
+            return 0
+        chunk = int.from_bytes(self.bits[start >> 3:(stop + 7) >> 3], 'little')
+        chunk >>= start & 7
+        return (chunk & ((1 << (stop - start)) - 1)).bit_count()
+
+    def count_range(self, index_range):
+        """Number of set bits in a curriculum range (topic or category)"""
+        return self.count(index_range.start, index_range.stop)
+
+    def percentage(self, index_range):
+        """Completion percentage of a curriculum range"""
+        total = len(index_range)
+        return self.count_range(index_range) / total * 100 if total else 0
+
+    def indices(self, start=0, stop=None):
+        """Indices of set bits in [start, stop)"""
+        stop = self.size if stop is None else stop
+        return [i for i in range(start, stop) if i in self]
+
+    @classmethod
+    def from_progress(cls, curriculum, progress):
+        """Bits for the subtopics_completed lists of a JSON progress record"""
+        bitset = cls(curriculum.total_subtopics)
+        for cat_id, cat_progress in progress.get('progress', {}).items():
+            for topic_id, topic_progress in cat_progress.get('topics', {}).items():
+                for name in topic_progress.get('subtopics_completed', []):
+                    index = curriculum.index_of(cat_id, topic_id, name)
+                    if index is not None:
+                        bitset.set(index)
+        return bitset
+
+
+def _subtopic_layout(curriculum):
+    """Fingerprint and [cat_id, topic_id, names] list of the subtopic order
+
+    Remembered for the last subtopic list seen, which snapshots derived
+    with Curriculum.with_changes share.
+    """
+    global _layout
+    with _layout_lock:
+        if _layout is not None and _layout[0] is curriculum.subtopics:
+            return _layout[1], _layout[2]
+    digest = hashlib.sha1()
+    for entry in curriculum.subtopics:
+        digest.update(f"{entry.cat_id}\x1f{entry.topic_id}\x1f{entry.name}\x1e".encode('utf-8'))
+    layout = [
+        [cat_id, topic_id, [curriculum.subtopics[i].name for i in index_range]]
+        for (cat_id, topic_id), index_range in curriculum.topic_ranges.items()
+    ]
+    with _layout_lock:
+        _layout = (curriculum.subtopics, digest.hexdigest(), layout)
+        return _layout[1], _layout[2]
+
+
+def curriculum_fingerprint(curriculum):
+    """Hash of the subtopic order, so bits are never read against the wrong index"""
+    return _subtopic_layout(curriculum)[0]
+
+
+def _topic_entry(curriculum, bitset, cat_id, topic_id):
+    index_range = curriculum.topic_ranges[(cat_id, topic_id)]
+    completed = [curriculum.subtopics[i].name for i in bitset.indices(index_range.start, index_range.stop)]
+    return {
+        'topic_name': curriculum.topic_by_id[(cat_id, topic_id)]['name'],
+        'completed': len(completed) == len(index_range),
+        'subtopics_completed': completed
+    }
+
+
+def _category_entry(curriculum, bitset, cat_id, flags):
+    entry = {'category_name': curriculum.category_by_id[cat_id]['category']}
+    if 'c' in flags:
+        entry['completed'] = flags['c']
+    topic_ids = flags.get('t')
+    if topic_ids is None:
+        return entry
+    if topic_ids == '*':
+        topic_ids = curriculum.topics_by_category[cat_id]
+    entry['topics'] = {
+        topic_id: _topic_entry(curriculum, bitset, cat_id, topic_id)
+        for topic_id in topic_ids
+    }
+    entry['completion_percentage'] = bitset.percentage(curriculum.category_ranges[cat_id])
+    return entry
+
+
+def _category_flags(curriculum, cat_id, cat_progress):
+    flags = {}
+    if 'completed' in cat_progress:
+        flags['c'] = cat_progress['completed']
+    if 'topics' in cat_progress:
+        topic_ids = list(cat_progress['topics'])
+        flags['t'] = '*' if topic_ids == curriculum.topics_by_category[cat_id] else topic_ids
+    return flags
+
+
+def encode(curriculum, progress):
+    """Serialise a JSON progress record to the bit-array file format"""
+    bitset = ProgressBitset.from_progress(curriculum, progress)
+    categories = {}
+    extra = {}
+    for cat_id, cat_progress in progress.get('progress', {}).items():
+        if cat_id in curriculum.category_by_id and isinstance(cat_progress, dict):
+            flags = _category_flags(curriculum, cat_id, cat_progress)
+            topic_ids = flags.get('t')
+            if topic_ids is None or topic_ids == '*' or all(
+                (cat_id, t) in curriculum.topic_ranges for t in topic_ids
+            ):
+                if _category_entry(curriculum, bitset, cat_id, flags) == cat_progress:
+                    categories[cat_id] = flags
+                    continue
+        # Not reconstructible from the bits: keep the entry as it is
+        extra[cat_id] = cat_progress
+    header = {
+        'fingerprint': curriculum_fingerprint(curriculum),
+        'size': bitset.size,
+        'meta': {k: v for k, v in progress.items() if k != 'progress'},
+        'order': list(progress.get('progress', {})),
+        'categories': categories,
+        'extra': extra
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, len(header_bytes)) + header_bytes + bytes(bitset.bits)
+
+
+def read_raw(f):
+    """Header dict and bitset from an open ``.bits`` file"""
+    blob = f.read()
+    magic, version, header_len = _HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ValueError("Not a bit-array progress file")
+    if version not in READABLE_VERSIONS:
+        raise ValueError(f"Unsupported bit-array progress format version {version}")
+    start = _HEADER.size
+    profiling.count('json_parses')
+    header = json.loads(blob[start:start + header_len].decode('utf-8'))
+    bitset = ProgressBitset(header['size'], blob[start + header_len:])
+    return header, bitset
+
+
+def layout_file(directory, fingerprint):
+    """Sidecar listing the subtopic names behind one fingerprint"""
+    return Path(directory) / f"bits_layout_{fingerprint}.json"
+
+
+def _remap(curriculum, header, bitset, layout):
+    """Bits and category flags of a file written for another subtopic order"""
+    if layout is None:
+        raise ValueError(
+            "Bit-array progress was written for a different curriculum; "
+            "convert it to JSON with the topics.json it was created from"
+        )
+    remapped = ProgressBitset(curriculum.total_subtopics)
+    old_index = 0
+    for cat_id, topic_id, names in layout:
+        for name in names:
+            if old_index in bitset:
+                index = curriculum.index_of(cat_id, topic_id, name)
+                if index is not None:
+                    remapped.set(index)
+            old_index += 1
+    categories = {}
+    for cat_id, flags in header['categories'].items():
+        if cat_id not in curriculum.category_by_id:
+            continue
+        if isinstance(flags.get('t'), list):
+            flags = dict(flags, t=[t for t in flags['t'] if (cat_id, t) in curriculum.topic_ranges])
+        categories[cat_id] = flags
+    return remapped, categories
+
+
+def decode(curriculum, raw, layout=None):
+    """Rebuild the JSON progress record from a parsed ``.bits`` file
+
+    ``layout`` is the file's subtopic layout, only needed when it was
+    written for a different subtopic order.
+    """
+    header, bitset = raw
+    categories = header['categories']
+    if header['fingerprint'] != curriculum_fingerprint(curriculum):
+        bitset, categories = _remap(curriculum, header, bitset, header.get('layout', layout))
+    progress = {}
+    for cat_id in header['order']:
+        if cat_id in categories:
+            progress[cat_id] = _category_entry(curriculum, bitset, cat_id, categories[cat_id])
+        elif cat_id in header['extra']:
+            progress[cat_id] = header['extra'][cat_id]
+    record = dict(header['meta'])
+    record['progress'] = progress
+    return record
+
+
+def read_bitset_file(path):
+    """Parsed ``.bits`` file (header, bitset) shared between callers, or None"""
+    return cached_parse(path, read_raw, mode='rb')
+
+
+def load_bitset_progress(path, curriculum):
+    """JSON progress record from a ``.bits`` file, or None if it is missing"""
+    raw = read_bitset_file(path)
+    if raw is None:
+        return None
+    fingerprint = raw[0]['fingerprint']
+    layout = None
+    if fingerprint != curriculum_fingerprint(curriculum):
+        layout = cached_parse(layout_file(Path(path).parent, fingerprint))
+    return decode(curriculum, raw, layout)
+
+
+def save_layout(directory, curriculum):
+    """Write the sidecar for the curriculum's subtopic order unless it exists"""
+    fingerprint, layout = _subtopic_layout(curriculum)
+    path = layout_file(directory, fingerprint)
+    if not path.exists():
+        atomic_write_json(path, layout, indent=None)
+
+
+def save_bitset_progress(path, curriculum, progress):
+    """Atomically write a JSON progress record as a ``.bits`` file"""
+    save_layout(Path(path).parent, curriculum)
+    atomic_write(path, encode(curriculum, progress))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert progress files between JSON and bit-array formats")
+    parser.add_argument('direction', choices=['to-bits', 'to-json'])
+    parser.add_argument('files', nargs='+', type=Path)
+    parser.add_argument('--topics', type=Path, default=Path(__file__).resolve().parent.parent / 'topics.json')
+    args = parser.parse_args(argv)
+
+    curriculum = load_curriculum(args.topics)
+    for source in args.files:
+        if args.direction == 'to-bits':
+            with open(source, 'r') as f:
+                progress = json.load(f)
+            target = source.with_suffix('.bits')
+            save_bitset_progress(target, curriculum, progress)
+        else:
+            progress = load_bitset_progress(source, curriculum)
+            target = source.with_suffix('.json')
+            with open(target, 'w') as f:
+                json.dump(progress, f, indent=2)
+        print(f"{source} -> {target}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Append-only change logs applied on top of snapshot files
+
+Saving an edit appends one JSON line to ``<snapshot>.log`` instead of
+rewriting the snapshot. Readers replay the log over the snapshot, and the
+log is folded back into the snapshot (compacted) once it grows past
+COMPACT_BYTES.
+
+Record shapes:
+    {"subtopic": [cat_id, topic_id, name], "resources": [...], "notes": "..."}
+    {"category": cat_id, "entry": {...}}     # entry is null when removed
+
+Every record carries the version ("v") of the save that wrote it, and a
+compacted log starts with a {"base": version} line, so the current version
+of a snapshot is the last version in its log. Records may also carry the
+values they were based on ("was"), which is used to detect conflicting
+saves and is not written to the log.
+"""
+import json
+import os
+from pathlib import Path
+
+from tracker import profiling
+from tracker.fileio import atomic_write
+
+COMPACT_BYTES = 256 * 1024
+
+
+def log_path(snapshot_path):
+    """Change log belonging to a snapshot file"""
+    snapshot_path = Path(snapshot_path)
+    return snapshot_path.with_name(snapshot_path.name + ".log")
+
+
+class ChangeLog:
+    """JSON-lines file that is only ever appended to or truncated"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def size(self):
+        """Current size in bytes (0 if the log does not exist)"""
+        try:
+            return self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, records, version):
+        """Append records stamped with a version, one JSON object per line"""
+        if not records:
+            return
+        lines = ''.join(
+            json.dumps(dict(_stored_fields(record), v=version), separators=(',', ':')) + '\n'
+            for record in records
+        )
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def version(self):
+        """Version of the last save recorded in the log (0 if there is none)"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell()
+                window = 4096
+                while True:
+                    start = max(0, end - window)
+                    f.seek(start)
+                    tail = f.read(end - start)
+                    lines = tail[:tail.rfind(b'\n') + 1].splitlines()
+                    if len(lines) > 1 or start == 0:
+                        break
+                    window *= 2
+        except FileNotFoundError:
+            return 0
+        for line in reversed(lines):
+            if line.strip():
+                record = json.loads(line)
+                return record.get('v', record.get('base', 0))
+        return 0
+
+    def read(self, offset=0):
+        """Records after byte ``offset`` and the offset to continue from
+
+        A trailing line without a newline (an append still in progress) is
+        left for the next read.
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+        end = data.rfind(b'\n') + 1
+        records = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        profiling.count('file_reads')
+        profiling.count('json_parses', len(records))
+        return [r for r in records if 'base' not in r], offset + end
+
+    def reset(self, version):
+        """Drop all records once they are part of the snapshot, keeping the version"""
+        atomic_write(self.path, json.dumps({'base': version}) + '\n')
+
+
+class ConflictError(Exception):
+    """Another session saved different values for the same data"""
+
+    def __init__(self, keys):
+        self.keys = keys
+        super().__init__(f"Changed by another session since it was loaded: {', '.join(map(str, keys))}")
+
+
+def _stored_fields(record):
+    return {k: v for k, v in record.items() if k != 'was'}
+
+
+def record_key(record):
+    """What a record changes: a (cat_id, topic_id, name) tuple or a category id"""
+    return tuple(record['subtopic']) if 'subtopic' in record else record['category']
+
+
+def _value_fields(record):
+    return [k for k in record if k not in ('subtopic', 'category', 'was', 'v')]
+
+
+def find_conflicts(records, current):
+    """Keys whose stored value moved away from the record's base value
+
+    ``current(record)`` returns the stored values of the record's fields.
+    A record conflicts when a field was changed by someone else to
+    something other than what this record writes. Records without a base
+    value ("was") are blind writes and never conflict.
+    """
+    conflicts = []
+    for record in records:
+        if 'was' not in record:
+            continue
+        stored = current(record)
+        for field in _value_fields(record):
+            base = record['was'] if 'category' in record else record['was'].get(field)
+            if stored.get(field) != base and stored.get(field) != record[field]:
+                conflicts.append(record_key(record))
+                break
+    return conflicts
+
+
+def subtopic_change(cat_id, topic_id, name, resources=None, notes=None, was=None):
+    """Record replacing the resources and/or notes of one subtopic
+
+    ``was`` holds the resources/notes the edit started from.
+    """
+    record = {'subtopic': [str(cat_id), str(topic_id), name]}
+    if resources is not None:
+        record['resources'] = resources
+    if notes is not None:
+        record['notes'] = notes
+    if was is not None:
+        record['was'] = was
+    return record
+
+
+def category_change(cat_id, entry, **base):
+    """Record replacing (or removing, with None) one category's progress entry
+
+    Pass ``was=`` with the entry the change started from (None if the
+    category had no entry) to enable conflict detection.
+    """
+    record = {'category': str(cat_id), 'entry': entry}
+    if 'was' in base:
+        record['was'] = base['was']
+    return record
+
+
+def apply_topic_changes(curriculum, records):
+    """New curriculum with subtopic records applied (the given one is not modified)"""
+    changes = {}
+    for record in records:
+        cat_id, topic_id, name = record['subtopic']
+        index = curriculum.index_of(cat_id, topic_id, name)
+        if index is None:
+            continue
+        changes.setdefault(index, {}).update(
+            (field, record[field]) for field in ('resources', 'notes') if field in record
+        )
+    return curriculum.with_changes(changes)
+
+
+def apply_progress_changes(progress_data, records):
+    """Apply category records to a progress record in place"""
+    progress = progress_data.setdefault('progress', {})
+    for record in records:
+        if record['entry'] is None:
+            progress.pop(record['category'], None)
+        else:
+            progress[record['category']] = record['entry']
+
+
+def diff_progress(old_progress, new_progress):
+    """Category records turning one progress record into another"""
+    old = old_progress.get('progress', {})
+    new = new_progress.get('progress', {})
+    records = [
+        category_change(cat_id, entry, was=old.get(cat_id))
+        for cat_id, entry in new.items() if old.get(cat_id) != entry
+    ]
+    records.extend(category_change(cat_id, None, was=old[cat_id]) for cat_id in old if cat_id not in new)
+    return records
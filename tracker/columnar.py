@@ -0,0 +1,249 @@
+"""Long-format columnar export of the curriculum and progress (needs pyarrow)
+
+    python -m tracker.columnar --source . --output analytics
+
+writes four tables, as Arrow IPC files (the default, memory-mapped by
+load_tables without copying) or Parquet:
+
+- curriculum: subtopic_idx, category_id, category, topic_id, topic, subtopic
+- users: user, name, email, started_date
+- category_progress: user, category_id, completion_percentage, completed,
+  subtopics_completed, subtopics_total
+- subtopic_progress: user, category_id, topic_id, subtopic_idx, completed
+  (one row per user and subtopic)
+
+Repeated strings (users, ids, names) are dictionary-encoded and become
+pandas categoricals, so frames from load_frames feed
+stats.table_statistics directly:
+
+    frames = load_frames("analytics")
+    stats = table_statistics(curriculum, frames['category_progress'], frames['users']['user'])
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tracker.bitset import ProgressBitset
+from tracker.storage import open_storage
+
+DEFAULT_CHUNK_SIZE = 1024
+
+_DICT = pa.dictionary(pa.int32(), pa.string())
+
+SCHEMAS = {
+    'curriculum': pa.schema([
+        ('subtopic_idx', pa.int32()), ('category_id', _DICT), ('category', _DICT),
+        ('topic_id', _DICT), ('topic', _DICT), ('subtopic', pa.string())
+    ]),
+    'users': pa.schema([
+        ('user', _DICT), ('name', pa.string()), ('email', pa.string()), ('started_date', pa.string())
+    ]),
+    'category_progress': pa.schema([
+        ('user', _DICT), ('category_id', _DICT), ('completion_percentage', pa.float64()),
+        ('completed', pa.bool_()), ('subtopics_completed', pa.int32()), ('subtopics_total', pa.int32())
+    ]),
+    'subtopic_progress': pa.schema([
+        ('user', _DICT), ('category_id', _DICT), ('topic_id', _DICT), ('subtopic_idx', pa.int32()),
+        ('completed', pa.bool_())
+    ]),
+}
+SUFFIXES = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def _encoded(codes, dictionary):
+    return pa.DictionaryArray.from_arrays(pa.array(codes, type=pa.int32()), dictionary)
+
+
+class _Codes:
+    """Dictionary codes of the curriculum's ids and names, shared by every batch"""
+
+    def __init__(self, curriculum):
+        self.category_ids = pa.array(curriculum.category_ids, type=pa.string())
+        cat_code = {cat_id: i for i, cat_id in enumerate(curriculum.category_ids)}
+        topic_keys = list(curriculum.topic_ranges)
+        self.topic_ids = pa.array(list(dict.fromkeys(topic_id for _, topic_id in topic_keys)), type=pa.string())
+        topic_code = {topic_id: i for i, topic_id in enumerate(self.topic_ids.to_pylist())}
+        self.subtopic_category = np.array([cat_code[e.cat_id] for e in curriculum.subtopics], dtype=np.int32)
+        self.subtopic_topic = np.array([topic_code[e.topic_id] for e in curriculum.subtopics], dtype=np.int32)
+        self.cat_code = cat_code
+        self.ranges = [curriculum.category_ranges[cat_id] for cat_id in curriculum.category_ids]
+
+
+def _deduplicated(values):
+    """Dictionary of distinct strings and, per value, its code in that dictionary
+
+    Category and topic names need not be unique, but pandas categoricals
+    (and so load_frames) reject repeated dictionary entries.
+    """
+    encoded = pa.array(values, type=pa.string()).dictionary_encode()
+    return encoded.dictionary, encoded.indices.to_numpy(zero_copy_only=False).astype(np.int32)
+
+
+def curriculum_table(curriculum):
+    """One row per subtopic, in subtopic index order"""
+    codes = _Codes(curriculum)
+    names, name_code = _deduplicated([cat['category'] for cat in curriculum.categories])
+    topic_names, topic_name_code = _deduplicated(
+        [curriculum.topic_by_id[key]['name'] for key in curriculum.topic_ranges]
+    )
+    topic_index = {key: i for i, key in enumerate(curriculum.topic_ranges)}
+    subtopic_topic_key = np.array([topic_index[(e.cat_id, e.topic_id)] for e in curriculum.subtopics], dtype=np.int32)
+    return pa.Table.from_arrays([
+        pa.array(np.arange(curriculum.total_subtopics, dtype=np.int32)),
+        _encoded(codes.subtopic_category, codes.category_ids),
+        _encoded(name_code[codes.subtopic_category], names),
+        _encoded(codes.subtopic_topic, codes.topic_ids),
+        _encoded(topic_name_code[subtopic_topic_key], topic_names),
+        pa.array([e.name for e in curriculum.subtopics], type=pa.string()),
+    ], schema=SCHEMAS['curriculum'])
+
+
+def progress_batches(curriculum, progress_by_user, user_dictionary, codes=None):
+    """users, category_progress and subtopic_progress tables for some users
+
+    ``user_dictionary`` holds every username of the export, so all batches
+    share one dictionary.
+    """
+    codes = codes or _Codes(curriculum)
+    user_code = {username: i for i, username in enumerate(user_dictionary.to_pylist())}
+    n_subtopics = curriculum.total_subtopics
+    users = {'user': [], 'name': [], 'email': [], 'started_date': []}
+    categories = {k: [] for k in ('user', 'category_id', 'completion_percentage', 'completed', 'subtopics_completed')}
+    totals = np.array([len(r) for r in codes.ranges], dtype=np.int32)
+    bits = []
+    for username, progress_data in progress_by_user.items():
+        code = user_code[username]
+        users['user'].append(code)
+        users['name'].append(progress_data.get('name', username))
+        users['email'].append(progress_data.get('email'))
+        users['started_date'].append(progress_data.get('started_date'))
+        completed = np.unpackbits(
+            np.frombuffer(bytes(ProgressBitset.from_progress(curriculum, progress_data).bits), dtype=np.uint8),
+            count=n_subtopics, bitorder='little'
+        ).astype(bool)
+        bits.append(completed)
+        progress = progress_data.get('progress', {})
+        for cat_id, cat_range in zip(curriculum.category_ids, codes.ranges):
+            cat_progress = progress.get(cat_id, {})
+            categories['user'].append(code)
+            categories['category_id'].append(codes.cat_code[cat_id])
+            categories['completion_percentage'].append(float(cat_progress.get('completion_percentage', 0) or 0))
+            categories['completed'].append(bool(cat_progress.get('completed', False)))
+            categories['subtopics_completed'].append(int(completed[cat_range.start:cat_range.stop].sum()))
+    n_users = len(users['user'])
+    user_codes = np.array(users['user'], dtype=np.int32)
+    return {
+        'users': pa.Table.from_arrays([
+            _encoded(user_codes, user_dictionary), pa.array(users['name'], type=pa.string()),
+            pa.array(users['email'], type=pa.string()), pa.array(users['started_date'], type=pa.string())
+        ], schema=SCHEMAS['users']),
+        'category_progress': pa.Table.from_arrays([
+            _encoded(categories['user'], user_dictionary),
+            _encoded(categories['category_id'], codes.category_ids),
+            pa.array(categories['completion_percentage'], type=pa.float64()),
+            pa.array(categories['completed'], type=pa.bool_()),
+            pa.array(categories['subtopics_completed'], type=pa.int32()),
+            pa.array(np.tile(totals, n_users), type=pa.int32()),
+        ], schema=SCHEMAS['category_progress']),
+        'subtopic_progress': pa.Table.from_arrays([
+            _encoded(np.repeat(user_codes, n_subtopics), user_dictionary),
+            _encoded(np.tile(codes.subtopic_category, n_users), codes.category_ids),
+            _encoded(np.tile(codes.subtopic_topic, n_users), codes.topic_ids),
+            pa.array(np.tile(np.arange(n_subtopics, dtype=np.int32), n_users)),
+            pa.array(np.concatenate(bits) if bits else np.zeros(0, dtype=bool)),
+        ], schema=SCHEMAS['subtopic_progress']),
+    }
+
+
+class _Writer:
+    def __init__(self, path, schema, fmt):
+        if fmt == 'arrow':
+            self.sink = pa.OSFile(str(path), 'wb')
+            self.writer = pa.ipc.new_file(self.sink, schema)
+        else:
+            self.sink = None
+            self.writer = pq.ParquetWriter(str(path), schema)
+
+    def write(self, table):
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+
+
+def export_tables(storage, output_dir, fmt='arrow', usernames=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write the curriculum and every user's progress as columnar tables
+
+    Users are read and written ``chunk_size`` at a time. Returns the path
+    of every table.
+    """
+    curriculum = storage.load_topics()
+    usernames = list(usernames) if usernames else storage.list_users()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = {name: output_dir / f"{name}{SUFFIXES[fmt]}" for name in SCHEMAS}
+
+    codes = _Codes(curriculum)
+    user_dictionary = pa.array(usernames, type=pa.string())
+    writers = {name: _Writer(paths[name], SCHEMAS[name], fmt) for name in SCHEMAS}
+    try:
+        writers['curriculum'].write(curriculum_table(curriculum))
+        for start in range(0, len(usernames), chunk_size):
+            chunk = {}
+            for username in usernames[start:start + chunk_size]:
+                progress_data = storage.read_user_progress(username)
+                if progress_data is not None:
+                    chunk[username] = progress_data
+            for name, table in progress_batches(curriculum, chunk, user_dictionary, codes).items():
+                writers[name].write(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
+
+
+def load_tables(directory, names=None):
+    """Exported tables by name, memory-mapped
+
+    Arrow files are mapped without copying; Parquet files still have to be
+    decoded.
+    """
+    directory = Path(directory)
+    tables = {}
+    for name in names or SCHEMAS:
+        path = directory / f"{name}.arrow"
+        if path.exists():
+            tables[name] = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        else:
+            tables[name] = pq.read_table(directory / f"{name}.parquet", memory_map=True)
+    return tables
+
+
+def load_frames(directory, names=None):
+    """Exported tables as pandas DataFrames, with categoricals for dictionary columns"""
+    return {name: table.to_pandas() for name, table in load_tables(directory, names).items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the curriculum and progress as columnar tables")
+    parser.add_argument('users', nargs='*', help="Usernames (default: every user with progress)")
+    parser.add_argument('--source', default='.', help="Directory with topics.json and progress files")
+    parser.add_argument('--storage', default='json', help='"json", "bitset" or "sqlite:<path>"')
+    parser.add_argument('--output', default='analytics', type=Path, help="Directory to write the tables to")
+    parser.add_argument('--format', choices=sorted(SUFFIXES), default='arrow')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Users per written batch")
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.storage, args.source)
+    paths = export_tables(storage, args.output, args.format, args.users, args.chunk_size)
+    for name, path in paths.items():
+        print(f"{name}: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""Headless progress API shared by the Streamlit app, scripts and cron jobs
+
+Everything here works on a Curriculum and plain progress records and
+never imports streamlit, so summaries can be computed without a UI:
+
+    storage = open_storage("json", ".")
+    curriculum = storage.load_topics()
+    progress = load_progress_many(storage, storage.list_users())
+    for summary in summarize_users(curriculum, progress):
+        print(summary.username, summary.overall_percentage)
+
+Run ``python -m tracker.core --source .`` to print the same summaries as
+JSON.
+"""
+import argparse
+import copy
+import json
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+from tracker.curriculum import Curriculum
+from tracker.progress import default_progress, set_category_completed, set_topic_progress
+from tracker.storage import Storage, open_storage
+
+NOT_STARTED = 'not_started'
+IN_PROGRESS = 'in_progress'
+COMPLETE = 'complete'
+
+
+class TopicSummary(NamedTuple):
+    """Completion of one topic"""
+    cat_id: str
+    topic_id: str
+    name: str
+    completed_subtopics: int
+    total_subtopics: int
+    percentage: float
+
+
+class CategorySummary(NamedTuple):
+    """Completion of one category as shown on the Dashboard"""
+    cat_id: str
+    name: str
+    percentage: float
+    completed: bool
+    status: str
+
+
+class UserSummary(NamedTuple):
+    """Dashboard figures for one user"""
+    username: str
+    name: str
+    started_date: str
+    days_learning: int
+    completed_categories: int
+    total_categories: int
+    overall_percentage: float
+    categories: List[CategorySummary]
+
+
+def load_progress(storage: Storage, username: str, name: Optional[str] = None) -> dict:
+    """Stored progress for a user, or an empty record if there is none (read-only)"""
+    progress = storage.read_user_progress(username)
+    if progress is None:
+        progress = default_progress(username, name)
+    return progress
+
+
+def load_progress_many(storage: Storage, usernames: Iterable[str],
+                       user_names: Optional[Mapping[str, str]] = None) -> Dict[str, dict]:
+    """Stored progress for several users, keyed by username (read-only)"""
+    user_names = user_names or {}
+    return {u: load_progress(storage, u, user_names.get(u, u)) for u in usernames}
+
+
+def with_edits(curriculum: Curriculum, progress_data: dict,
+               topic_edits: Mapping[Tuple[str, str], List[str]],
+               category_edits: Mapping[str, bool]) -> dict:
+    """Copy of a progress record with completed-subtopic and category edits applied
+
+    Edits for topics or categories no longer in the curriculum are ignored.
+    """
+    progress = copy.deepcopy(progress_data)
+    for (cat_id, topic_id), names in topic_edits.items():
+        if (cat_id, topic_id) in curriculum.topic_by_id:
+            set_topic_progress(curriculum, progress, cat_id, topic_id, names)
+    for cat_id, completed in category_edits.items():
+        if cat_id in curriculum.category_by_id:
+            set_category_completed(curriculum, progress, cat_id, completed)
+    return progress
+
+
+def topic_summary(curriculum: Curriculum, progress_data: dict, cat_id: str, topic_id: str) -> TopicSummary:
+    """Completed subtopics of one topic, counting only names still in the curriculum"""
+    cat_id, topic_id = str(cat_id), str(topic_id)
+    topic_range = curriculum.topic_ranges[(cat_id, topic_id)]
+    done = set(
+        progress_data.get('progress', {}).get(cat_id, {}).get('topics', {})
+        .get(topic_id, {}).get('subtopics_completed', [])
+    )
+    completed = sum(1 for i in topic_range if curriculum.subtopics[i].name in done)
+    total = len(topic_range)
+    return TopicSummary(
+        cat_id, topic_id, curriculum.topic_by_id[(cat_id, topic_id)]['name'],
+        completed, total, completed / total * 100 if total else 0.0
+    )
+
+
+def category_summaries(curriculum: Curriculum, progress_data: dict) -> List[CategorySummary]:
+    """Per-category completion in curriculum order"""
+    progress = progress_data.get('progress', {})
+    summaries = []
+    for category in curriculum.categories:
+        cat_id = str(category['id'])
+        cat_progress = progress.get(cat_id, {})
+        percentage = cat_progress.get('completion_percentage', 0)
+        completed = cat_progress.get('completed', False)
+        if completed:
+            status = COMPLETE
+        elif percentage > 0:
+            status = IN_PROGRESS
+        else:
+            status = NOT_STARTED
+        summaries.append(CategorySummary(cat_id, category['category'], percentage, completed, status))
+    return summaries
+
+
+def days_learning(progress_data: dict, today: Optional[date] = None) -> int:
+    """Days since the user's started_date"""
+    today = today or datetime.now().date()
+    started = datetime.strptime(progress_data['started_date'], '%Y-%m-%d').date()
+    return (today - started).days
+
+
+def summarize_user(curriculum: Curriculum, progress_data: dict, today: Optional[date] = None) -> UserSummary:
+    """Dashboard figures for one progress record"""
+    categories = category_summaries(curriculum, progress_data)
+    completed = sum(1 for c in categories if c.completed)
+    total = curriculum.total_categories
+    return UserSummary(
+        progress_data.get('username', ''),
+        progress_data.get('name', progress_data.get('username', '')),
+        progress_data['started_date'],
+        days_learning(progress_data, today),
+        completed,
+        total,
+        completed / total * 100 if total else 0.0,
+        categories
+    )
+
+
+def summarize_users(curriculum: Curriculum, progress_by_user: Mapping[str, dict],
+                    today: Optional[date] = None) -> List[UserSummary]:
+    """Dashboard figures for many users, in the order of ``progress_by_user``"""
+    return [summarize_user(curriculum, data, today) for data in progress_by_user.values()]
+
+
+def statistics(curriculum: Curriculum, progress_by_user: Mapping[str, dict],
+               user_names: Optional[Mapping[str, str]] = None) -> dict:
+    """Statistics page metrics (comparison and engagement tables, needs pandas)"""
+    from tracker.stats import compute_statistics
+
+    return compute_statistics(curriculum, progress_by_user, user_names)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print progress summaries as JSON")
+    parser.add_argument('users', nargs='*', help="Usernames (default: every user with progress)")
+    parser.add_argument('--source', default='.', help="Directory with topics.json and progress files")
+    parser.add_argument('--storage', default='json', help='"json", "bitset" or "sqlite:<path>"')
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.storage, args.source)
+    curriculum = storage.load_topics()
+    progress = load_progress_many(storage, args.users or storage.list_users())
+    summaries = [
+        dict(s._asdict(), categories=[c._asdict() for c in s.categories])
+        for s in summarize_users(curriculum, progress)
+    ]
+    print(json.dumps(summaries, indent=2))
+
+
+if __name__ == '__main__':
+    main()
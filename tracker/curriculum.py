@@ -0,0 +1,153 @@
+"""Indexed, read-only view of the learning path curriculum"""
+import copy
+import json
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+from tracker import profiling
+from tracker.migrations import upgrade_topics
+
+
+class SubtopicEntry(NamedTuple):
+    """A subtopic and its position in the curriculum"""
+    index: int
+    cat_id: str
+    topic_id: str
+    position: int
+    name: str
+
+
+class Curriculum:
+    """Curriculum with id lookups and precomputed counts
+
+    Every subtopic gets a stable integer index following the curriculum
+    order, so per-user data can be kept in flat arrays instead of nested
+    dicts. The raw topics data is kept in ``data`` for rendering.
+
+    Instances are shared between sessions and threads and must not be
+    modified; with_changes derives an updated copy instead. Data from an
+    older schema is upgraded first (see tracker.migrations), so every
+    subtopic is a {name, resources, notes} object.
+    """
+
+    def __init__(self, data):
+        data = upgrade_topics(data)
+        self.data = data
+        self.categories = data['learning_path']
+        self.category_by_id = {}
+        self.topic_by_id = {}
+        self.topics_by_category = {}
+        self.subtopics = []
+        self.subtopic_index = {}
+        self.topic_ranges = {}
+        self.category_ranges = {}
+
+        for category in self.categories:
+            cat_id = str(category['id'])
+            self.category_by_id[cat_id] = category
+            self.topics_by_category[cat_id] = []
+            cat_start = len(self.subtopics)
+            for topic in category['topics']:
+                topic_id = str(topic['id'])
+                self.topic_by_id[(cat_id, topic_id)] = topic
+                self.topics_by_category[cat_id].append(topic_id)
+                topic_start = len(self.subtopics)
+                for position, subtopic in enumerate(topic['subtopics']):
+                    entry = SubtopicEntry(
+                        len(self.subtopics), cat_id, topic_id, position, subtopic['name']
+                    )
+                    self.subtopics.append(entry)
+                    self.subtopic_index.setdefault((cat_id, topic_id, entry.name), entry.index)
+                self.topic_ranges[(cat_id, topic_id)] = range(topic_start, len(self.subtopics))
+            self.category_ranges[cat_id] = range(cat_start, len(self.subtopics))
+
+        self.category_ids = list(self.category_by_id)
+        self.total_categories = len(self.categories)
+        self.total_topics = len(self.topic_by_id)
+        self.total_subtopics = len(self.subtopics)
+
+    def category_subtopic_count(self, cat_id):
+        """Number of subtopics in a category"""
+        return len(self.category_ranges.get(str(cat_id), ()))
+
+    def topic_subtopic_count(self, cat_id, topic_id):
+        """Number of subtopics in a topic"""
+        return len(self.topic_ranges.get((str(cat_id), str(topic_id)), ()))
+
+    def topic_count(self, cat_id):
+        """Number of topics in a category"""
+        return len(self.topics_by_category.get(str(cat_id), ()))
+
+    def index_of(self, cat_id, topic_id, name):
+        """Stable index of a subtopic, or None if it is not in the curriculum"""
+        return self.subtopic_index.get((str(cat_id), str(topic_id), name))
+
+    def subtopic_values(self, cat_id, topic_id, name):
+        """A subtopic's resources and notes, or {} if it is not in the curriculum"""
+        index = self.index_of(cat_id, topic_id, name)
+        if index is None:
+            return {}
+        entry = self.subtopics[index]
+        subtopic = self.topic_by_id[(entry.cat_id, entry.topic_id)]['subtopics'][entry.position]
+        return {'resources': subtopic.get('resources', []), 'notes': subtopic.get('notes', '')}
+
+    def with_changes(self, changes):
+        """New curriculum with some subtopics' fields replaced
+
+        ``changes`` maps subtopic index to the fields to set (resources,
+        notes). Only the categories, topics and subtopics on the path to a
+        change are copied; everything else, including the indexes, is shared
+        with this curriculum, which is left untouched.
+        """
+        if not changes:
+            return self
+        by_topic = {}
+        for index, fields in changes.items():
+            entry = self.subtopics[index]
+            by_topic.setdefault((entry.cat_id, entry.topic_id), {})[entry.position] = fields
+
+        snapshot = copy.copy(self)
+        snapshot.categories = list(self.categories)
+        snapshot.category_by_id = dict(self.category_by_id)
+        snapshot.topic_by_id = dict(self.topic_by_id)
+        cat_positions = {cat_id: i for i, cat_id in enumerate(self.category_ids)}
+        copied = {}
+        for (cat_id, topic_id), positions in by_topic.items():
+            category = copied.get(cat_id)
+            if category is None:
+                original = self.category_by_id[cat_id]
+                category = copied[cat_id] = dict(original, topics=list(original['topics']))
+                snapshot.categories[cat_positions[cat_id]] = category
+                snapshot.category_by_id[cat_id] = category
+            topic_pos = self.topics_by_category[cat_id].index(topic_id)
+            topic = dict(category['topics'][topic_pos])
+            topic['subtopics'] = subtopics = list(topic['subtopics'])
+            for position, fields in positions.items():
+                subtopics[position] = dict(subtopics[position], **fields)
+            category['topics'][topic_pos] = topic
+            snapshot.topic_by_id[(cat_id, topic_id)] = topic
+        snapshot.data = dict(self.data, learning_path=snapshot.categories)
+        return snapshot
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_curriculum(path):
+    """Load a curriculum file, reusing the parsed copy until its inode, mtime or size changes"""
+    path = Path(path)
+    stat = path.stat()
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            profiling.count('parse_cache_hits')
+            return cached[1]
+        profiling.count('file_reads')
+        profiling.count('json_parses')
+        with open(path, 'r') as f:
+            curriculum = Curriculum(json.load(f))
+        _cache[path] = (key, curriculum)
+        return curriculum
@@ -0,0 +1,138 @@
+"""Timestamped subtopic completion events and their daily/weekly rollups
+
+Saving progress turns each subtopic that became (un)completed into an
+event:
+
+    {"t": "2025-03-01T18:04:05+05:30", "user": "babu", "cat": "1",
+     "topic": "1.1", "subtopic": "Variables", "done": true}
+
+Events are only ever appended. Rollups count completions and
+un-completions per day and per week (keyed by the week's Monday), for every
+user and category and summed over all users and/or all categories ("*"),
+so a chart reads one series in O(buckets) instead of replaying events.
+"""
+from datetime import date, datetime, timedelta
+
+ALL = '*'
+PERIODS = ('day', 'week')
+
+
+def _completed_names(entry, topic_id):
+    return set(((entry or {}).get('topics') or {}).get(topic_id, {}).get('subtopics_completed', []))
+
+
+def completion_events(username, records, timestamp=None):
+    """Events for the subtopics whose completion changed in category records
+
+    Records without the entry they started from ("was") are skipped.
+    """
+    timestamp = timestamp or datetime.now().astimezone().isoformat(timespec='seconds')
+    events = []
+    for record in records:
+        if 'category' not in record or 'was' not in record:
+            continue
+        old, new = record['was'], record['entry']
+        topic_ids = dict.fromkeys(list(((old or {}).get('topics') or {})) + list(((new or {}).get('topics') or {})))
+        for topic_id in topic_ids:
+            before = _completed_names(old, topic_id)
+            after = _completed_names(new, topic_id)
+            for name, done in [(n, True) for n in after - before] + [(n, False) for n in before - after]:
+                events.append({
+                    't': timestamp, 'user': username, 'cat': record['category'],
+                    'topic': topic_id, 'subtopic': name, 'done': done
+                })
+    return events
+
+
+def bucket(timestamp, period):
+    """Day (YYYY-MM-DD) or week (its Monday) an event timestamp falls in"""
+    day = datetime.fromisoformat(timestamp).date()
+    if period == 'week':
+        day -= timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+def rollup_deltas(events):
+    """Counter increments for a batch of events
+
+    Maps (period, user, cat_id) to {bucket: [completed, uncompleted]}.
+    """
+    deltas = {}
+    for event in events:
+        column = 0 if event['done'] else 1
+        for period in PERIODS:
+            key_bucket = bucket(event['t'], period)
+            for user in (event['user'], ALL):
+                for cat_id in (event['cat'], ALL):
+                    counts = deltas.setdefault((period, user, cat_id), {}).setdefault(key_bucket, [0, 0])
+                    counts[column] += 1
+    return deltas
+
+
+class CompletionRollups:
+    """In-memory rollup counters, serialisable to JSON"""
+
+    def __init__(self, counts=None):
+        self.counts = counts if counts is not None else {}
+
+    def add(self, events):
+        """Fold a batch of events into the counters"""
+        for key, buckets in rollup_deltas(events).items():
+            series = self.counts.setdefault(key, {})
+            for key_bucket, (completed, uncompleted) in buckets.items():
+                counts = series.setdefault(key_bucket, [0, 0])
+                counts[0] += completed
+                counts[1] += uncompleted
+
+    def series(self, username=ALL, cat_id=ALL, period='day'):
+        """Sorted (bucket, completed, uncompleted) tuples"""
+        series = self.counts.get((period, username, cat_id), {})
+        return [(key_bucket, *series[key_bucket]) for key_bucket in sorted(series)]
+
+    def to_json(self):
+        return [[period, user, cat_id, series] for (period, user, cat_id), series in self.counts.items()]
+
+    @classmethod
+    def from_json(cls, data):
+        # Copied, as ``data`` may be a shared parse cache entry
+        return cls({
+            (period, user, cat_id): {key_bucket: list(counts) for key_bucket, counts in series.items()}
+            for period, user, cat_id, series in data
+        })
+
+
+def filled(series, period='day', end=None):
+    """Series with zero rows for the buckets without events, up to ``end``
+
+    ``end`` defaults to today, so charts run up to the present.
+    """
+    if not series:
+        return []
+    step = timedelta(days=7 if period == 'week' else 1)
+    end = end or date.today()
+    if period == 'week':
+        end -= timedelta(days=end.weekday())
+    rows = dict((key_bucket, (completed, uncompleted)) for key_bucket, completed, uncompleted in series)
+    day = date.fromisoformat(series[0][0])
+    last = max(end, date.fromisoformat(series[-1][0]))
+    result = []
+    while day <= last:
+        completed, uncompleted = rows.get(day.isoformat(), (0, 0))
+        result.append((day.isoformat(), completed, uncompleted))
+        day += step
+    return result
+
+
+def burndown(series, remaining_now):
+    """Subtopics left at the end of each bucket, given how many are left now
+
+    Walks the series backwards from the current count, so completions made
+    before events were recorded are accounted for.
+    """
+    remaining = remaining_now
+    points = []
+    for key_bucket, completed, uncompleted in reversed(series):
+        points.append((key_bucket, remaining))
+        remaining += completed - uncompleted
+    points.reverse()
+    return points
@@ -0,0 +1,126 @@
+"""Crash-safe file writes and cross-process advisory locks"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# The process umask, read once at import: os.umask can only be read by
+# setting it, which would race with files created by other threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _fsync_dir(directory):
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path, mode='w'):
+    """File to write a replacement for ``path`` into, renamed over it on success
+
+    The data goes to a temporary file in the same directory, which is
+    fsynced and renamed over the target when the block exits without an
+    exception, and removed otherwise. Lets large files be streamed out.
+    The replacement keeps the target's permissions; new files get the
+    default ones (0o666 less the umask) rather than mkstemp's 0o600.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            file_mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            file_mode = 0o666 & ~_UMASK
+        os.chmod(tmp_path, file_mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+
+
+def atomic_write(path, data):
+    """Replace a file so readers see either the old or the new content, never a mix"""
+    with atomic_open(path, 'wb' if isinstance(data, bytes) else 'w') as f:
+        f.write(data)
+
+
+def atomic_write_json(path, data, indent=2):
+    """Atomically replace a JSON file"""
+    atomic_write(path, json.dumps(data, indent=indent))
+
+
+@contextmanager
+def _os_lock(lock_path):
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class PathLock:
+    """Re-entrant lock on a file, held across threads and processes
+
+    Threads in one process share an RLock; the advisory lock on
+    ``<path>.lock`` is taken by the outermost holder only, so nested use in
+    one thread does not deadlock on the OS lock.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._os_lock = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                self._os_lock = _os_lock(self.lock_path)
+                self._os_lock.__enter__()
+            except BaseException:
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                os_lock, self._os_lock = self._os_lock, None
+                os_lock.__exit__(None, None, None)
+        finally:
+            self._lock.release()
@@ -0,0 +1,331 @@
+"""Health of resource links: an asyncio checker and its on-disk result cache
+
+    python -m tracker.links --source . --ttl-hours 24
+
+Every http(s) resource URL of the curriculum is checked with a HEAD
+request (GET when a server refuses HEAD), following redirects. At most
+``concurrency`` requests are in flight, and requests to one host are
+spaced ``host_interval`` seconds apart. Results go to links.cache.json
+together with each URL's ETag / Last-Modified, so rechecks are conditional
+requests, and URLs checked within the TTL are skipped.
+
+The Learning Path page only reads the cache (see badge), so rendering
+never waits on the network. Checks run from cron, the command above, or
+the page's button, which starts them in a background thread.
+"""
+import argparse
+import asyncio
+import ssl
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote, urljoin, urlsplit
+
+from tracker.fileio import PathLock, atomic_write_json
+from tracker.progress import cached_parse
+
+CACHE_NAME = "links.cache.json"
+DEFAULT_TTL = 24 * 3600
+DEFAULT_CONCURRENCY = 20
+DEFAULT_HOST_INTERVAL = 1.0
+DEFAULT_TIMEOUT = 10.0
+MAX_REDIRECTS = 5
+FLUSH_EVERY = 100
+USER_AGENT = "learning-tracker-link-checker/1.0"
+
+OK = 'ok'
+MOVED = 'moved'
+BROKEN = 'broken'
+REFUSED = 'refused'
+ERROR = 'error'
+UNREACHABLE = 'unreachable'
+
+BADGES = {
+    OK: ('✅', "Link works"),
+    MOVED: ('↪️', "Moved permanently"),
+    BROKEN: ('❌', "Broken link"),
+    REFUSED: ('🚫', "Request refused (auth, forbidden or rate limited)"),
+    ERROR: ('⚠️', "Server error"),
+    UNREACHABLE: ('🔌', "Unreachable"),
+    None: ('❔', "Not checked yet"),
+}
+
+_ssl_context = None
+
+
+def curriculum_urls(curriculum):
+    """Distinct http(s) resource URLs of a curriculum, in curriculum order"""
+    urls = {}
+    for entry in curriculum.subtopics:
+        for resource in curriculum.subtopic_values(entry.cat_id, entry.topic_id, entry.name)['resources']:
+            url = (resource.get('url') or '').strip()
+            if urlsplit(url).scheme in ('http', 'https'):
+                urls[url] = None
+    return list(urls)
+
+
+def badge(result, ttl=DEFAULT_TTL, now=None):
+    """Icon and description of a cached result (None if the URL was never checked)"""
+    if result is None:
+        return BADGES[None]
+    icon, label = BADGES[result['status']]
+    details = [str(result['code']) if result.get('code') else result.get('error', '')]
+    if result['status'] == MOVED and result.get('location'):
+        details.append(f"now {result['location']}")
+    checked = datetime.fromtimestamp(result['checked']).strftime('%Y-%m-%d')
+    stale = (now or time.time()) - result['checked'] > ttl
+    details.append(f"checked {checked}{' (stale)' if stale else ''}")
+    return icon, f"{label}: {', '.join(d for d in details if d)}"
+
+
+class LinkCache:
+    """Last check result of every URL, in one JSON file
+
+    Each result is {status, code, checked, etag, last_modified, location,
+    error}, with ``checked`` as a Unix timestamp.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def read(self):
+        """Results by URL (read-only, re-read only when the file changes)"""
+        return (cached_parse(self.path) or {}).get('links', {})
+
+    def due(self, urls, ttl=DEFAULT_TTL, now=None):
+        """URLs without a result checked within ``ttl`` seconds"""
+        now = now or time.time()
+        results = self.read()
+        return [url for url in urls if url not in results or now - results[url]['checked'] > ttl]
+
+    def update(self, results, keep=None):
+        """Merge new results in, dropping URLs outside ``keep`` if given"""
+        with PathLock(self.path):
+            merged = dict(self.read())
+            merged.update(results)
+            if keep is not None:
+                merged = {url: result for url, result in merged.items() if url in keep}
+            atomic_write_json(self.path, {'links': merged}, indent=None)
+
+
+def _status(code):
+    if 200 <= code < 300 or code == 304:
+        return OK
+    if code in (404, 410):
+        return BROKEN
+    if 400 <= code < 500:
+        # The page may well exist: it needs a login, blocks bots or rate limits
+        return REFUSED
+    return ERROR
+
+
+async def _request(method, url, headers, timeout):
+    """Status code and headers of one request; the body is never read"""
+    global _ssl_context
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError(f"not an http(s) URL: {url}")
+    secure = parts.scheme == 'https'
+    if secure and _ssl_context is None:
+        _ssl_context = ssl.create_default_context()
+    target = quote(parts.path or '/', safe="/%:@!$&'()*+,;=~") + (f"?{parts.query}" if parts.query else '')
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, parts.port or (443 if secure else 80),
+                                ssl=_ssl_context if secure else None),
+        timeout
+    )
+    try:
+        lines = [
+            f"{method} {target} HTTP/1.1",
+            f"Host: {parts.netloc.rpartition('@')[2]}",
+            f"User-Agent: {USER_AGENT}",
+            "Accept: */*",
+            "Connection: close",
+        ] + [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+    finally:
+        writer.close()
+    status_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+    response_headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(':')
+        response_headers[name.strip().lower()] = value.strip()
+    return int(status_line.split(' ', 2)[1]), response_headers
+
+
+class LinkChecker:
+    """Checks URLs with bounded concurrency and a request rate limit per host"""
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, host_interval=DEFAULT_HOST_INTERVAL,
+                 timeout=DEFAULT_TIMEOUT):
+        self.concurrency = concurrency
+        self.host_interval = host_interval
+        self.timeout = timeout
+        self._next_start = {}
+        self._semaphore = None
+
+    async def _fetch(self, method, url, headers):
+        host = urlsplit(url).hostname
+        loop = asyncio.get_running_loop()
+        while True:
+            # Sleep until the host's next turn without holding a connection
+            # slot, then claim the turn once a slot is free. A request to the
+            # same host that got there first sends this one back to sleep.
+            wait = self._next_start.get(host, 0) - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._semaphore.acquire()
+            now = loop.time()
+            if now >= self._next_start.get(host, 0):
+                self._next_start[host] = now + self.host_interval
+                break
+            self._semaphore.release()
+        try:
+            return await _request(method, url, headers, self.timeout)
+        finally:
+            self._semaphore.release()
+
+    async def check(self, url, previous=None):
+        """Fresh result for one URL; ``previous`` supplies the validators to send"""
+        headers = {}
+        if previous and previous.get('status') == OK:
+            if previous.get('etag'):
+                headers['If-None-Match'] = previous['etag']
+            if previous.get('last_modified'):
+                headers['If-Modified-Since'] = previous['last_modified']
+        result = {'status': UNREACHABLE, 'code': None, 'checked': time.time()}
+        location, moved, current = None, False, url
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                code, response = await self._fetch('HEAD', current, headers)
+                if code in (405, 501):
+                    code, response = await self._fetch('GET', current, headers)
+                if code in (301, 302, 303, 307, 308) and response.get('location'):
+                    # Permanent only if every hop so far was permanent
+                    moved = (moved or current == url) and code in (301, 308)
+                    current = location = urljoin(current, response['location'])
+                    headers = {}
+                    continue
+                break
+            else:
+                result['error'] = "too many redirects"
+                return result
+        except asyncio.TimeoutError:
+            result['error'] = f"no response within {self.timeout:g}s"
+            return result
+        except asyncio.IncompleteReadError:
+            result['error'] = "connection closed without a response"
+            return result
+        except asyncio.LimitOverrunError:
+            result['error'] = "response headers too large"
+            return result
+        except (OSError, ValueError, IndexError) as e:
+            result['error'] = str(e) or type(e).__name__
+            return result
+        status = _status(code)
+        if status == OK and moved:
+            status = MOVED
+        result.update(status=status, code=code, location=location)
+        if code == 304:
+            previous = previous or {}
+            result['etag'] = previous.get('etag')
+            result['last_modified'] = previous.get('last_modified')
+        else:
+            result['etag'] = response.get('etag')
+            result['last_modified'] = response.get('last-modified')
+        return result
+
+    async def check_all(self, urls, previous=None, on_result=None):
+        """Results by URL; ``on_result(url, result)`` is called as each one finishes"""
+        previous = previous or {}
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        results = {}
+
+        async def run(url):
+            results[url] = await self.check(url, previous.get(url))
+            if on_result is not None:
+                on_result(url, results[url])
+
+        await asyncio.gather(*(run(url) for url in urls))
+        return results
+
+
+async def check_links(urls, cache, ttl=DEFAULT_TTL, force=False, checker=None):
+    """Check the URLs that are due and store their results in ``cache``
+
+    Results are written every FLUSH_EVERY URLs, so readers see progress
+    on long runs, and URLs missing from ``urls`` are dropped from the
+    cache. Returns the new results.
+    """
+    checker = checker or LinkChecker()
+    due = list(urls) if force else cache.due(urls, ttl)
+    pending = {}
+
+    def on_result(url, result):
+        pending[url] = result
+        if len(pending) >= FLUSH_EVERY:
+            cache.update(pending)
+            pending.clear()
+
+    results = await checker.check_all(due, cache.read(), on_result)
+    cache.update(pending, keep=set(urls))
+    return results
+
+
+_background = None
+_background_lock = threading.Lock()
+
+
+def check_in_background(urls, cache, ttl=DEFAULT_TTL):
+    """Run check_links in a daemon thread; False if a check is already running"""
+    global _background
+    with _background_lock:
+        if _background is not None and _background.is_alive():
+            return False
+        _background = threading.Thread(
+            target=asyncio.run, args=(check_links(urls, cache, ttl),), name="link-check", daemon=True
+        )
+        _background.start()
+        return True
+
+
+def checking():
+    """Whether a background check is running"""
+    with _background_lock:
+        return _background is not None and _background.is_alive()
+
+
+def main(argv=None):
+    from tracker.storage import open_storage
+
+    parser = argparse.ArgumentParser(description="Check the curriculum's resource links")
+    parser.add_argument('--source', default='.', help="Directory with topics.json (and the link cache)")
+    parser.add_argument('--storage', default='json', help='"json", "bitset" or "sqlite:<path>"')
+    parser.add_argument('--cache', type=Path, help=f"Result cache (default: <source>/{CACHE_NAME})")
+    parser.add_argument('--ttl-hours', type=float, default=DEFAULT_TTL / 3600,
+                        help="Recheck links whose result is older than this")
+    parser.add_argument('--force', action='store_true', help="Recheck every link")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight")
+    parser.add_argument('--host-interval', type=float, default=DEFAULT_HOST_INTERVAL,
+                        help="Seconds between requests to one host")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="Seconds per request")
+    args = parser.parse_args(argv)
+
+    urls = curriculum_urls(open_storage(args.storage, args.source).load_topics())
+    cache = LinkCache(args.cache or Path(args.source) / CACHE_NAME)
+    checker = LinkChecker(args.concurrency, args.host_interval, args.timeout)
+    results = asyncio.run(check_links(urls, cache, args.ttl_hours * 3600, args.force, checker))
+    counts = {}
+    for url, result in results.items():
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        if result['status'] != OK:
+            print(f"{BADGES[result['status']][0]} {url}: {badge(result)[1]}")
+    summary = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"Checked {len(results)} of {len(urls)} links{': ' + summary if summary else ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,475 @@
+"""Versioned schema migrations for topics.json and progress files
+
+    python -m tracker.migrations --source . --dry-run
+    python -m tracker.migrations --source .
+
+Files carry a "schema_version" member (missing means 0). Migrations are
+applied in version order to files below the current version, each one is
+validated, and files are only replaced (atomically, under their lock)
+when every check passes. --dry-run reports what would change without
+writing anything.
+
+topics.json is streamed one category at a time, so a curriculum never has
+to fit in memory as a whole; progress files are small and read at once.
+Code that reads the files (Curriculum, read_progress_file) upgrades older
+data in memory, so the rest of the tracker can rely on the current shape.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from tracker.fileio import PathLock, atomic_open
+
+VERSION_KEY = 'schema_version'
+
+
+class Migration(NamedTuple):
+    """One schema step; ``apply`` returns the migrated item and how many values it changed"""
+    version: int
+    description: str
+    apply: Callable
+
+
+# ---------- topics.json ----------
+
+def _subtopic_objects(category):
+    """Subtopics as {name, resources, notes} objects instead of plain names"""
+    changed = 0
+    topics = []
+    for topic in category.get('topics', []):
+        subtopics = []
+        before = changed
+        for subtopic in topic.get('subtopics', []):
+            if isinstance(subtopic, str):
+                subtopic = {'name': subtopic, 'resources': [], 'notes': ''}
+                changed += 1
+            elif 'resources' not in subtopic or 'notes' not in subtopic:
+                subtopic = dict({'resources': [], 'notes': ''}, **subtopic)
+                changed += 1
+            subtopics.append(subtopic)
+        topics.append(dict(topic, subtopics=subtopics) if changed > before else topic)
+    return (dict(category, topics=topics) if changed else category), changed
+
+
+# Applied to every category of learning_path, in order
+TOPIC_MIGRATIONS = [
+    Migration(1, "subtopics as {name, resources, notes} objects", _subtopic_objects),
+]
+TOPICS_SCHEMA_VERSION = TOPIC_MIGRATIONS[-1].version
+
+
+def migrate_category(category, version, changes=None):
+    """A category migrated from schema ``version`` to the current one
+
+    ``changes`` (description -> count) is updated with what each step did.
+    """
+    for migration in TOPIC_MIGRATIONS:
+        if migration.version > version:
+            category, changed = migration.apply(category)
+            if changes is not None and changed:
+                changes[migration.description] = changes.get(migration.description, 0) + changed
+    return category
+
+
+def upgrade_topics(data):
+    """topics data at the current schema version (``data`` itself when it already is)
+
+    The given data is not modified.
+    """
+    version = data.get(VERSION_KEY, 0)
+    if version >= TOPICS_SCHEMA_VERSION:
+        return data
+    learning_path = [migrate_category(category, version) for category in data.get('learning_path', [])]
+    return dict(data, **{VERSION_KEY: TOPICS_SCHEMA_VERSION, 'learning_path': learning_path})
+
+
+def _is_text(value):
+    return isinstance(value, str)
+
+
+def validate_category(category, seen_ids):
+    """Problems with one migrated category; ``seen_ids`` collects ids across categories"""
+    errors = []
+    cat_id = category.get('id')
+    where = f"category {cat_id!r}"
+    if cat_id is None:
+        errors.append(f"{where}: missing id")
+    elif str(cat_id) in seen_ids:
+        errors.append(f"{where}: duplicate id")
+    seen_ids.add(str(cat_id))
+    if not _is_text(category.get('category')):
+        errors.append(f"{where}: missing category name")
+    if not isinstance(category.get('prerequisites', []), list):
+        errors.append(f"{where}: prerequisites is not a list")
+    topics = category.get('topics')
+    if not isinstance(topics, list):
+        return errors + [f"{where}: topics is not a list"]
+    topic_ids = set()
+    for topic in topics:
+        topic_where = f"{where}, topic {topic.get('id')!r}"
+        if topic.get('id') is None or str(topic.get('id')) in topic_ids:
+            errors.append(f"{topic_where}: missing or duplicate id")
+        topic_ids.add(str(topic.get('id')))
+        if not _is_text(topic.get('name')):
+            errors.append(f"{topic_where}: missing name")
+        if not isinstance(topic.get('prerequisites', []), list):
+            errors.append(f"{topic_where}: prerequisites is not a list")
+        subtopics = topic.get('subtopics')
+        if not isinstance(subtopics, list):
+            errors.append(f"{topic_where}: subtopics is not a list")
+            continue
+        for subtopic in subtopics:
+            if not isinstance(subtopic, dict) or not _is_text(subtopic.get('name')):
+                errors.append(f"{topic_where}: subtopic without a name: {subtopic!r}")
+            elif not isinstance(subtopic.get('resources'), list) or not _is_text(subtopic.get('notes')):
+                errors.append(f"{topic_where}, subtopic {subtopic['name']!r}: bad resources or notes")
+    return errors
+
+
+# ---------- progress files ----------
+
+def _progress_structure(record, username=None):
+    """Top-level fields filled in and subtopics_completed without duplicates"""
+    changed = 0
+    record = dict(record)
+    defaults = {'username': username, 'name': record.get('username') or username, 'progress': {}}
+    for key, value in defaults.items():
+        if key not in record and value is not None:
+            record[key] = value
+            changed += 1
+    progress = {}
+    for cat_id, cat_progress in record.get('progress', {}).items():
+        topics = cat_progress.get('topics') if isinstance(cat_progress, dict) else None
+        if topics:
+            new_topics = {}
+            for topic_id, topic_progress in topics.items():
+                names = topic_progress.get('subtopics_completed')
+                if names is not None and len(set(names)) != len(names):
+                    topic_progress = dict(topic_progress, subtopics_completed=list(dict.fromkeys(names)))
+                    changed += 1
+                new_topics[topic_id] = topic_progress
+            cat_progress = dict(cat_progress, topics=new_topics)
+        progress[cat_id] = cat_progress
+    record['progress'] = progress
+    return record, changed
+
+
+PROGRESS_MIGRATIONS = [
+    Migration(1, "progress fields filled in and completed subtopics deduplicated", _progress_structure),
+]
+PROGRESS_SCHEMA_VERSION = PROGRESS_MIGRATIONS[-1].version
+
+
+def upgrade_progress(record, username=None, changes=None):
+    """Progress record at the current schema version (``record`` itself when it already is)"""
+    version = record.get(VERSION_KEY, 0)
+    if version >= PROGRESS_SCHEMA_VERSION:
+        return record
+    for migration in PROGRESS_MIGRATIONS:
+        if migration.version > version:
+            record, changed = migration.apply(record, username)
+            if changes is not None and changed:
+                changes[migration.description] = changes.get(migration.description, 0) + changed
+    return dict(record, **{VERSION_KEY: PROGRESS_SCHEMA_VERSION})
+
+
+def validate_progress(record):
+    """Problems with a migrated progress record"""
+    errors = []
+    for key in ('username', 'started_date'):
+        if not _is_text(record.get(key)):
+            errors.append(f"missing {key}")
+    progress = record.get('progress')
+    if not isinstance(progress, dict):
+        return errors + ["progress is not an object"]
+    for cat_id, cat_progress in progress.items():
+        if not isinstance(cat_progress, dict):
+            errors.append(f"category {cat_id!r}: entry is not an object")
+            continue
+        for topic_id, topic_progress in cat_progress.get('topics', {}).items():
+            names = topic_progress.get('subtopics_completed', [])
+            if not isinstance(names, list) or not all(_is_text(n) for n in names):
+                errors.append(f"category {cat_id!r}, topic {topic_id!r}: subtopics_completed is not a list of names")
+    return errors
+
+
+# ---------- streaming JSON ----------
+
+class _StreamReader:
+    """Incremental reader of one JSON document, a value at a time"""
+
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size):
+        if self.eof:
+            return False
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character ('' at the end)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill(self.chunk_size):
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in JSON stream, found {self.peek()!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete value, reading more input as needed"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number could continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow the reads so huge values are not re-decoded once per chunk
+            self._fill(size)
+            size *= 2
+
+
+def iter_members(f, stream_key):
+    """Top-level members of a JSON object, streaming the array under ``stream_key``
+
+    Yields ('value', key, value) for ordinary members and ('start', key),
+    ('item', value)..., ('end', key) for the streamed array.
+    """
+    reader = _StreamReader(f)
+    reader.expect('{')
+    first = True
+    while reader.peek() != '}':
+        if not first:
+            reader.expect(',')
+        first = False
+        key = reader.value()
+        reader.expect(':')
+        if key == stream_key and reader.peek() == '[':
+            reader.expect('[')
+            yield 'start', key
+            first_item = True
+            while reader.peek() != ']':
+                if not first_item:
+                    reader.expect(',')
+                first_item = False
+                yield 'item', reader.value()
+            reader.expect(']')
+            yield 'end', key
+        else:
+            yield 'value', key, reader.value()
+    reader.expect('}')
+
+
+def _indented(value, depth):
+    """json.dumps(value, indent=2) as nested ``depth`` levels deep"""
+    return json.dumps(value, indent=2).replace('\n', '\n' + '  ' * depth)
+
+
+class _StreamWriter:
+    """Writes a top-level object member by member, formatted like json.dumps(indent=2)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.members = 0
+        self.items = None
+
+    def _key(self, key):
+        self.f.write(('{\n' if not self.members else ',\n') + f"  {json.dumps(key)}: ")
+        self.members += 1
+
+    def value(self, key, value):
+        self._key(key)
+        self.f.write(_indented(value, 1))
+
+    def start(self, key):
+        self._key(key)
+        self.f.write('[')
+        self.items = 0
+
+    def item(self, value):
+        self.f.write(('\n' if not self.items else ',\n') + '    ' + _indented(value, 2))
+        self.items += 1
+
+    def end(self):
+        self.f.write('\n  ]' if self.items else ']')
+        self.items = None
+
+    def close(self):
+        self.f.write('\n}\n' if self.members else '{}\n')
+
+
+class _NullWriter:
+    """Stands in for _StreamWriter in dry runs, skipping the encoding"""
+
+    def value(self, key, value):
+        pass
+
+    def start(self, key):
+        pass
+
+    def item(self, value):
+        pass
+
+    def end(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# ---------- files ----------
+
+class MigrationReport(NamedTuple):
+    """Outcome of migrating one file"""
+    path: Path
+    from_version: int
+    to_version: int
+    changes: dict
+    errors: list
+    written: bool
+
+
+def _topics_version(path):
+    """Schema version of a topics file, streaming it only if the version is not its first member"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for event in iter_members(f, 'learning_path'):
+            if event[0] == 'value' and event[1] == VERSION_KEY:
+                return event[2]
+    return 0
+
+
+class _Invalid(Exception):
+    """Raised to abandon a write whose result did not validate"""
+
+
+def migrate_topics_file(path, dry_run=False):
+    """Migrate a topics file in one streaming pass, writing it unless ``dry_run`` or invalid"""
+    path = Path(path)
+    with PathLock(path):
+        version = _topics_version(path)
+        changes, errors, seen = {}, [], set()
+        if version >= TOPICS_SCHEMA_VERSION:
+            return MigrationReport(path, version, version, changes, errors, False)
+
+        def write(writer):
+            writer.value(VERSION_KEY, TOPICS_SCHEMA_VERSION)
+            with open(path, 'r', encoding='utf-8') as f:
+                for event in iter_members(f, 'learning_path'):
+                    if event[0] == 'value':
+                        if event[1] != VERSION_KEY:
+                            writer.value(event[1], event[2])
+                    elif event[0] == 'start':
+                        writer.start(event[1])
+                    elif event[0] == 'item':
+                        category = migrate_category(event[1], version, changes)
+                        errors.extend(validate_category(category, seen))
+                        writer.item(category)
+                    else:
+                        writer.end()
+            writer.close()
+            if errors:
+                raise _Invalid()
+
+        if dry_run:
+            try:
+                write(_NullWriter())
+            except _Invalid:
+                pass
+            return MigrationReport(path, version, TOPICS_SCHEMA_VERSION, changes, errors, False)
+        try:
+            with atomic_open(path, 'w') as out:
+                write(_StreamWriter(out))
+        except _Invalid:
+            return MigrationReport(path, version, TOPICS_SCHEMA_VERSION, changes, errors, False)
+        return MigrationReport(path, version, TOPICS_SCHEMA_VERSION, changes, errors, True)
+
+
+def migrate_progress_file(path, dry_run=False):
+    """Migrate one progress_<user>.json file, writing it unless ``dry_run`` or invalid"""
+    path = Path(path)
+    username = path.stem[len('progress_'):]
+    with PathLock(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        version = record.get(VERSION_KEY, 0)
+        changes = {}
+        if version >= PROGRESS_SCHEMA_VERSION:
+            return MigrationReport(path, version, version, changes, [], False)
+        record = upgrade_progress(record, username, changes)
+        errors = validate_progress(record)
+        written = not dry_run and not errors
+        if written:
+            # Version first, like topics.json
+            record = dict({VERSION_KEY: record.pop(VERSION_KEY)}, **record)
+            with atomic_open(path, 'w') as out:
+                out.write(json.dumps(record, indent=2) + '\n')
+        return MigrationReport(path, version, PROGRESS_SCHEMA_VERSION, changes, errors, written)
+
+
+def migrate_directory(directory, dry_run=False):
+    """Migrate topics.json and every progress_<user>.json in a directory"""
+    directory = Path(directory)
+    reports = []
+    if (directory / 'topics.json').exists():
+        reports.append(migrate_topics_file(directory / 'topics.json', dry_run))
+    for path in sorted(directory.glob('progress_*.json')):
+        reports.append(migrate_progress_file(path, dry_run))
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Upgrade topics.json and progress files to the current schema")
+    parser.add_argument('files', nargs='*', type=Path,
+                        help="Files to migrate (default: topics.json and progress_*.json in --source)")
+    parser.add_argument('--source', type=Path, default=Path('.'), help="Directory holding the data files")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        reports = [
+            migrate_progress_file(path, args.dry_run) if path.name.startswith('progress_')
+            else migrate_topics_file(path, args.dry_run)
+            for path in args.files
+        ]
+    else:
+        reports = migrate_directory(args.source, args.dry_run)
+
+    failed = False
+    for report in reports:
+        if report.from_version == report.to_version:
+            print(f"{report.path}: up to date (schema {report.to_version})")
+            continue
+        action = "migrated" if report.written else ("not written (invalid)" if report.errors else "would migrate")
+        print(f"{report.path}: schema {report.from_version} -> {report.to_version}, {action}")
+        for description, count in report.changes.items():
+            print(f"  {description}: {count}")
+        for error in report.errors:
+            print(f"  error: {error}")
+        failed = failed or bool(report.errors)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
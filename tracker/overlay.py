@@ -0,0 +1,73 @@
+"""Per-session copy-on-write edits over the shared curriculum snapshot"""
+from tracker.changelog import subtopic_change
+
+
+class CurriculumOverlay:
+    """A session's unsaved resource and note edits
+
+    The shared Curriculum is only read: a subtopic is copied into the
+    overlay on its first edit, along with the values it started from and
+    the snapshot version they came from, so saving can detect edits made
+    by other sessions in the meantime. Subtopics are keyed by
+    (cat_id, topic_id, name).
+    """
+
+    def __init__(self):
+        self.edits = {}
+        self.base = {}
+        self.base_version = None
+
+    def __len__(self):
+        return len(self.edits)
+
+    def resources(self, curriculum, key):
+        """Resources of a subtopic as this session sees them (read-only)"""
+        edit = self.edits.get(key, {})
+        if 'resources' in edit:
+            return edit['resources']
+        return curriculum.subtopic_values(*key).get('resources', [])
+
+    def notes(self, curriculum, key):
+        """Notes of a subtopic as this session sees them"""
+        edit = self.edits.get(key, {})
+        if 'notes' in edit:
+            return edit['notes']
+        return curriculum.subtopic_values(*key).get('notes', '')
+
+    def _edit(self, curriculum, version, key):
+        edit = self.edits.get(key)
+        if edit is None:
+            if self.base_version is None:
+                self.base_version = version
+            # Snapshots are never modified, so the base can share their values
+            self.base[key] = curriculum.subtopic_values(*key)
+            edit = self.edits[key] = {}
+        return edit
+
+    def add_resource(self, curriculum, version, key, resource):
+        """Append a resource to a subtopic"""
+        resources = self.resources(curriculum, key)
+        self._edit(curriculum, version, key)['resources'] = resources + [resource]
+
+    def remove_resource(self, curriculum, version, key, position):
+        """Remove the resource at ``position`` from a subtopic"""
+        resources = list(self.resources(curriculum, key))
+        del resources[position]
+        self._edit(curriculum, version, key)['resources'] = resources
+
+    def set_notes(self, curriculum, version, key, notes):
+        """Replace a subtopic's notes"""
+        self._edit(curriculum, version, key)['notes'] = notes
+
+    def changes(self):
+        """Change log records for every edited subtopic"""
+        return [
+            subtopic_change(*key, resources=edit.get('resources'), notes=edit.get('notes'), was=self.base[key])
+            for key, edit in self.edits.items()
+        ]
+
+    def clear(self):
+        """Drop all edits, e.g. once they have been saved"""
+        self.edits = {}
+        self.base = {}
+        self.base_version = None
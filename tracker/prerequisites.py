@@ -0,0 +1,248 @@
+"""Prerequisite graph of the curriculum and "what to study next" recommendations
+
+topics.json may declare prerequisites on categories and topics:
+
+    {"id": 5, "category": "Deep Learning", "prerequisites": [4], "topics": [
+        {"id": 5.3, "name": "Transformers", "prerequisites": [5.2], ...}]}
+
+A category prerequisite applies to every topic of the category, and is
+met once all the prerequisite category's topics are complete. The graph
+has a node per topic and per category and is checked to be acyclic. Its
+topological order and the ancestor/descendant sets of every node (as
+bit masks) are computed once per curriculum.
+
+Recommendations come from each user's completed-subtopic bits. Only the
+bits that changed since the user's last call are looked at, and only the
+topics downstream of a topic that became (in)complete are re-checked.
+"""
+import heapq
+import threading
+from typing import NamedTuple
+
+from tracker.bitset import ProgressBitset
+
+
+class Recommendation(NamedTuple):
+    """A subtopic to study next"""
+    index: int
+    cat_id: str
+    topic_id: str
+    name: str
+    in_progress: bool
+    unlocks: int
+
+
+def _bits(mask):
+    """Indices of the set bits of an int"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PrerequisiteGraph:
+    """DAG over the topics and categories of one curriculum
+
+    Topics are nodes 0..T-1 in curriculum order and categories T..T+C-1.
+    Raises ValueError for unknown prerequisite ids or cycles.
+    """
+
+    def __init__(self, curriculum):
+        self.curriculum = curriculum
+        self.topics = list(curriculum.topic_ranges)
+        self.topic_node = {key: i for i, key in enumerate(self.topics)}
+        n_topics = len(self.topics)
+        category_node = {cat_id: n_topics + i for i, cat_id in enumerate(curriculum.category_ids)}
+        topics_by_id = {}
+        for cat_id, topic_id in self.topics:
+            topics_by_id.setdefault(topic_id, []).append((cat_id, topic_id))
+        self.size = n_topics + len(category_node)
+
+        children = [[] for _ in range(self.size)]
+        for cat_id in curriculum.category_ids:
+            category = curriculum.category_by_id[cat_id]
+            topic_nodes = [self.topic_node[(cat_id, t)] for t in curriculum.topics_by_category[cat_id]]
+            for node in topic_nodes:
+                children[node].append(category_node[cat_id])
+            for required in category.get('prerequisites', []):
+                if str(required) not in category_node:
+                    raise ValueError(f"Category {cat_id}: unknown prerequisite category {required!r}")
+                children[category_node[str(required)]].extend(topic_nodes)
+            for topic_id in curriculum.topics_by_category[cat_id]:
+                topic = curriculum.topic_by_id[(cat_id, topic_id)]
+                for required in topic.get('prerequisites', []):
+                    matches = topics_by_id.get(str(required), [])
+                    if len(matches) != 1:
+                        raise ValueError(
+                            f"Topic {topic_id}: {'ambiguous' if matches else 'unknown'} prerequisite topic {required!r}"
+                        )
+                    children[self.topic_node[matches[0]]].append(self.topic_node[(cat_id, topic_id)])
+        self.children = children
+
+        # Kahn's algorithm, taking ready nodes in curriculum order
+        indegree = [0] * self.size
+        for node_children in children:
+            for child in node_children:
+                indegree[child] += 1
+        ready = [node for node in range(self.size) if not indegree[node]]
+        heapq.heapify(ready)
+        self.order = []
+        while ready:
+            node = heapq.heappop(ready)
+            self.order.append(node)
+            for child in children[node]:
+                indegree[child] -= 1
+                if not indegree[child]:
+                    heapq.heappush(ready, child)
+        if len(self.order) != self.size:
+            stuck = [self._label(n) for n in range(self.size) if indegree[n]]
+            raise ValueError(f"Prerequisites form a cycle through: {', '.join(stuck[:10])}")
+        self.rank = [0] * self.size
+        for position, node in enumerate(self.order):
+            self.rank[node] = position
+
+        # Reachability index
+        self.ancestors = [0] * self.size
+        for node in self.order:
+            for child in children[node]:
+                self.ancestors[child] |= self.ancestors[node] | (1 << node)
+        self.descendants = [0] * self.size
+        for node in reversed(self.order):
+            for child in children[node]:
+                self.descendants[node] |= self.descendants[child] | (1 << child)
+
+        topic_mask = (1 << n_topics) - 1
+        self.required = [self.ancestors[t] & topic_mask for t in range(n_topics)]
+        self.downstream = [self.descendants[t] & topic_mask for t in range(n_topics)]
+        self.unlocks = [mask.bit_count() for mask in self.downstream]
+        self.ranges = [curriculum.topic_ranges[key] for key in self.topics]
+        self.topic_of = [0] * curriculum.total_subtopics
+        for t, index_range in enumerate(self.ranges):
+            for i in index_range:
+                self.topic_of[i] = t
+
+    def _label(self, node):
+        if node < len(self.topics):
+            return f"topic {self.topics[node][1]}"
+        return f"category {self.curriculum.category_ids[node - len(self.topics)]}"
+
+
+class _UserState:
+    __slots__ = ('bits', 'done', 'complete', 'available', 'ranked')
+
+    def __init__(self, graph, bitset):
+        self.bits = int.from_bytes(bitset.bits, 'little')
+        self.done = [bitset.count_range(index_range) for index_range in graph.ranges]
+        self.complete = 0
+        for t, index_range in enumerate(graph.ranges):
+            if self.done[t] == len(index_range):
+                self.complete |= 1 << t
+        self.available = set()
+        for t in range(len(graph.topics)):
+            self._check(graph, t)
+        self.ranked = None
+
+    def _check(self, graph, t):
+        if not self.complete >> t & 1 and not graph.required[t] & ~self.complete:
+            self.available.add(t)
+        else:
+            self.available.discard(t)
+
+    def update(self, graph, bitset):
+        """Apply the bits that changed since the last call"""
+        bits = int.from_bytes(bitset.bits, 'little')
+        changed = bits ^ self.bits
+        if not changed:
+            return
+        self.bits = bits
+        flipped = set()
+        for i in _bits(changed):
+            t = graph.topic_of[i]
+            self.done[t] += 1 if bits >> i & 1 else -1
+            if (self.done[t] == len(graph.ranges[t])) != bool(self.complete >> t & 1):
+                self.complete ^= 1 << t
+                flipped.add(t)
+        # Completing a topic can only change its own availability and that
+        # of the topics downstream of it
+        affected = set(flipped)
+        for t in flipped:
+            affected.update(_bits(graph.downstream[t]))
+        for t in affected:
+            self._check(graph, t)
+        # Done counts moved, so the in-progress ordering may have too
+        self.ranked = None
+
+
+class Recommender:
+    """Per-user recommendation state over one prerequisite graph (thread-safe)"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def recommend(self, username, bitset, limit=5):
+        """Best subtopics to study next for a user's completed-subtopic bits
+
+        Available topics (prerequisites complete, topic not) rank topics
+        already under way first, then the ones unlocking the most other
+        topics, then curriculum order; each contributes its first
+        uncompleted subtopic.
+        """
+        graph = self.graph
+        with self._lock:
+            state = self._users.get(username)
+            if state is None:
+                state = self._users[username] = _UserState(graph, bitset)
+            else:
+                state.update(graph, bitset)
+            if state.ranked is None:
+                state.ranked = sorted(
+                    state.available,
+                    key=lambda t: (not state.done[t], -graph.unlocks[t], graph.rank[t])
+                )
+            ranked = state.ranked[:limit]
+            done = [state.done[t] for t in ranked]
+        recommendations = []
+        for t, done_count in zip(ranked, done):
+            cat_id, topic_id = graph.topics[t]
+            index_range = graph.ranges[t]
+            index = next((i for i in index_range if i not in bitset), index_range.start)
+            recommendations.append(Recommendation(
+                index, cat_id, topic_id, graph.curriculum.subtopics[index].name, done_count > 0, graph.unlocks[t]
+            ))
+        return recommendations
+
+    def forget(self, username):
+        """Drop a user's state, e.g. when they are removed"""
+        with self._lock:
+            self._users.pop(username, None)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def recommender_for(curriculum):
+    """Shared Recommender of a curriculum
+
+    Snapshots derived with Curriculum.with_changes only differ in
+    resources and notes, so they share the graph and the users' state.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None or _shared[0] is not curriculum.subtopics:
+            try:
+                _shared = (curriculum.subtopics, Recommender(PrerequisiteGraph(curriculum)))
+            except ValueError as e:
+                # Remembered, so a broken topics.json is not re-checked on every call
+                _shared = (curriculum.subtopics, e)
+        if isinstance(_shared[1], ValueError):
+            raise _shared[1]
+        return _shared[1]
+
+
+def recommend(curriculum, progress_data, username=None, limit=5):
+    """Recommendations for one progress record (see Recommender.recommend)"""
+    bitset = ProgressBitset.from_progress(curriculum, progress_data)
+    return recommender_for(curriculum).recommend(username or progress_data.get('username', ''), bitset, limit)
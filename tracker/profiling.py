@@ -0,0 +1,135 @@
+"""Opt-in per-rerun timing spans and counters
+
+Set LEARNING_TRACKER_PROFILE=1 to turn it on, and optionally
+LEARNING_TRACKER_PROFILE_LOG=<path> to append one JSON line per run. When
+it is off, span() returns a shared no-op context manager and count()
+returns immediately, so the calls can stay in hot paths.
+
+A run is tracked per thread (Streamlit runs each session's script in its
+own thread); spans and counts outside begin_run/end_run are dropped.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+ENABLED = os.environ.get("LEARNING_TRACKER_PROFILE", "") not in ("", "0")
+LOG_PATH = os.environ.get("LEARNING_TRACKER_PROFILE_LOG") or None
+
+_NULL_SPAN = nullcontext()
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class Profile:
+    """Span timings and counters collected during one run"""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.counters = {}
+        self.stack = []
+        self.open = {}
+
+    def add_span(self, name, seconds):
+        path = "/".join(self.stack + [name])
+        calls, total = self.spans.get(path, (0, 0.0))
+        self.spans[path] = (calls + 1, total + seconds)
+
+    def record(self):
+        """Summary of the run as a JSON-serialisable dict"""
+        return {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'label': self.label,
+            'total_ms': (time.perf_counter() - self.started) * 1000,
+            'spans': {
+                path: {'calls': calls, 'ms': seconds * 1000}
+                for path, (calls, seconds) in self.spans.items()
+            },
+            'counters': dict(self.counters)
+        }
+
+
+class _Span:
+    __slots__ = ('profile', 'name', 'started')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.profile.stack.append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.profile.stack.pop()
+        self.profile.add_span(self.name, elapsed)
+        return False
+
+
+def current():
+    """Profile of the run active on this thread, or None"""
+    return getattr(_local, 'profile', None) if ENABLED else None
+
+
+def begin_run(label=""):
+    """Start collecting spans and counters for a run on this thread"""
+    if ENABLED:
+        _local.profile = Profile(label)
+
+
+def end_run(label=None):
+    """Finish this thread's run and return its record (None when disabled)
+
+    ``label`` replaces the one given to begin_run, for runs that only learn
+    what they are part way through. The record is also appended to
+    LEARNING_TRACKER_PROFILE_LOG if set.
+    """
+    profile = current()
+    if profile is None:
+        return None
+    _local.profile = None
+    if label is not None:
+        profile.label = label
+    record = profile.record()
+    if LOG_PATH:
+        line = json.dumps(record) + "\n"
+        with _log_lock, open(LOG_PATH, 'a') as f:
+            f.write(line)
+    return record
+
+
+def span(name):
+    """Context manager timing a named stage of the current run"""
+    profile = current()
+    if profile is None:
+        return _NULL_SPAN
+    return _Span(profile, name)
+
+
+def start(name):
+    """Open a span that is closed by stop(name), for stages that are not one block"""
+    profile = current()
+    if profile is not None:
+        profile.open[name] = span(name).__enter__()
+
+
+def stop(name):
+    """Close a span opened with start(name)"""
+    profile = current()
+    if profile is not None and name in profile.open:
+        profile.open.pop(name).__exit__(None, None, None)
+
+
+def count(name, amount=1):
+    """Add to a named counter of the current run"""
+    if not ENABLED:
+        return
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        profile.counters[name] = profile.counters.get(name, 0) + amount
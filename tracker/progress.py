@@ -0,0 +1,121 @@
+"""Reading user progress files with a parse cache keyed on inode, mtime and size"""
+import copy
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from tracker import profiling
+from tracker.migrations import PROGRESS_SCHEMA_VERSION, VERSION_KEY, upgrade_progress
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def default_progress(username, name=None):
+    """Empty progress record for a user without a progress file"""
+    return {
+        VERSION_KEY: PROGRESS_SCHEMA_VERSION,
+        "username": username,
+        "name": name or username,
+        "email": f"{username}@example.com",
+        "started_date": datetime.now().strftime("%Y-%m-%d"),
+        "progress": {}
+    }
+
+
+def _parse_json(f):
+    profiling.count('json_parses')
+    return json.load(f)
+
+
+def cached_parse(path, parse=_parse_json, mode='r', token=None):
+    """Parse a file once per change, or return None if it is missing
+
+    The result is cached until the file's inode, mtime or size changes (or
+    a different ``token`` is passed) and must be treated as read-only.
+    Files are replaced atomically, so a new inode means new content even
+    within one mtime tick.
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size, token)
+    with _cache_lock:
+        cached = _cache.get((path, parse))
+        if cached is not None and cached[0] == key:
+            profiling.count('parse_cache_hits')
+            return cached[1]
+    profiling.count('file_reads')
+    with open(path, mode) as f:
+        data = parse(f)
+    with _cache_lock:
+        _cache[(path, parse)] = (key, data)
+    return data
+
+
+def _parse_progress(f):
+    return upgrade_progress(_parse_json(f))
+
+
+def read_progress_file(path):
+    """Parsed progress file shared between callers, or None if it is missing
+
+    Files from an older schema are upgraded in memory (see
+    tracker.migrations). The returned dict must be treated as read-only;
+    use load_progress_file for a copy to edit.
+    """
+    return cached_parse(path, _parse_progress)
+
+
+def progress_summary(progress_data):
+    """Small per-user record for user listings and statistics
+
+    Holds the user's details and each category's completion as
+    [percentage, completed], without the per-topic lists.
+    """
+    return {
+        'name': progress_data.get('name', progress_data.get('username', '')),
+        'email': progress_data.get('email', ''),
+        'started_date': progress_data.get('started_date', ''),
+        'categories': {
+            cat_id: [cat_progress.get('completion_percentage', 0), bool(cat_progress.get('completed', False))]
+            for cat_id, cat_progress in progress_data.get('progress', {}).items()
+        }
+    }
+
+
+def load_progress_file(path):
+    """Editable copy of a progress file, or None if it is missing"""
+    data = read_progress_file(path)
+    return copy.deepcopy(data) if data is not None else None
+
+
+def _category_entry(curriculum, progress_data, cat_id):
+    cat_progress = progress_data.setdefault('progress', {}).setdefault(cat_id, {})
+    cat_progress['category_name'] = curriculum.category_by_id[cat_id]['category']
+    return cat_progress
+
+
+def set_topic_progress(curriculum, progress_data, cat_id, topic_id, completed_names):
+    """Record a topic's completed subtopics and refresh its category percentage"""
+    cat_progress = _category_entry(curriculum, progress_data, cat_id)
+    topics = cat_progress.setdefault('topics', {})
+    topics[topic_id] = {
+        'topic_name': curriculum.topic_by_id[(cat_id, topic_id)]['name'],
+        'completed': len(completed_names) == curriculum.topic_subtopic_count(cat_id, topic_id),
+        'subtopics_completed': list(completed_names)
+    }
+    total = curriculum.category_subtopic_count(cat_id)
+    completed = sum(
+        len(topics.get(t_id, {}).get('subtopics_completed', []))
+        for t_id in curriculum.topics_by_category[cat_id]
+    )
+    cat_progress['completion_percentage'] = completed / total * 100 if total > 0 else 0
+
+
+def set_category_completed(curriculum, progress_data, cat_id, completed):
+    """Mark a whole category complete or not"""
+    _category_entry(curriculum, progress_data, cat_id)['completed'] = completed
@@ -0,0 +1,40 @@
+"""Users known to a storage backend, with lookup, search and registration"""
+import re
+
+USERNAME_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+
+
+class UserRegistry:
+    """Display names and search over every user in a storage backend
+
+    Names come from the storage's user index (Storage.user_names), so no
+    progress record is read to list or search users.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def names(self):
+        """Display name of every user, by username"""
+        return self.storage.user_names()
+
+    def search(self, query, names=None):
+        """Usernames whose username or display name contains ``query``"""
+        names = self.names() if names is None else names
+        query = query.strip().lower()
+        if not query:
+            return list(names)
+        return [u for u, name in names.items() if query in u or query in name.lower()]
+
+    def add(self, username, name='', email=''):
+        """Register a new user and return their normalised username
+
+        Raises ValueError for an invalid or taken username.
+        """
+        username = username.strip().lower()
+        if not USERNAME_PATTERN.fullmatch(username):
+            raise ValueError("Usernames use lowercase letters, digits, '-' and '_' (up to 64 characters)")
+        if username in self.names():
+            raise ValueError(f"User {username!r} already exists")
+        self.storage.add_user(username, name.strip() or username, email.strip() or None)
+        return username
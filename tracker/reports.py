@@ -0,0 +1,322 @@
+"""Batch per-user and cohort progress reports, fanned out over processes
+
+    python -m tracker.reports --source . --output-dir reports --format parquet
+
+Usernames are split into chunks and every worker process opens its own
+storage, so parsing and aggregating progress records scales with the
+number of cores. Rows are streamed to one file per report as chunks finish:
+
+- users: overall figures per user
+- categories: completion of every category per user
+- topics: completion of every topic per user, with its last activity
+- stalled_topics: started but unfinished topics without activity for
+  ``--stall-days`` days
+- cohort_categories / cohort_topics: the same summed over all users
+
+Last activity comes from the completion event log (see tracker.events);
+topics without events fall back to the user's started_date.
+"""
+import argparse
+import csv
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tracker.core import category_summaries, summarize_user, topic_summary
+from tracker.storage import open_storage
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_STALL_DAYS = 14
+
+# Columns and their types, in file order
+USER_COLUMNS = [
+    ('username', str), ('name', str), ('started_date', str), ('days_learning', int),
+    ('completed_categories', int), ('total_categories', int), ('overall_percentage', float),
+    ('subtopics_completed', int), ('subtopics_total', int), ('stalled_topics', int), ('last_activity', str)
+]
+CATEGORY_COLUMNS = [
+    ('username', str), ('cat_id', str), ('category', str), ('completion_percentage', float),
+    ('completed', bool), ('status', str), ('subtopics_completed', int), ('subtopics_total', int)
+]
+TOPIC_COLUMNS = [
+    ('username', str), ('cat_id', str), ('topic_id', str), ('topic', str), ('subtopics_completed', int),
+    ('subtopics_total', int), ('percentage', float), ('completed', bool), ('last_activity', str),
+    ('stalled', bool)
+]
+COHORT_CATEGORY_COLUMNS = [
+    ('cat_id', str), ('category', str), ('users', int), ('users_started', int), ('users_completed', int),
+    ('average_percentage', float)
+]
+COHORT_TOPIC_COLUMNS = [
+    ('cat_id', str), ('topic_id', str), ('topic', str), ('users', int), ('users_started', int),
+    ('users_completed', int), ('users_stalled', int)
+]
+REPORTS = {
+    'users': USER_COLUMNS,
+    'categories': CATEGORY_COLUMNS,
+    'topics': TOPIC_COLUMNS,
+    'stalled_topics': TOPIC_COLUMNS,
+    'cohort_categories': COHORT_CATEGORY_COLUMNS,
+    'cohort_topics': COHORT_TOPIC_COLUMNS,
+}
+
+
+class CsvReport:
+    """Rows appended to a CSV file"""
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.names = [name for name, _ in columns]
+        self.writer.writerow(self.names)
+
+    def write(self, rows):
+        self.writer.writerows([row[name] for name in self.names] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetReport:
+    """Rows appended to a Parquet file, one row group per write (needs pyarrow)"""
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet reports need pyarrow: pip install pyarrow") from None
+        types = {str: pa.string(), int: pa.int64(), float: pa.float64(), bool: pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        if rows:
+            self.writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+FORMATS = {'csv': (CsvReport, '.csv'), 'parquet': (ParquetReport, '.parquet')}
+
+
+def last_activity(storage, usernames: Iterable[str]) -> Dict[str, Dict[Tuple[str, str], str]]:
+    """Time of the last completion event per user and (cat_id, topic_id)
+
+    One pass over the event log, keeping only the given users.
+    """
+    wanted = set(usernames)
+    activity = {}
+    for event in storage.completion_events():
+        if event['user'] in wanted:
+            activity.setdefault(event['user'], {})[(event['cat'], event['topic'])] = event['t']
+    return activity
+
+
+def user_rows(curriculum, progress_data: dict, username: str, activity: Dict[Tuple[str, str], str],
+              today: date, stall_days: int) -> dict:
+    """Report rows for one user's progress record"""
+    summary = summarize_user(curriculum, progress_data, today)
+    stall_before = (today - timedelta(days=stall_days)).isoformat()
+    progress = progress_data.get('progress', {})
+    categories, topics = [], []
+    done_by_category = {}
+    for cat_id in curriculum.category_ids:
+        done = 0
+        for topic_id in curriculum.topics_by_category[cat_id]:
+            topic = topic_summary(curriculum, progress_data, cat_id, topic_id)
+            done += topic.completed_subtopics
+            flagged = progress.get(cat_id, {}).get('topics', {}).get(topic_id, {}).get('completed', False)
+            completed = bool(flagged) or (topic.total_subtopics > 0 and topic.completed_subtopics == topic.total_subtopics)
+            last = activity.get((cat_id, topic_id), '')
+            # Timestamps and dates compare as strings; no event means no
+            # activity since the user started
+            stalled = 0 < topic.completed_subtopics and not completed and (last or summary.started_date) < stall_before
+            topics.append({
+                'username': username, 'cat_id': cat_id, 'topic_id': topic_id, 'topic': topic.name,
+                'subtopics_completed': topic.completed_subtopics, 'subtopics_total': topic.total_subtopics,
+                'percentage': topic.percentage, 'completed': completed, 'last_activity': last, 'stalled': stalled
+            })
+        done_by_category[cat_id] = done
+    for cat in category_summaries(curriculum, progress_data):
+        categories.append({
+            'username': username, 'cat_id': cat.cat_id, 'category': cat.name,
+            'completion_percentage': float(cat.percentage), 'completed': bool(cat.completed), 'status': cat.status,
+            'subtopics_completed': done_by_category[cat.cat_id],
+            'subtopics_total': curriculum.category_subtopic_count(cat.cat_id)
+        })
+    stalled = [row for row in topics if row['stalled']]
+    user = {
+        'username': username, 'name': summary.name, 'started_date': summary.started_date,
+        'days_learning': summary.days_learning, 'completed_categories': summary.completed_categories,
+        'total_categories': summary.total_categories, 'overall_percentage': summary.overall_percentage,
+        'subtopics_completed': sum(done_by_category.values()), 'subtopics_total': curriculum.total_subtopics,
+        'stalled_topics': len(stalled), 'last_activity': max(activity.values(), default='')
+    }
+    return {'users': [user], 'categories': categories, 'topics': topics, 'stalled_topics': stalled}
+
+
+class Cohort:
+    """Per-category and per-topic counts summed over users, mergeable across chunks"""
+
+    def __init__(self):
+        self.users = 0
+        self.categories = {}
+        self.topics = {}
+
+    def add(self, rows):
+        self.users += len(rows['users'])
+        for row in rows['categories']:
+            counts = self.categories.setdefault(row['cat_id'], [0, 0, 0.0])
+            counts[0] += row['completion_percentage'] > 0
+            counts[1] += row['completed']
+            counts[2] += row['completion_percentage']
+        for row in rows['topics']:
+            counts = self.topics.setdefault((row['cat_id'], row['topic_id']), [0, 0, 0])
+            counts[0] += row['subtopics_completed'] > 0 or row['completed']
+            counts[1] += row['completed']
+            counts[2] += row['stalled']
+
+    def merge(self, other):
+        self.users += other.users
+        for table, theirs in ((self.categories, other.categories), (self.topics, other.topics)):
+            for key, counts in theirs.items():
+                mine = table.setdefault(key, [0] * len(counts))
+                for i, value in enumerate(counts):
+                    mine[i] += value
+
+    def rows(self, curriculum):
+        categories, topics = [], []
+        for cat_id in curriculum.category_ids:
+            started, completed, pct_sum = self.categories.get(cat_id, (0, 0, 0.0))
+            categories.append({
+                'cat_id': cat_id, 'category': curriculum.category_by_id[cat_id]['category'], 'users': self.users,
+                'users_started': started, 'users_completed': completed,
+                'average_percentage': pct_sum / self.users if self.users else 0.0
+            })
+            for topic_id in curriculum.topics_by_category[cat_id]:
+                started, completed, stalled = self.topics.get((cat_id, topic_id), (0, 0, 0))
+                topics.append({
+                    'cat_id': cat_id, 'topic_id': topic_id,
+                    'topic': curriculum.topic_by_id[(cat_id, topic_id)]['name'], 'users': self.users,
+                    'users_started': started, 'users_completed': completed, 'users_stalled': stalled
+                })
+        return {'cohort_categories': categories, 'cohort_topics': topics}
+
+
+# Per-process state of the worker pool
+_worker = {}
+
+
+def _init_worker(spec: str, source: str):
+    storage = open_storage(spec, source)
+    _worker['storage'] = storage
+    _worker['curriculum'] = storage.load_topics()
+
+
+def report_chunk(usernames: List[str], activity: Dict[str, Dict[Tuple[str, str], str]],
+                 today: date, stall_days: int) -> Tuple[dict, Cohort]:
+    """Rows of every report for a chunk of users, plus their cohort counts
+
+    Runs in a worker process set up by _init_worker. Users without
+    progress are skipped.
+    """
+    storage, curriculum = _worker['storage'], _worker['curriculum']
+    rows = {name: [] for name in ('users', 'categories', 'topics', 'stalled_topics')}
+    cohort = Cohort()
+    for username in usernames:
+        progress_data = storage.read_user_progress(username)
+        if progress_data is None:
+            continue
+        user = user_rows(curriculum, progress_data, username, activity.get(username, {}), today, stall_days)
+        cohort.add(user)
+        for name, user_table in user.items():
+            rows[name].extend(user_table)
+    return rows, cohort
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def generate_reports(spec: str, source, output_dir, usernames: Optional[List[str]] = None, fmt: str = 'csv',
+                     workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     stall_days: int = DEFAULT_STALL_DAYS, today: Optional[date] = None) -> Dict[str, Path]:
+    """Write every report for a storage to ``output_dir`` and return their paths
+
+    ``workers`` defaults to the number of cores; 0 runs in this process.
+    """
+    source = str(source)
+    today = today or datetime.now().date()
+    storage = open_storage(spec, source)
+    curriculum = storage.load_topics()
+    usernames = list(usernames) if usernames else storage.list_users()
+    activity = last_activity(storage, usernames)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report_class, suffix = FORMATS[fmt]
+    paths = {name: output_dir / f"{name}{suffix}" for name in REPORTS}
+    writers = {name: report_class(paths[name], columns) for name, columns in REPORTS.items()}
+    cohort = Cohort()
+    try:
+        tasks = [
+            (chunk, {u: activity[u] for u in chunk if u in activity}, today, stall_days)
+            for chunk in _chunks(usernames, chunk_size)
+        ]
+        if workers == 0:
+            _init_worker(spec, source)
+            results = (report_chunk(*task) for task in tasks)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec, source))
+            results = pool.map(report_chunk, *zip(*tasks)) if tasks else iter(())
+        try:
+            # Results arrive in chunk order, so the files are sorted like usernames
+            for rows, chunk_cohort in results:
+                for name, table in rows.items():
+                    writers[name].write(table)
+                cohort.merge(chunk_cohort)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        for name, table in cohort.rows(curriculum).items():
+            writers[name].write(table)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write per-user and cohort progress reports")
+    parser.add_argument('users', nargs='*', help="Usernames (default: every user with progress)")
+    parser.add_argument('--source', default='.', help="Directory with topics.json and progress files")
+    parser.add_argument('--storage', default='json', help='"json", "bitset" or "sqlite:<path>"')
+    parser.add_argument('--output-dir', default='reports', type=Path)
+    parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Worker processes (default: one per core, 0 to run in this process)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Users per worker task")
+    parser.add_argument('--stall-days', type=int, default=DEFAULT_STALL_DAYS,
+                        help="Days without activity after which a started topic counts as stalled")
+    args = parser.parse_args(argv)
+
+    try:
+        paths = generate_reports(
+            args.storage, args.source, args.output_dir, args.users, args.format,
+            args.workers, args.chunk_size, args.stall_days
+        )
+    except RuntimeError as e:
+        parser.error(str(e))
+    for name, path in paths.items():
+        print(f"{name}: {path}")
+
+
+if __name__ == '__main__':
+    main()
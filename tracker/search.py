@@ -0,0 +1,174 @@
+"""Inverted index for searching subtopic names, notes and resources
+
+Documents are subtopic indexes of a Curriculum. Every query token must
+match a term exactly or as a prefix (so results update while typing);
+matches are ranked by field weight and how rare the term is.
+"""
+import bisect
+import math
+import re
+import threading
+
+FIELD_WEIGHTS = {'name': 3.0, 'resources': 2.0, 'notes': 1.0}
+PREFIX_FACTOR = 0.5
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lower-cased word tokens of a text"""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def document_terms(name, resources=(), notes=''):
+    """Weighted terms of one subtopic"""
+    terms = {}
+    texts = [('name', name), ('notes', notes)]
+    texts.extend(
+        ('resources', f"{resource.get('title', '')} {resource.get('description', '')}")
+        for resource in resources
+    )
+    for field, text in texts:
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0.0) + weight
+    return terms
+
+
+class SearchIndex:
+    """Term -> document postings with a sorted term list for prefix lookups
+
+    An index created with ``base`` is a layer over it: its documents
+    replace the base's documents with the same index, which lets a session
+    search its unsaved edits without copying the shared index. All methods
+    are thread-safe.
+    """
+
+    def __init__(self, base=None):
+        self.base = base
+        self.postings = {}
+        self.docs = {}
+        self.terms = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, curriculum):
+        """Index of every subtopic in a curriculum"""
+        index = cls()
+        for entry in curriculum.subtopics:
+            index.update(entry.index, entry.name, **curriculum.subtopic_values(entry.cat_id, entry.topic_id, entry.name))
+        return index
+
+    def __len__(self):
+        return len(self.docs)
+
+    def update(self, doc, name, resources=(), notes=''):
+        """(Re)index one subtopic"""
+        terms = document_terms(name, resources, notes)
+        with self._lock:
+            self._remove(doc)
+            self.docs[doc] = terms
+            for term, weight in terms.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = {}
+                    bisect.insort(self.terms, term)
+                postings[doc] = weight
+
+    def remove(self, doc):
+        """Drop one subtopic from the index"""
+        with self._lock:
+            self._remove(doc)
+
+    def _remove(self, doc):
+        for term in self.docs.pop(doc, ()):
+            postings = self.postings[term]
+            del postings[doc]
+            if not postings:
+                del self.postings[term]
+                del self.terms[bisect.bisect_left(self.terms, term)]
+
+    def _expand(self, token):
+        """Indexed terms starting with ``token``"""
+        start = bisect.bisect_left(self.terms, token)
+        end = bisect.bisect_left(self.terms, token + '\U0010ffff', start)
+        return self.terms[start:end]
+
+    def _matches(self, token, shadowed):
+        """Best weight per document for a query token across both layers"""
+        scores = {}
+        layers = [(self, ())]
+        if self.base is not None:
+            layers.append((self.base, shadowed))
+        for layer, skip in layers:
+            with layer._lock:
+                for term in layer._expand(token):
+                    factor = 1.0 if term == token else PREFIX_FACTOR
+                    for doc, weight in layer.postings[term].items():
+                        if doc in skip:
+                            continue
+                        score = weight * factor
+                        if score > scores.get(doc, 0.0):
+                            scores[doc] = score
+        return scores
+
+    def search(self, query, limit=None):
+        """Subtopic indexes matching every token of ``query``, best first
+
+        Returns a list of (index, score).
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        with self._lock:
+            shadowed = set(self.docs)
+        total = len(self.base) if self.base is not None else len(self)
+        ranked = None
+        for token in tokens:
+            matches = self._matches(token, shadowed)
+            idf = math.log(1 + total / (1 + len(matches)))
+            if ranked is None:
+                ranked = {doc: score * idf for doc, score in matches.items()}
+            else:
+                ranked = {doc: ranked[doc] + score * idf for doc, score in matches.items() if doc in ranked}
+            if not ranked:
+                return []
+        results = sorted(ranked.items(), key=lambda item: (-item[1], item[0]))
+        return results[:limit] if limit is not None else results
+
+    def refresh(self, old, new):
+        """Reindex the topics that differ between two snapshots of a curriculum
+
+        Only valid when ``new`` was derived from ``old`` with
+        Curriculum.with_changes (same subtopics, different values).
+        """
+        for key, topic in new.topic_by_id.items():
+            if topic is old.topic_by_id.get(key):
+                continue
+            for i in new.topic_ranges[key]:
+                entry = new.subtopics[i]
+                self.update(i, entry.name, **new.subtopic_values(entry.cat_id, entry.topic_id, entry.name))
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def index_for(curriculum):
+    """Shared index of a curriculum snapshot
+
+    A snapshot derived from the last indexed one (Curriculum.with_changes)
+    only reindexes its changed topics; any other curriculum is indexed
+    from scratch.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is not None and _shared[0] is curriculum:
+            return _shared[1]
+        if _shared is not None and _shared[0].subtopics is curriculum.subtopics:
+            index = _shared[1]
+            index.refresh(_shared[0], curriculum)
+        else:
+            index = SearchIndex.build(curriculum)
+        _shared = (curriculum, index)
+        return index
@@ -0,0 +1,179 @@
+"""Vectorized aggregation of progress across users for the Statistics page
+
+Everything is computed with groupbys over a long-format category progress
+frame (user, category_id, completion_percentage, completed), the same
+shape as the category_progress table of tracker.columnar, or from Cohort
+counters that storage backends keep up to date as progress is saved.
+"""
+import numpy as np
+import pandas as pd
+
+from tracker.progress import progress_summary
+
+
+def category_frame(summaries):
+    """Long-format category progress from user summaries (see progress.progress_summary)"""
+    users, cat_ids, percentages, completed = [], [], [], []
+    for username, summary in summaries.items():
+        for cat_id, (percentage, done) in summary.get('categories', {}).items():
+            users.append(username)
+            cat_ids.append(cat_id)
+            percentages.append(percentage or 0)
+            completed.append(bool(done))
+    return pd.DataFrame({
+        'user': pd.Categorical(users),
+        'category_id': pd.Categorical(cat_ids),
+        'completion_percentage': np.array(percentages, dtype=float),
+        'completed': np.array(completed, dtype=bool)
+    })
+
+
+class Cohort:
+    """Statistics page counters, kept up to date from summary changes
+
+    ``users`` maps each username to [completed categories, sum of category
+    percentages] and ``categories`` each category id to [users started,
+    users completed, sum of percentages]. Only the categories in
+    ``category_ids`` count. Applying a save only looks at the categories
+    whose summary entry changed, so the counters never need a rescan.
+    """
+
+    def __init__(self, category_ids, summaries=None):
+        self.category_ids = tuple(category_ids)
+        self.users = {}
+        self.categories = {cat_id: [0, 0, 0.0] for cat_id in self.category_ids}
+        for username, summary in (summaries or {}).items():
+            self.apply(username, None, summary)
+
+    def apply(self, username, old, new):
+        """Move the counters from a user's old summary to the new one (None: no user)"""
+        totals = self.users.setdefault(username, [0, 0.0])
+        old_categories = (old or {}).get('categories', {})
+        new_categories = (new or {}).get('categories', {})
+        for cat_id in old_categories.keys() | new_categories.keys():
+            counters = self.categories.get(cat_id)
+            before, after = old_categories.get(cat_id), new_categories.get(cat_id)
+            if counters is None or before == after:
+                continue
+            for entry, sign in ((before, -1), (after, 1)):
+                if entry is None:
+                    continue
+                percentage, completed = entry[0] or 0, bool(entry[1])
+                counters[0] += sign * (percentage > 0)
+                counters[1] += sign * completed
+                counters[2] += sign * percentage
+                totals[0] += sign * completed
+                totals[1] += sign * percentage
+        if new is None:
+            del self.users[username]
+
+    def snapshot(self):
+        """Copies of the user and category counters"""
+        return (
+            {username: tuple(totals) for username, totals in self.users.items()},
+            {cat_id: tuple(counters) for cat_id, counters in self.categories.items()}
+        )
+
+
+def leaderboard(usernames, completed, percentage_sums, total_cats, user_names=None):
+    """Users ranked by completed categories, then average category progress
+
+    Tied users share a rank (1, 2, 2, 4).
+    """
+    user_names = user_names or {}
+    completed = np.asarray(completed, dtype=np.int64)
+    average = np.asarray(percentage_sums, dtype=float) / total_cats if total_cats else np.zeros(len(completed))
+    # Rounded so that float noise from incremental sums cannot break ties
+    average = np.round(average, 6)
+    order = np.lexsort((-average, -completed))
+    completed, average = completed[order], average[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (completed[1:] != completed[:-1]) | (average[1:] != average[:-1])
+    ranks = np.maximum.accumulate(np.where(first, np.arange(1, len(order) + 1), 0))
+    return pd.DataFrame({
+        'Rank': ranks,
+        'User': [user_names.get(usernames[i], usernames[i]) for i in order],
+        'Completed Categories': completed,
+        'Average Progress': average
+    })
+
+
+def counter_statistics(curriculum, usernames, user_totals, category_totals, user_names=None):
+    """All Statistics page metrics from per-user and per-category counters
+
+    ``user_totals`` maps usernames to (completed categories, percentage
+    sum) and ``category_totals`` category ids to (users started, users
+    completed, percentage sum); missing entries count as zero. Costs
+    O(users + categories) whatever the curriculum size.
+    """
+    user_names = user_names or {}
+    usernames = [str(u) for u in usernames]
+    n_users = len(usernames)
+    cat_ids = curriculum.category_ids
+    total_cats = curriculum.total_categories
+
+    by_user = np.array([user_totals.get(u, (0, 0.0)) for u in usernames], dtype=float).reshape(-1, 2)
+    by_category = np.array([category_totals.get(c, (0, 0, 0.0)) for c in cat_ids], dtype=float).reshape(-1, 3)
+    completed_per_user = by_user[:, 0].astype(np.int64)
+    pct_sum = by_category[:, 2]
+    average_progress = float(pct_sum.sum() / (n_users * total_cats)) if n_users and total_cats else 0.0
+
+    # Subtopics still to do across all users, estimated from the category percentages
+    subtopic_counts = np.array([curriculum.category_subtopic_count(c) for c in cat_ids], dtype=float)
+    remaining = float((subtopic_counts * (n_users - pct_sum / 100)).sum())
+
+    comparison = pd.DataFrame({
+        'User': [user_names.get(u, u) for u in usernames],
+        'Completed Categories': completed_per_user,
+        'Total Categories': total_cats,
+        'Percentage': completed_per_user / total_cats * 100 if total_cats else 0.0
+    })
+
+    engagement = pd.DataFrame({
+        'Category': [cat['category'] for cat in curriculum.categories],
+        'Users Started': by_category[:, 0].astype(np.int64),
+        'Users Completed': by_category[:, 1].astype(np.int64),
+        'Total Users': n_users
+    })
+
+    return {
+        'total_users': n_users,
+        'average_progress': average_progress,
+        'remaining_subtopics': round(remaining),
+        'comparison': comparison,
+        'engagement': engagement,
+        'leaderboard': leaderboard(usernames, completed_per_user, by_user[:, 1], total_cats, user_names)
+    }
+
+
+def table_statistics(curriculum, category_progress, usernames, user_names=None):
+    """All Statistics page metrics from a long-format category progress frame
+
+    Rows of users outside ``usernames`` or categories outside the
+    curriculum are ignored; users without rows count as not started.
+    """
+    usernames = [str(u) for u in usernames]
+    rows = category_progress[
+        category_progress['user'].isin(usernames) & category_progress['category_id'].isin(curriculum.category_ids)
+    ]
+    rows = rows.assign(started=rows['completion_percentage'] > 0)
+    by_category = rows.groupby('category_id', observed=True)[['started', 'completed', 'completion_percentage']].sum()
+    by_user = rows.groupby('user', observed=True)[['completed', 'completion_percentage']].sum()
+    category_totals = dict(zip(by_category.index.astype(str), by_category.itertuples(index=False, name=None)))
+    user_totals = dict(zip(by_user.index.astype(str), by_user.itertuples(index=False, name=None)))
+    return counter_statistics(curriculum, usernames, user_totals, category_totals, user_names)
+
+
+def compute_statistics(curriculum, progress_by_user, user_names=None):
+    """All Statistics page metrics from one pass over the loaded progress
+
+    ``progress_by_user`` maps username to its progress record, each loaded
+    once by the caller.
+    """
+    summaries = {username: progress_summary(data) for username, data in progress_by_user.items()}
+    return compute_summary_statistics(curriculum, summaries, user_names)
+
+
+def compute_summary_statistics(curriculum, summaries, user_names=None):
+    """All Statistics page metrics from user summaries instead of full progress records"""
+    return table_statistics(curriculum, category_frame(summaries), list(summaries), user_names)
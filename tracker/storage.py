@@ -0,0 +1,1262 @@
+"""Pluggable storage for the curriculum, user details and progress
+
+Two implementations share one interface:
+
+- JsonFileStorage: topics.json plus one progress_<user>.json (or .bits)
+  file per user, the layout the app has always used, with edits appended
+  to change logs (see tracker.changelog)
+- SqliteStorage: a single SQLite database in WAL mode with indexed
+  tables and per-row upserts
+
+Usage:
+    python -m tracker.storage migrate --source . --db learning_tracker.db
+"""
+import argparse
+import copy
+import json
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+
+from tracker.bitset import load_bitset_progress, read_bitset_file, save_bitset_progress
+from tracker.changelog import (
+    COMPACT_BYTES, ChangeLog, ConflictError, apply_progress_changes, apply_topic_changes,
+    diff_progress, find_conflicts, log_path
+)
+from tracker import profiling
+from tracker.curriculum import Curriculum, load_curriculum
+from tracker.events import ALL, CompletionRollups, completion_events, rollup_deltas
+from tracker.fileio import PathLock, atomic_write_json
+from tracker.migrations import upgrade_topics
+from tracker.progress import cached_parse, default_progress, progress_summary, read_progress_file
+
+
+class Storage:
+    """Interface shared by all storage backends
+
+    Change records (see tracker.changelog) can be saved with the version
+    they were based on. If the data moved on since then, the save still
+    goes through when the changes touch different data, and raises
+    ConflictError when another session changed the same subtopic or
+    category to something else.
+    """
+
+    def load_topics(self):
+        """Indexed curriculum"""
+        raise NotImplementedError
+
+    def topics_version(self):
+        """Version of the curriculum, increasing with every save"""
+        raise NotImplementedError
+
+    def save_topics(self, topics_data):
+        """Replace the whole curriculum"""
+        raise NotImplementedError
+
+    def save_topic_changes(self, records, expected_version=None):
+        """Persist subtopic change records and return the new version"""
+        raise NotImplementedError
+
+    def topic_conflicts(self, records, expected_version):
+        """Keys save_topic_changes would raise ConflictError for, without saving"""
+        if expected_version is None or self.topics_version() == expected_version:
+            return []
+        curriculum = self.load_topics()
+        return find_conflicts(records, lambda r: _subtopic_values(curriculum, r))
+
+    def list_users(self):
+        """Usernames that have stored progress (read-only)"""
+        raise NotImplementedError
+
+    def user_summaries(self):
+        """Summary of every user's progress (see progress.progress_summary), by username"""
+        return {
+            username: progress_summary(self.read_user_progress(username) or {})
+            for username in self.list_users()
+        }
+
+    def user_names(self):
+        """Display name of every user, by username"""
+        return {username: summary['name'] or username for username, summary in self.user_summaries().items()}
+
+    def add_user(self, username, name=None, email=None):
+        """Store an empty progress record for a new user
+
+        Raises ValueError if the user already has progress.
+        """
+        if self.read_user_progress(username) is not None:
+            raise ValueError(f"User {username!r} already exists")
+        progress_data = default_progress(username, name)
+        if email:
+            progress_data['email'] = email
+        self.save_user_progress(username, progress_data)
+        return progress_data
+
+    def load_user_progress(self, username):
+        """Editable progress record for a user, or None if there is none"""
+        raise NotImplementedError
+
+    def read_user_progress(self, username):
+        """Progress record that callers must not modify, or None"""
+        return self.load_user_progress(username)
+
+    def progress_version(self, username):
+        """Version of a user's progress, increasing with every save"""
+        raise NotImplementedError
+
+    def save_user_progress(self, username, progress_data):
+        """Store a user's progress record"""
+        raise NotImplementedError
+
+    def save_progress_changes(self, username, progress_data, records, expected_version=None):
+        """Persist category change records that turn the stored progress into
+        progress_data, and return the new version"""
+        raise NotImplementedError
+
+    def progress_conflicts(self, username, records, expected_version):
+        """Keys save_progress_changes would raise ConflictError for, without saving"""
+        if expected_version is None or self.progress_version(username) == expected_version:
+            return []
+        stored = self.read_user_progress(username)
+        return find_conflicts(records, lambda r: _category_values(stored, r))
+
+    def update_progress_batch(self, edits):
+        """Apply edits to the stored progress of many users in one go
+
+        ``edits`` maps usernames to functions taking the stored progress
+        record (None if there is none, not to be modified) and returning the
+        new one. Each runs under the user's write lock, so nothing saved in
+        the meantime is lost, and only the categories that changed are
+        written. Returns the new version of every user whose progress changed.
+        """
+        raise NotImplementedError
+
+    def completion_events(self):
+        """Every recorded completion event, oldest first (see tracker.events)"""
+        raise NotImplementedError
+
+    def record_completions(self, events):
+        """Append completion events and fold them into the rollups"""
+        raise NotImplementedError
+
+    def completion_series(self, username=ALL, cat_id=ALL, period='day'):
+        """Rolled-up (bucket, completed, uncompleted) counts, oldest first
+
+        ``username`` and ``cat_id`` default to all users and categories.
+        """
+        raise NotImplementedError
+
+    def statistics(self, curriculum, usernames, user_names=None):
+        """Statistics page metrics for the given users (see stats.compute_statistics)
+
+        Computed from the user summaries, so no progress record is parsed.
+        """
+        from tracker.stats import compute_summary_statistics
+
+        summaries = self.user_summaries()
+        selected = {username: summaries.get(username, {}) for username in usernames}
+        return compute_summary_statistics(curriculum, selected, user_names)
+
+
+def _subtopic_values(curriculum, record):
+    return curriculum.subtopic_values(*record['subtopic'])
+
+
+def _category_values(progress_data, record):
+    return {'entry': (progress_data or {}).get('progress', {}).get(record['category'])}
+
+
+class JsonFileStorage(Storage):
+    """topics.json and per-user progress files in one directory
+
+    Edits are appended to a change log next to each file and folded back
+    into the file by a background compaction once the log grows large.
+    Writers hold a per-file lock shared across threads and processes, and
+    files are only ever replaced atomically.
+
+    users.json (with its own change log) indexes a summary of every user,
+    refreshed after each save, so listing users and computing statistics
+    never parse the progress files. Statistics come from a stats.Cohort
+    built from the index once, then moved forward by each indexed change.
+
+    completions.jsonl is the never-truncated completion event log, and
+    completions.rollups.json a snapshot of its rollups together with the
+    log offset it covers; readers only fold in the events after it.
+    """
+
+    def __init__(self, directory, progress_format='json'):
+        if progress_format not in ('json', 'bitset'):
+            raise ValueError(f"Unknown progress format: {progress_format}")
+        self.directory = Path(directory)
+        self.topics_file = self.directory / "topics.json"
+        self.users_file = self.directory / "users.json"
+        self.events_file = self.directory / "completions.jsonl"
+        self.rollups_file = self.directory / "completions.rollups.json"
+        self.progress_format = progress_format
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._compacting = set()
+        self._topics_guard = threading.Lock()
+        self._topics_state = None
+        self._users_guard = threading.Lock()
+        self._users_state = None
+        self._cohort = None
+        self._listing = None
+        self._events_guard = threading.Lock()
+        self._events_state = None
+        self._logs_guard = threading.Lock()
+        self._logs_state = {}
+
+    def progress_file(self, username):
+        """Path of a user's progress file"""
+        suffix = ".bits" if self.progress_format == 'bitset' else ".json"
+        return self.directory / f"progress_{username}{suffix}"
+
+    def _lock(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(Path(path), PathLock(path))
+
+    def _maybe_compact(self, path, compact):
+        """Fold a change log into its snapshot in the background once it is large"""
+        if ChangeLog(log_path(path)).size() < COMPACT_BYTES:
+            return
+        with self._locks_guard:
+            if path in self._compacting:
+                return
+            self._compacting.add(path)
+
+        def run():
+            try:
+                compact()
+            finally:
+                with self._locks_guard:
+                    self._compacting.discard(path)
+
+        threading.Thread(target=run, name=f"compact-{Path(path).name}", daemon=True).start()
+
+    # ---------- curriculum ----------
+
+    def load_topics(self):
+        with self._topics_guard:
+            base = load_curriculum(self.topics_file)
+            log = ChangeLog(log_path(self.topics_file))
+            state = self._topics_state
+            if state is not None and state[0] is base and log.size() >= state[2]:
+                snapshot, offset = state[1], state[2]
+            else:
+                snapshot, offset = base, 0
+            # Each load derives a new snapshot; sessions holding the previous
+            # one keep a consistent view of it
+            records, offset = log.read(offset)
+            snapshot = apply_topic_changes(snapshot, records)
+            self._topics_state = (base, snapshot, offset)
+            return snapshot
+
+    def topics_version(self):
+        return ChangeLog(log_path(self.topics_file)).version()
+
+    def _write_topics(self, topics_data):
+        log = ChangeLog(log_path(self.topics_file))
+        version = log.version() + 1
+        atomic_write_json(self.topics_file, topics_data)
+        log.reset(version)
+        return version
+
+    def save_topics(self, topics_data):
+        with self._lock(self.topics_file):
+            return self._write_topics(topics_data)
+
+    def save_topic_changes(self, records, expected_version=None):
+        with self._lock(self.topics_file):
+            log = ChangeLog(log_path(self.topics_file))
+            version = log.version()
+            if expected_version is not None and version != expected_version:
+                curriculum = self.load_topics()
+                conflicts = find_conflicts(records, lambda r: _subtopic_values(curriculum, r))
+                if conflicts:
+                    raise ConflictError(conflicts)
+            log.append(records, version + 1)
+        self._maybe_compact(self.topics_file, self.compact_topics)
+        return version + 1
+
+    def compact_topics(self):
+        """Fold the curriculum change log into topics.json"""
+        with self._lock(self.topics_file):
+            log = ChangeLog(log_path(self.topics_file))
+            version = log.version()
+            atomic_write_json(self.topics_file, self.load_topics().data)
+            log.reset(version)
+
+    # ---------- progress ----------
+
+    def list_users(self):
+        # Files are only added, removed or replaced by renames, all of which
+        # touch the directory, so its mtime tells when to scan again
+        mtime = self.directory.stat().st_mtime_ns
+        listing = self._listing
+        if listing is not None and listing[0] == mtime:
+            return listing[1]
+        suffix = ".bits" if self.progress_format == 'bitset' else ".json"
+        usernames = sorted(
+            path.name[len("progress_"):-len(suffix)]
+            for path in self.directory.glob(f"progress_*{suffix}")
+        )
+        self._listing = (mtime, usernames)
+        return usernames
+
+    def _indexed_summaries(self):
+        """Summaries in users.json plus its change log (read-only)"""
+        with self._users_guard:
+            snapshot = cached_parse(self.users_file)
+            log = ChangeLog(log_path(self.users_file))
+            state = self._users_state
+            if state is not None and state[0] is snapshot and log.size() >= state[2]:
+                summaries, offset = state[1], state[2]
+            else:
+                summaries, offset = (snapshot or {}).get('users', {}), 0
+                if self._cohort is not None:
+                    # users.json was compacted or replaced: carry the counters over
+                    # to it through the summaries that differ
+                    previous = state[1] if state is not None else {}
+                    for username in previous.keys() | summaries.keys():
+                        if previous.get(username) != summaries.get(username):
+                            self._cohort.apply(username, previous.get(username), summaries.get(username))
+            records, offset = log.read(offset)
+            if records:
+                summaries = dict(summaries)
+                for record in records:
+                    if self._cohort is not None:
+                        self._cohort.apply(record['user'], summaries.get(record['user']), record['summary'])
+                    summaries[record['user']] = record['summary']
+            self._users_state = (snapshot, summaries, offset)
+            return summaries
+
+    def _index_user(self, username):
+        """Append a user's current summary to the users index"""
+        return self._index_users([username])[username]
+
+    def _index_users(self, usernames):
+        """Append the current summaries of several users to the users index in one write"""
+        with self._lock(self.users_file):
+            # Read under the lock, so the last summary appended is never older
+            # than a save that finished before it
+            summaries = {
+                username: progress_summary(self.read_user_progress(username) or {}) for username in usernames
+            }
+            log = ChangeLog(log_path(self.users_file))
+            log.append(
+                [{'user': username, 'summary': summary} for username, summary in summaries.items()],
+                log.version() + 1
+            )
+        # Fold the delta into the statistics counters now rather than on the next page view
+        self._indexed_summaries()
+        self._maybe_compact(self.users_file, self.compact_user_index)
+        return summaries
+
+    def user_summaries(self):
+        summaries = self._indexed_summaries()
+        usernames = self.list_users()
+        missing = [username for username in usernames if username not in summaries]
+        if missing:
+            # Progress files added by hand are indexed on first sight, in one write
+            summaries = {**summaries, **self._index_users(missing)}
+        return {username: summaries[username] for username in usernames}
+
+    def statistics(self, curriculum, usernames, user_names=None):
+        """Statistics page metrics from the cohort counters, in O(users + categories)"""
+        from tracker.stats import Cohort, counter_statistics
+
+        self._indexed_summaries()
+        with self._users_guard:
+            cohort = self._cohort
+            if cohort is None or cohort.category_ids != tuple(curriculum.category_ids):
+                cohort = self._cohort = Cohort(curriculum.category_ids, self._users_state[1])
+            user_totals, category_totals = cohort.snapshot()
+        if user_totals.keys() != set(usernames):
+            # The index also holds users whose progress files were removed
+            return super().statistics(curriculum, usernames, user_names)
+        return counter_statistics(curriculum, usernames, user_totals, category_totals, user_names)
+
+    def compact_user_index(self):
+        """Fold the users index change log into users.json"""
+        with self._lock(self.users_file):
+            log = ChangeLog(log_path(self.users_file))
+            version = log.version()
+            atomic_write_json(self.users_file, {'users': self.user_summaries()}, indent=None)
+            log.reset(version)
+
+    def _read_snapshot(self, username):
+        if self.progress_format == 'bitset':
+            return load_bitset_progress(self.progress_file(username), self.load_topics())
+        return read_progress_file(self.progress_file(username))
+
+    def _log_records(self, username, base):
+        """Records of a user's progress change log
+
+        Continues from the previous read's offset while the snapshot file
+        is unchanged (``base`` is its cached parse), so each record is
+        parsed once.
+        """
+        progress_file = self.progress_file(username)
+        log = ChangeLog(log_path(progress_file))
+        with self._logs_guard:
+            state = self._logs_state.get(progress_file)
+        if state is not None and state[0] is base and log.size() >= state[2]:
+            records, offset = state[1], state[2]
+        else:
+            records, offset = [], 0
+        new_records, offset = log.read(offset)
+        if new_records:
+            records = records + new_records
+        with self._logs_guard:
+            self._logs_state[progress_file] = (base, records, offset)
+        return records
+
+    def _load(self, username, editable):
+        snapshot = self._read_snapshot(username)
+        if snapshot is None:
+            return None
+        base = read_bitset_file(self.progress_file(username)) if self.progress_format == 'bitset' else snapshot
+        records = self._log_records(username, base)
+        if not records and not editable:
+            return snapshot
+        if self.progress_format == 'bitset':
+            progress_data = snapshot
+        elif editable:
+            progress_data = copy.deepcopy(snapshot)
+        else:
+            # Records replace whole category entries, so a read-only view
+            # only needs its own progress mapping
+            progress_data = dict(snapshot, progress=dict(snapshot.get('progress', {})))
+        apply_progress_changes(progress_data, records)
+        return progress_data
+
+    def load_user_progress(self, username):
+        return self._load(username, editable=True)
+
+    def read_user_progress(self, username):
+        return self._load(username, editable=False)
+
+    def progress_version(self, username):
+        return ChangeLog(log_path(self.progress_file(username))).version()
+
+    def _write_progress(self, username, progress_data):
+        progress_file = self.progress_file(username)
+        log = ChangeLog(log_path(progress_file))
+        version = log.version() + 1
+        if self.progress_format == 'bitset':
+            save_bitset_progress(progress_file, self.load_topics(), progress_data)
+        else:
+            atomic_write_json(progress_file, progress_data)
+        log.reset(version)
+        return version
+
+    def save_user_progress(self, username, progress_data):
+        with self._lock(self.progress_file(username)):
+            version = self._write_progress(username, progress_data)
+        self._index_user(username)
+        return version
+
+    def save_progress_changes(self, username, progress_data, records, expected_version=None):
+        progress_file = self.progress_file(username)
+        with self._lock(progress_file):
+            log = ChangeLog(log_path(progress_file))
+            version = log.version()
+            if expected_version is not None and version != expected_version:
+                stored = self.read_user_progress(username)
+                conflicts = find_conflicts(records, lambda r: _category_values(stored, r))
+                if conflicts:
+                    raise ConflictError(conflicts)
+            if not progress_file.exists():
+                version = self._write_progress(username, progress_data)
+            else:
+                version += 1
+                log.append(records, version)
+        self.record_completions(completion_events(username, records))
+        self._index_user(username)
+        self._maybe_compact(progress_file, lambda: self.compact_progress(username))
+        return version
+
+    def update_progress_batch(self, edits):
+        """One log append per user, then the completion events and the
+        users index of the whole batch are each written once"""
+        versions, events = {}, []
+        for username, edit in edits.items():
+            progress_file = self.progress_file(username)
+            with self._lock(progress_file):
+                stored = self.read_user_progress(username)
+                progress_data = edit(stored)
+                records = diff_progress(stored or {}, progress_data)
+                if not records:
+                    continue
+                if stored is None:
+                    versions[username] = self._write_progress(username, progress_data)
+                else:
+                    log = ChangeLog(log_path(progress_file))
+                    versions[username] = log.version() + 1
+                    log.append(records, versions[username])
+            events.extend(completion_events(username, records))
+        self.record_completions(events)
+        if versions:
+            self._index_users(list(versions))
+        for username in versions:
+            self._maybe_compact(self.progress_file(username), lambda u=username: self.compact_progress(u))
+        return versions
+
+    def compact_progress(self, username):
+        """Fold a user's progress change log into their progress file"""
+        progress_file = self.progress_file(username)
+        with self._lock(progress_file):
+            progress_data = self.load_user_progress(username)
+            if progress_data is None:
+                return
+            log = ChangeLog(log_path(progress_file))
+            version = log.version()
+            if self.progress_format == 'bitset':
+                save_bitset_progress(progress_file, self.load_topics(), progress_data)
+            else:
+                atomic_write_json(progress_file, progress_data)
+            log.reset(version)
+
+    # ---------- completion events ----------
+
+    def completion_events(self):
+        events, _ = ChangeLog(self.events_file).read()
+        return events
+
+    def record_completions(self, events):
+        if not events:
+            return
+        with self._lock(self.events_file):
+            log = ChangeLog(self.events_file)
+            log.append(events, log.version() + 1)
+
+    def _rollups(self):
+        """Rollups of the whole event log; call with _events_guard held
+
+        Continues from the previous call's offset, or else from the
+        snapshot, and refreshes the snapshot once more than COMPACT_BYTES of
+        events were folded in after it.
+        """
+        snapshot = cached_parse(self.rollups_file)
+        log = ChangeLog(self.events_file)
+        state = self._events_state
+        if state is not None and state[0] is snapshot and log.size() >= state[2]:
+            rollups, offset = state[1], state[2]
+        else:
+            rollups = CompletionRollups.from_json((snapshot or {}).get('rollups', []))
+            offset = (snapshot or {}).get('offset', 0)
+        events, offset = log.read(offset)
+        rollups.add(events)
+        if offset - (snapshot or {}).get('offset', 0) >= COMPACT_BYTES:
+            atomic_write_json(self.rollups_file, {'offset': offset, 'rollups': rollups.to_json()}, indent=None)
+            snapshot = cached_parse(self.rollups_file)
+        self._events_state = (snapshot, rollups, offset)
+        return rollups
+
+    def completion_series(self, username=ALL, cat_id=ALL, period='day'):
+        with self._events_guard:
+            return self._rollups().series(username, cat_id, period)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    position INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    id_json TEXT NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS topics (
+    cat_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id_json TEXT NOT NULL,
+    name TEXT NOT NULL,
+    extra TEXT,
+    PRIMARY KEY (cat_id, id)
+);
+CREATE TABLE IF NOT EXISTS subtopics (
+    idx INTEGER PRIMARY KEY,
+    cat_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    notes TEXT NOT NULL DEFAULT '',
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS subtopics_by_name ON subtopics (cat_id, topic_id, name);
+CREATE TABLE IF NOT EXISTS resources (
+    subtopic_idx INTEGER NOT NULL REFERENCES subtopics (idx) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (subtopic_idx, position)
+);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    details TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS category_progress (
+    username TEXT NOT NULL,
+    cat_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    completed INTEGER,
+    completion_percentage REAL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (username, cat_id)
+);
+CREATE INDEX IF NOT EXISTS category_progress_by_category ON category_progress (cat_id);
+CREATE TABLE IF NOT EXISTS user_totals (
+    username TEXT PRIMARY KEY,
+    completed INTEGER NOT NULL DEFAULT 0,
+    percentage_sum REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS category_totals (
+    cat_id TEXT PRIMARY KEY,
+    started INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    percentage_sum REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS topic_progress (
+    username TEXT NOT NULL,
+    cat_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (username, cat_id, topic_id)
+);
+CREATE TABLE IF NOT EXISTS subtopic_progress (
+    username TEXT NOT NULL,
+    cat_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    subtopic TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (username, cat_id, topic_id, subtopic)
+);
+CREATE TABLE IF NOT EXISTS completion_events (
+    id INTEGER PRIMARY KEY,
+    t TEXT NOT NULL,
+    username TEXT NOT NULL,
+    cat_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    subtopic TEXT NOT NULL,
+    done INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS completion_rollups (
+    period TEXT NOT NULL,
+    username TEXT NOT NULL,
+    cat_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    uncompleted INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, username, cat_id, bucket)
+);
+"""
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _without(mapping, keys):
+    rest = {k: v for k, v in mapping.items() if k not in keys}
+    return _dumps(rest) if rest else None
+
+
+def _progress_rows(progress_data):
+    """Split a progress record into user, category, topic and subtopic rows"""
+    details = {k: v for k, v in progress_data.items() if k != 'progress'}
+    categories, topics, subtopics = {}, {}, {}
+    for cat_pos, (cat_id, cat_progress) in enumerate(progress_data.get('progress', {}).items()):
+        cat_entry = {k: v for k, v in cat_progress.items() if k != 'topics'}
+        if 'topics' in cat_progress:
+            cat_entry['topics'] = {}
+        completed = cat_progress.get('completed')
+        categories[cat_id] = (
+            cat_pos,
+            None if completed is None else int(bool(completed)),
+            cat_progress.get('completion_percentage'),
+            _dumps(cat_entry)
+        )
+        for topic_pos, (topic_id, topic_progress) in enumerate(cat_progress.get('topics', {}).items()):
+            topic_entry = {k: v for k, v in topic_progress.items() if k != 'subtopics_completed'}
+            topic_entry['has_subtopics'] = 'subtopics_completed' in topic_progress
+            topics[(cat_id, topic_id)] = (topic_pos, _dumps(topic_entry))
+            for sub_pos, name in enumerate(topic_progress.get('subtopics_completed', [])):
+                subtopics[(cat_id, topic_id, name)] = sub_pos
+    return details, categories, topics, subtopics
+
+
+class SqliteStorage(Storage):
+    """Curriculum, users and progress in one SQLite database
+
+    Saving progress only writes the rows that differ from what is stored,
+    so checking one subtopic costs one upsert instead of a file rewrite.
+    user_totals and category_totals hold the Statistics page counters over
+    the curriculum's categories, moved by the same delta on every save.
+    Completion events and their rollup rows are written in the same
+    transaction as the progress they describe.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._snapshot = None
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            if not self._version(conn, 'totals_version'):
+                # Databases from before the totals tables existed
+                self._rebuild_totals(conn)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _version(self, conn, key):
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def _bump_version(self, conn, key):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, '1') "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+            (key,)
+        )
+        return self._version(conn, key)
+
+    def _topics_version(self, conn):
+        return self._version(conn, 'topics_version')
+
+    def _bump_topics_version(self, conn):
+        return self._bump_version(conn, 'topics_version')
+
+    def topics_version(self):
+        return self._topics_version(self._connect())
+
+    # ---------- curriculum ----------
+
+    def load_topics(self):
+        conn = self._connect()
+        version = self._topics_version(conn)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == version:
+            return snapshot[1]
+
+        profiling.count('db_reads')
+        resources = {}
+        for subtopic_idx, data in conn.execute(
+            "SELECT subtopic_idx, data FROM resources ORDER BY subtopic_idx, position"
+        ):
+            resources.setdefault(subtopic_idx, []).append(json.loads(data))
+        subtopics = {}
+        for idx, cat_id, topic_id, name, notes, extra in conn.execute(
+            "SELECT idx, cat_id, topic_id, name, notes, extra FROM subtopics ORDER BY idx"
+        ):
+            subtopic = {'name': name, 'resources': resources.get(idx, []), 'notes': notes}
+            subtopic.update(json.loads(extra) if extra else {})
+            subtopics.setdefault((cat_id, topic_id), []).append(subtopic)
+        topics = {}
+        for cat_id, topic_id, id_json, name, extra in conn.execute(
+            "SELECT cat_id, id, id_json, name, extra FROM topics ORDER BY cat_id, position"
+        ):
+            topic = {'id': json.loads(id_json), 'name': name, 'subtopics': subtopics.get((cat_id, topic_id), [])}
+            topic.update(json.loads(extra) if extra else {})
+            topics.setdefault(cat_id, []).append(topic)
+        learning_path = []
+        for cat_id, id_json, category, description, extra in conn.execute(
+            "SELECT id, id_json, category, description, extra FROM categories ORDER BY position"
+        ):
+            entry = {
+                'id': json.loads(id_json),
+                'category': category,
+                'description': description,
+                'topics': topics.get(cat_id, [])
+            }
+            entry.update(json.loads(extra) if extra else {})
+            learning_path.append(entry)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'topics_extra'").fetchone()
+        topics_data = json.loads(row[0]) if row else {}
+        topics_data['learning_path'] = learning_path
+
+        curriculum = Curriculum(topics_data)
+        self._snapshot = (version, curriculum)
+        return curriculum
+
+    def save_topics(self, topics_data):
+        topics_data = upgrade_topics(topics_data)
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM resources")
+            conn.execute("DELETE FROM subtopics")
+            conn.execute("DELETE FROM topics")
+            conn.execute("DELETE FROM categories")
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('topics_extra', ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+                (_dumps({k: v for k, v in topics_data.items() if k != 'learning_path'}),)
+            )
+            idx = 0
+            for cat_pos, category in enumerate(topics_data['learning_path']):
+                cat_id = str(category['id'])
+                conn.execute(
+                    "INSERT INTO categories (position, id, id_json, category, description, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (cat_pos, cat_id, _dumps(category['id']), category['category'],
+                     category.get('description', ''),
+                     _without(category, ('id', 'category', 'description', 'topics')))
+                )
+                for topic_pos, topic in enumerate(category['topics']):
+                    topic_id = str(topic['id'])
+                    conn.execute(
+                        "INSERT INTO topics (cat_id, id, position, id_json, name, extra) VALUES (?, ?, ?, ?, ?, ?)",
+                        (cat_id, topic_id, topic_pos, _dumps(topic['id']), topic['name'],
+                         _without(topic, ('id', 'name', 'subtopics')))
+                    )
+                    for sub_pos, subtopic in enumerate(topic['subtopics']):
+                        conn.execute(
+                            "INSERT INTO subtopics (idx, cat_id, topic_id, position, name, notes, extra) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (idx, cat_id, topic_id, sub_pos, subtopic['name'], subtopic.get('notes', ''),
+                             _without(subtopic, ('name', 'resources', 'notes')))
+                        )
+                        conn.executemany(
+                            "INSERT INTO resources (subtopic_idx, position, data) VALUES (?, ?, ?)",
+                            [(idx, pos, _dumps(res)) for pos, res in enumerate(subtopic.get('resources', []))]
+                        )
+                        idx += 1
+            self._rebuild_totals(conn)
+            return self._bump_topics_version(conn)
+
+    def _update_subtopic(self, conn, cat_id, topic_id, name, resources=None, notes=None):
+        row = conn.execute(
+            "SELECT idx FROM subtopics WHERE cat_id = ? AND topic_id = ? AND name = ? ORDER BY idx LIMIT 1",
+            (str(cat_id), str(topic_id), name)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"Unknown subtopic {cat_id}/{topic_id}/{name}")
+        if notes is not None:
+            conn.execute("UPDATE subtopics SET notes = ? WHERE idx = ?", (notes, row[0]))
+        if resources is not None:
+            conn.execute("DELETE FROM resources WHERE subtopic_idx = ?", (row[0],))
+            conn.executemany(
+                "INSERT INTO resources (subtopic_idx, position, data) VALUES (?, ?, ?)",
+                [(row[0], pos, _dumps(res)) for pos, res in enumerate(resources)]
+            )
+
+    def _subtopic_values(self, conn, record):
+        cat_id, topic_id, name = record['subtopic']
+        row = conn.execute(
+            "SELECT idx, notes FROM subtopics WHERE cat_id = ? AND topic_id = ? AND name = ? ORDER BY idx LIMIT 1",
+            (cat_id, topic_id, name)
+        ).fetchone()
+        if row is None:
+            return {}
+        resources = [json.loads(data) for (data,) in conn.execute(
+            "SELECT data FROM resources WHERE subtopic_idx = ? ORDER BY position", (row[0],)
+        )]
+        return {'resources': resources, 'notes': row[1]}
+
+    def save_topic_changes(self, records, expected_version=None):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if expected_version is not None and self._topics_version(conn) != expected_version:
+                conflicts = find_conflicts(records, lambda r: self._subtopic_values(conn, r))
+                if conflicts:
+                    raise ConflictError(conflicts)
+            for record in records:
+                cat_id, topic_id, name = record['subtopic']
+                self._update_subtopic(conn, cat_id, topic_id, name, record.get('resources'), record.get('notes'))
+            version = self._bump_topics_version(conn)
+        # Derive the next snapshot from the cached one instead of reloading it
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == version - 1:
+            self._snapshot = (version, apply_topic_changes(snapshot[1], records))
+        return version
+
+    # ---------- progress ----------
+
+    def list_users(self):
+        conn = self._connect()
+        return [row[0] for row in conn.execute("SELECT username FROM users ORDER BY position, username")]
+
+    def user_names(self):
+        conn = self._connect()
+        return {
+            username: name or username for username, name in conn.execute(
+                "SELECT username, json_extract(details, '$.name') FROM users ORDER BY position, username"
+            )
+        }
+
+    def user_summaries(self):
+        conn = self._connect()
+        summaries = {}
+        for username, details in conn.execute("SELECT username, details FROM users ORDER BY position, username"):
+            summaries[username] = progress_summary(json.loads(details))
+        for username, cat_id, percentage, completed in conn.execute(
+            "SELECT username, cat_id, completion_percentage, completed FROM category_progress ORDER BY position"
+        ):
+            summaries[username]['categories'][cat_id] = [percentage or 0, bool(completed)]
+        return summaries
+
+    def load_user_progress(self, username):
+        profiling.count('db_reads')
+        conn = self._connect()
+        row = conn.execute("SELECT details FROM users WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            return None
+        progress_data = json.loads(row[0])
+
+        subtopics = {}
+        for cat_id, topic_id, name in conn.execute(
+            "SELECT cat_id, topic_id, subtopic FROM subtopic_progress WHERE username = ? "
+            "ORDER BY cat_id, topic_id, position",
+            (username,)
+        ):
+            subtopics.setdefault((cat_id, topic_id), []).append(name)
+        topics = {}
+        for cat_id, topic_id, entry in conn.execute(
+            "SELECT cat_id, topic_id, entry FROM topic_progress WHERE username = ? ORDER BY cat_id, position",
+            (username,)
+        ):
+            entry = json.loads(entry)
+            if entry.pop('has_subtopics'):
+                entry['subtopics_completed'] = subtopics.get((cat_id, topic_id), [])
+            topics.setdefault(cat_id, {})[topic_id] = entry
+        progress = {}
+        for cat_id, entry in conn.execute(
+            "SELECT cat_id, entry FROM category_progress WHERE username = ? ORDER BY position",
+            (username,)
+        ):
+            entry = json.loads(entry)
+            if 'topics' in entry:
+                entry['topics'] = topics.get(cat_id, {})
+            progress[cat_id] = entry
+        progress_data['progress'] = progress
+        return progress_data
+
+    def progress_version(self, username):
+        return self._version(self._connect(), f'progress_version:{username}')
+
+    def save_user_progress(self, username, progress_data):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._write_progress_rows(conn, username, progress_data)
+            return self._bump_version(conn, f'progress_version:{username}')
+
+    def save_progress_changes(self, username, progress_data, records, expected_version=None):
+        conn = self._connect()
+        version_key = f'progress_version:{username}'
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stored = self.load_user_progress(username)
+            if expected_version is not None and self._version(conn, version_key) != expected_version:
+                conflicts = find_conflicts(records, lambda r: _category_values(stored, r))
+                if conflicts:
+                    raise ConflictError(conflicts)
+            if stored is None:
+                merged = progress_data
+            else:
+                # Apply only this save's records so concurrent edits to other categories survive
+                merged = stored
+                apply_progress_changes(merged, records)
+            self._write_progress_rows(conn, username, merged)
+            self._write_completions(conn, completion_events(username, records))
+            return self._bump_version(conn, version_key)
+
+    def update_progress_batch(self, edits):
+        """All users' rows, events and versions in one transaction"""
+        conn = self._connect()
+        versions = {}
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for username, edit in edits.items():
+                stored = self.load_user_progress(username)
+                progress_data = edit(stored)
+                records = diff_progress(stored or {}, progress_data)
+                if not records:
+                    continue
+                self._write_progress_rows(conn, username, progress_data)
+                self._write_completions(conn, completion_events(username, records))
+                versions[username] = self._bump_version(conn, f'progress_version:{username}')
+        return versions
+
+    def _rebuild_totals(self, conn):
+        """Recount user_totals and category_totals from category_progress"""
+        conn.execute("DELETE FROM user_totals")
+        conn.execute("DELETE FROM category_totals")
+        conn.execute(
+            "INSERT INTO user_totals (username, completed, percentage_sum) "
+            "SELECT username, SUM(COALESCE(completed, 0)), SUM(COALESCE(completion_percentage, 0)) "
+            "FROM category_progress WHERE cat_id IN (SELECT id FROM categories) GROUP BY username"
+        )
+        conn.execute(
+            "INSERT INTO category_totals (cat_id, started, completed, percentage_sum) "
+            "SELECT cat_id, SUM(COALESCE(completion_percentage, 0) > 0), SUM(COALESCE(completed, 0)), "
+            "SUM(COALESCE(completion_percentage, 0)) "
+            "FROM category_progress WHERE cat_id IN (SELECT id FROM categories) GROUP BY cat_id"
+        )
+        self._bump_version(conn, 'totals_version')
+
+    def _update_totals(self, conn, username, before, after):
+        """Move the totals by the change of a user's category rows
+
+        ``before`` and ``after`` map category ids to (position, completed,
+        completion_percentage, entry) rows; only changed ones are given.
+        """
+        known = {cat_id for (cat_id,) in conn.execute("SELECT id FROM categories")}
+        deltas = {}
+        for cat_id in (before.keys() | after.keys()) & known:
+            started = completed = percentage = 0
+            for row, sign in ((before.get(cat_id), -1), (after.get(cat_id), 1)):
+                if row is not None:
+                    started += sign * ((row[2] or 0) > 0)
+                    completed += sign * (row[1] or 0)
+                    percentage += sign * (row[2] or 0)
+            if started or completed or percentage:
+                deltas[cat_id] = (started, completed, percentage)
+        if not deltas:
+            return
+        conn.executemany(
+            "INSERT INTO category_totals (cat_id, started, completed, percentage_sum) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (cat_id) DO UPDATE SET started = started + excluded.started, "
+            "completed = completed + excluded.completed, percentage_sum = percentage_sum + excluded.percentage_sum",
+            [(cat_id,) + delta for cat_id, delta in deltas.items()]
+        )
+        conn.execute(
+            "INSERT INTO user_totals (username, completed, percentage_sum) VALUES (?, ?, ?) "
+            "ON CONFLICT (username) DO UPDATE SET completed = completed + excluded.completed, "
+            "percentage_sum = percentage_sum + excluded.percentage_sum",
+            (username, sum(d[1] for d in deltas.values()), sum(d[2] for d in deltas.values()))
+        )
+
+    def _write_progress_rows(self, conn, username, progress_data):
+        details, categories, topics, subtopics = _progress_rows(progress_data)
+        row = conn.execute("SELECT details FROM users WHERE username = ?", (username,)).fetchone()
+        if row is None or row[0] != _dumps(details):
+            conn.execute(
+                "INSERT INTO users (username, position, details) "
+                "VALUES (?, (SELECT COUNT(*) FROM users), ?) "
+                "ON CONFLICT (username) DO UPDATE SET details = excluded.details",
+                (username, _dumps(details))
+            )
+
+        stored = {
+            row[0]: tuple(row[1:]) for row in conn.execute(
+                "SELECT cat_id, position, completed, completion_percentage, entry "
+                "FROM category_progress WHERE username = ?", (username,)
+            )
+        }
+        changed = {cat_id: row for cat_id, row in categories.items() if stored.get(cat_id) != row}
+        removed = stored.keys() - categories.keys()
+        conn.executemany(
+            "DELETE FROM category_progress WHERE username = ? AND cat_id = ?",
+            [(username, cat_id) for cat_id in removed]
+        )
+        conn.executemany(
+            "INSERT INTO category_progress (username, cat_id, position, completed, completion_percentage, entry) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (username, cat_id) DO UPDATE SET "
+            "position = excluded.position, completed = excluded.completed, "
+            "completion_percentage = excluded.completion_percentage, entry = excluded.entry",
+            [(username, cat_id) + row for cat_id, row in changed.items()]
+        )
+        self._update_totals(
+            conn, username, {cat_id: stored[cat_id] for cat_id in removed | (changed.keys() & stored.keys())}, changed
+        )
+
+        stored = {
+            (row[0], row[1]): tuple(row[2:]) for row in conn.execute(
+                "SELECT cat_id, topic_id, position, entry FROM topic_progress WHERE username = ?", (username,)
+            )
+        }
+        conn.executemany(
+            "DELETE FROM topic_progress WHERE username = ? AND cat_id = ? AND topic_id = ?",
+            [(username,) + key for key in stored.keys() - topics.keys()]
+        )
+        conn.executemany(
+            "INSERT INTO topic_progress (username, cat_id, topic_id, position, entry) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (username, cat_id, topic_id) DO UPDATE SET "
+            "position = excluded.position, entry = excluded.entry",
+            [(username,) + key + row for key, row in topics.items() if stored.get(key) != row]
+        )
+
+        stored = {
+            (row[0], row[1], row[2]): row[3] for row in conn.execute(
+                "SELECT cat_id, topic_id, subtopic, position FROM subtopic_progress WHERE username = ?",
+                (username,)
+            )
+        }
+        conn.executemany(
+            "DELETE FROM subtopic_progress WHERE username = ? AND cat_id = ? AND topic_id = ? AND subtopic = ?",
+            [(username,) + key for key in stored.keys() - subtopics.keys()]
+        )
+        conn.executemany(
+            "INSERT INTO subtopic_progress (username, cat_id, topic_id, subtopic, position) "
+            "VALUES (?, ?, ?, ?, ?) ON CONFLICT (username, cat_id, topic_id, subtopic) "
+            "DO UPDATE SET position = excluded.position",
+            [(username,) + key + (pos,) for key, pos in subtopics.items() if stored.get(key) != pos]
+        )
+
+    # ---------- completion events ----------
+
+    def completion_events(self):
+        conn = self._connect()
+        return [
+            {'t': t, 'user': username, 'cat': cat_id, 'topic': topic_id, 'subtopic': subtopic, 'done': bool(done)}
+            for t, username, cat_id, topic_id, subtopic, done in conn.execute(
+                "SELECT t, username, cat_id, topic_id, subtopic, done FROM completion_events ORDER BY id"
+            )
+        ]
+
+    def _write_completions(self, conn, events):
+        conn.executemany(
+            "INSERT INTO completion_events (t, username, cat_id, topic_id, subtopic, done) VALUES (?, ?, ?, ?, ?, ?)",
+            [(e['t'], e['user'], e['cat'], e['topic'], e['subtopic'], int(e['done'])) for e in events]
+        )
+        conn.executemany(
+            "INSERT INTO completion_rollups (period, username, cat_id, bucket, completed, uncompleted) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (period, username, cat_id, bucket) DO UPDATE SET "
+            "completed = completed + excluded.completed, uncompleted = uncompleted + excluded.uncompleted",
+            [
+                key + (bucket, completed, uncompleted)
+                for key, buckets in rollup_deltas(events).items()
+                for bucket, (completed, uncompleted) in buckets.items()
+            ]
+        )
+
+    def record_completions(self, events):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._write_completions(conn, events)
+
+    def completion_series(self, username=ALL, cat_id=ALL, period='day'):
+        conn = self._connect()
+        return conn.execute(
+            "SELECT bucket, completed, uncompleted FROM completion_rollups "
+            "WHERE period = ? AND username = ? AND cat_id = ? ORDER BY bucket",
+            (period, username, cat_id)
+        ).fetchall()
+
+    def statistics(self, curriculum, usernames, user_names=None):
+        """Statistics page metrics from the totals tables
+
+        Reading them costs O(users + categories); SQL aggregates over
+        category_progress are only used for a subset of the users.
+        """
+        from tracker.stats import counter_statistics
+
+        usernames = list(usernames)
+        conn = self._connect()
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS selected_users (username TEXT PRIMARY KEY)")
+        with conn:
+            conn.execute("DELETE FROM selected_users")
+            conn.executemany("INSERT OR IGNORE INTO selected_users VALUES (?)", [(u,) for u in usernames])
+
+        n_selected, n_stored = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM selected_users JOIN users USING (username)), (SELECT COUNT(*) FROM users)"
+        ).fetchone()
+        if n_selected == n_stored == len(usernames):
+            category_totals = {
+                cat_id: (started, completed, pct_sum) for cat_id, started, completed, pct_sum in conn.execute(
+                    "SELECT cat_id, started, completed, percentage_sum FROM category_totals"
+                )
+            }
+            user_totals = {
+                username: (completed, pct_sum) for username, completed, pct_sum in conn.execute(
+                    "SELECT username, completed, percentage_sum FROM user_totals JOIN selected_users USING (username)"
+                )
+            }
+        else:
+            category_totals = {
+                cat_id: (started, completed, pct_sum) for cat_id, started, completed, pct_sum in conn.execute(
+                    "SELECT cat_id, "
+                    "SUM(COALESCE(completion_percentage, 0) > 0), "
+                    "SUM(COALESCE(completed, 0)), "
+                    "SUM(COALESCE(completion_percentage, 0)) "
+                    "FROM category_progress JOIN selected_users USING (username) GROUP BY cat_id"
+                )
+            }
+            user_totals = {
+                username: (completed, pct_sum) for username, completed, pct_sum in conn.execute(
+                    "SELECT username, SUM(COALESCE(completed, 0)), SUM(COALESCE(completion_percentage, 0)) "
+                    "FROM category_progress JOIN selected_users USING (username) "
+                    "WHERE cat_id IN (SELECT id FROM categories) GROUP BY username"
+                )
+            }
+        return counter_statistics(curriculum, usernames, user_totals, category_totals, user_names)
+
+
+def open_storage(spec, base_dir):
+    """Storage for a spec string: "json", "bitset" or "sqlite:<path>"
+
+    Relative paths are resolved against ``base_dir``.
+    """
+    base_dir = Path(base_dir)
+    if spec in ('json', 'bitset'):
+        return JsonFileStorage(base_dir, progress_format=spec)
+    if spec.startswith('sqlite:'):
+        return SqliteStorage(base_dir / spec[len('sqlite:'):])
+    raise ValueError(f"Unknown storage: {spec!r} (expected json, bitset or sqlite:<path>)")
+
+
+def _event_key(event):
+    return event['t'], event['user'], event['cat'], event['topic'], event['subtopic'], bool(event['done'])
+
+
+def migrate(source, target):
+    """Copy the curriculum, every user's progress and the completion history
+    from one storage to another
+
+    Safe to re-run: source events the target already holds (matched one
+    for one, so repeated identical events are kept) are not imported again.
+    """
+    target.save_topics(source.load_topics().data)
+    usernames = source.list_users()
+    for username in usernames:
+        target.save_user_progress(username, source.load_user_progress(username))
+    held = Counter(_event_key(event) for event in target.completion_events())
+    events = []
+    for event in source.completion_events():
+        key = _event_key(event)
+        if held[key]:
+            held[key] -= 1
+        else:
+            events.append(event)
+    target.record_completions(events)
+    return usernames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Learning tracker storage tools")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help="Import JSON files into a SQLite database")
+    migrate_parser.add_argument('--source', type=Path, default=Path('.'),
+                                help="Directory holding topics.json and progress_<user>.json files")
+    migrate_parser.add_argument('--format', choices=['json', 'bitset'], default='json',
+                                help="Format of the progress files to import")
+    migrate_parser.add_argument('--db', type=Path, required=True, help="SQLite database to create or update")
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        usernames = migrate(JsonFileStorage(args.source, args.format), SqliteStorage(args.db))
+        print(f"Imported curriculum and {len(usernames)} users into {args.db}")
+
+
+if __name__ == '__main__':
+    main()
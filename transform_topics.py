@@ -1,30 +1,15 @@
-import json
-from pathlib import Path
+"""Upgrade topics.json and the progress files next to this script
+
+Kept for existing instructions; the same as
 
-# Read current topics.json
-topics_file = Path("topics.json")
-with open(topics_file, 'r') as f:
-    data = json.load(f)
+    python -m tracker.migrations --source <directory of this script>
 
-# Transform all subtopics to objects with resources and notes
-for category in data['learning_path']:
-    for topic in category['topics']:
-        new_subtopics = []
-        for subtopic in topic['subtopics']:
-            if isinstance(subtopic, str):
-                # Convert string to object
-                new_subtopics.append({
-                    "name": subtopic,
-                    "resources": [],
-                    "notes": ""
-                })
-            else:
-                # Already an object, keep it
-                new_subtopics.append(subtopic)
-        topic['subtopics'] = new_subtopics
+Add --dry-run to only report what would change.
+"""
+import sys
+from pathlib import Path
 
-# Save back
-with open(topics_file, 'w') as f:
-    json.dump(data, f, indent=2)
+from tracker.migrations import main
 
-print("Topics.json updated successfully!")
+if __name__ == '__main__':
+    main(['--source', str(Path(__file__).resolve().parent)] + sys.argv[1:])